@@ -1,17 +1,28 @@
-from typing import Any, Text, Dict, List
+from typing import TYPE_CHECKING, Any, Text, Dict, List
 from rasa_sdk import Action, Tracker
 from rasa_sdk import events
 from rasa_sdk.executor import CollectingDispatcher
 from rasa_sdk.events import FollowupAction, SlotSet  # Corrected import
-import pandas as pd
 import os
 import json
-import uuid
-import requests
-import time
-import random
-
-class JewelryAction(Action):
+import logging
+from .order_store import get_order_store
+from .id_generator import get_id_generator, extract_order_id
+from .issue_log import get_issue_log
+from .sentiment import score_text, label_for
+from .review_store import get_review_store, format_rating_badge
+from .styling_retriever import get_styling_retriever, STYLING_MODE
+from .offload import OffloadedAction
+from .catalog import get_catalog, notna, CATALOG_PATH
+from .instrumentation import instrumented
+from .startup import startup
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+class JewelryAction(OffloadedAction):
     """Base class for jewelry-related actions with shared functionality"""
     
     PRODUCTS_PER_PAGE = 5
@@ -19,7 +30,7 @@ class JewelryAction(Action):
     def __init__(self):
         self.df = None
         self.current_dir = os.path.dirname(os.path.abspath(__file__))
-        self.csv_path = os.path.join(self.current_dir, 'jewelry_data.csv')
+        self.csv_path = CATALOG_PATH
         self.filtered_data = None
         self.current_page = 0
 
@@ -27,21 +38,15 @@ class JewelryAction(Action):
         return "jewelry_action_base"
 
     def load_data(self):
-        """Load the CSV data if not already loaded"""
+        """Use the shared catalog, loaded once per process"""
         if self.df is None:
-            if not os.path.exists(self.csv_path):
-                raise FileNotFoundError(f"CSV file not found at: {self.csv_path}")
-            self.df = pd.read_csv(self.csv_path)
+            self.df = get_catalog().df
 
-    def get_base_filtered_data(self, main_category: str, sub_category: str) -> pd.DataFrame:
+    def get_base_filtered_data(self, main_category: str, sub_category: str) -> "pd.DataFrame":
         """Get data filtered by main category and sub category"""
-        self.load_data()
-        return self.df[
-            (self.df['main_category'] == main_category) & 
-            (self.df['sub_category'] == sub_category)
-        ]
+        return get_catalog().category(main_category, sub_category)
 
-    def apply_view_filter(self, base_data: pd.DataFrame, view_type: str) -> pd.DataFrame:
+    def apply_view_filter(self, base_data: "pd.DataFrame", view_type: str) -> "pd.DataFrame":
         """Apply bestseller or discount filter based on view type"""
         if view_type == "bestseller":
             return base_data[base_data['is_bestseller'] == 1]
@@ -50,13 +55,13 @@ class JewelryAction(Action):
         else:  # regular view
             return base_data
 
-    def get_page_slice(self, data: pd.DataFrame, page: int) -> pd.DataFrame:
+    def get_page_slice(self, data: "pd.DataFrame", page: int) -> "pd.DataFrame":
         """Get a slice of data for the current page"""
         start_idx = page * self.PRODUCTS_PER_PAGE
         end_idx = min(start_idx + self.PRODUCTS_PER_PAGE, len(data))  # Ensure we don't exceed data size
         return data.iloc[start_idx:end_idx]
 
-    def format_product_message(self, products: pd.DataFrame, 
+    def format_product_message(self, products: "pd.DataFrame", 
                              page: int, total_count: int,
                              view_type: str = "products") -> str:
         """Format product information into a readable message"""
@@ -75,6 +80,14 @@ class JewelryAction(Action):
         
         message = f"Showing {start_idx}-{end_idx} of {total_count} {display_type}:\n\n"
         
+        # Rating aggregates for the whole page in a single lookup
+        ratings = {}
+        if 'SKU' in products.columns:
+            try:
+                ratings = get_review_store().get_aggregates(products['SKU'].astype(str).tolist())
+            except Exception as e:
+                logger.warning("Error loading product ratings: %s", e)
+        
         for i, (_, product) in enumerate(products.iterrows(), start=1):
             product_idx = start_idx + i - 1  # Calculate unique product index
             
@@ -83,10 +96,13 @@ class JewelryAction(Action):
             discounted_price = product.get('Discounted_Base_Price_Without_Addon', None)
             
             message += f"🏆 {product_name}\n"
+            rating_badge = format_rating_badge(ratings.get(str(product.get('SKU'))))
+            if rating_badge:
+                message += f"{rating_badge}\n"
             message += f"💎 {product['Definition']}\n"
             message += f"💰 Base Price: ₹{base_price}\n"
             
-            if pd.notna(discounted_price):
+            if notna(discounted_price):
                 message += f"🏷️ Discounted Price: ₹{discounted_price}\n"
             
             message += f"⌛ Delivery Time: {product['Delivery_Time']}\n"
@@ -95,7 +111,7 @@ class JewelryAction(Action):
         
         return message
 
-    def create_product_buttons(self, products: pd.DataFrame, page: int) -> List[Dict]:
+    def create_product_buttons(self, products: "pd.DataFrame", page: int) -> List[Dict]:
         """Create buttons for each product in the current page"""
         if products.empty:
             return []
@@ -227,9 +243,9 @@ class ActionShowBestsellers(JewelryAction):
     def name(self) -> Text:
         return "action_show_bestsellers"
 
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    def run_sync(self, dispatcher: CollectingDispatcher,
+                 tracker: Tracker,
+                 domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         try:
             # Check if we're continuing shopping and already have a page
@@ -238,8 +254,8 @@ class ActionShowBestsellers(JewelryAction):
             
             # If continuing and page > 0, use ActionShowMore to go to that page
             if is_continuing and current_page > 0:
-                print(f"Continuing bestseller browsing at page {current_page}")
-                return ActionShowMore().run(dispatcher, tracker, domain)
+                logger.debug("Continuing bestseller browsing at page %s", current_page)
+                return ActionShowMore().run_sync(dispatcher, tracker, domain)
             
             # Otherwise start from page 0
             # Reset state first
@@ -247,16 +263,16 @@ class ActionShowBestsellers(JewelryAction):
             
             # Check if we're already in a bestseller view (to prevent double execution)
             if self.is_switching_views(tracker, "action_show_bestsellers"):
-                print("View switching detected: -> bestsellers")
+                logger.debug("View switching detected: -> bestsellers")
             else:
-                print("Direct bestseller view")
+                logger.debug("Direct bestseller view")
                 
             main_category = tracker.get_slot('main_category')
             sub_category = tracker.get_slot('sub_category')
             
             # Debug information
-            print(f"ActionShowBestsellers: RESETTING page counter to 0")
-            print(f"Main category: {main_category}, Sub category: {sub_category}")
+            logger.debug("ActionShowBestsellers: resetting page counter to 0")
+            logger.debug("Main category: %s, Sub category: %s", main_category, sub_category)
             
             # Get base filtered data
             base_data = self.get_base_filtered_data(main_category, sub_category)
@@ -313,7 +329,7 @@ class ActionShowBestsellers(JewelryAction):
             ]
 
         except Exception as e:
-            print(f"Error in ActionShowBestsellers: {str(e)}")
+            logger.exception("Error in ActionShowBestsellers: %s", e)
             dispatcher.utter_message(
                 text="Sorry, I encountered an error while fetching bestsellers. Would you like to try something else?",
                 buttons=[
@@ -333,9 +349,9 @@ class ActionShowDiscounted(JewelryAction):
     def name(self) -> Text:
         return "action_show_discounted"
 
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    def run_sync(self, dispatcher: CollectingDispatcher,
+                 tracker: Tracker,
+                 domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         try:
             # Check if we're continuing shopping and already have a page
@@ -344,8 +360,8 @@ class ActionShowDiscounted(JewelryAction):
             
             # If continuing and page > 0, use ActionShowMore to go to that page
             if is_continuing and current_page > 0:
-                print(f"Continuing discounted browsing at page {current_page}")
-                return ActionShowMore().run(dispatcher, tracker, domain)
+                logger.debug("Continuing discounted browsing at page %s", current_page)
+                return ActionShowMore().run_sync(dispatcher, tracker, domain)
             
             # Otherwise start from page 0
             # Reset state first
@@ -353,16 +369,16 @@ class ActionShowDiscounted(JewelryAction):
             
             # Check if we're already in a discounted view (to prevent double execution)
             if self.is_switching_views(tracker, "action_show_discounted"):
-                print("View switching detected: -> discounted")
+                logger.debug("View switching detected: -> discounted")
             else:
-                print("Direct discounted view")
+                logger.debug("Direct discounted view")
                 
             main_category = tracker.get_slot('main_category')
             sub_category = tracker.get_slot('sub_category')
             
             # Debug information
-            print(f"ActionShowDiscounted: RESETTING page counter to 0")
-            print(f"Main category: {main_category}, Sub category: {sub_category}")
+            logger.debug("ActionShowDiscounted: resetting page counter to 0")
+            logger.debug("Main category: %s, Sub category: %s", main_category, sub_category)
             
             # Get base filtered data
             base_data = self.get_base_filtered_data(main_category, sub_category)
@@ -419,7 +435,7 @@ class ActionShowDiscounted(JewelryAction):
             ]
 
         except Exception as e:
-            print(f"Error in ActionShowDiscounted: {str(e)}")
+            logger.exception("Error in ActionShowDiscounted: %s", e)
             dispatcher.utter_message(
                 text="Sorry, I encountered an error while fetching discounted products. Would you like to try something else?",
                 buttons=[
@@ -440,9 +456,9 @@ class ActionShowRegular(JewelryAction):
     def name(self) -> Text:
         return "action_show_regular"
 
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    def run_sync(self, dispatcher: CollectingDispatcher,
+                 tracker: Tracker,
+                 domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         try:
             # Check if we're continuing shopping and already have a page
@@ -451,8 +467,8 @@ class ActionShowRegular(JewelryAction):
             
             # If continuing and page > 0, use ActionShowMore to go to that page
             if is_continuing and current_page > 0:
-                print(f"Continuing regular browsing at page {current_page}")
-                return ActionShowMore().run(dispatcher, tracker, domain)
+                logger.debug("Continuing regular browsing at page %s", current_page)
+                return ActionShowMore().run_sync(dispatcher, tracker, domain)
             
             # Otherwise start from page 0
             # Reset state first
@@ -460,16 +476,16 @@ class ActionShowRegular(JewelryAction):
             
             # Check if we're already in a regular view (to prevent double execution)
             if self.is_switching_views(tracker, "action_show_regular"):
-                print("View switching detected: -> regular")
+                logger.debug("View switching detected: -> regular")
             else:
-                print("Direct regular view")
+                logger.debug("Direct regular view")
                 
             main_category = tracker.get_slot('main_category')
             sub_category = tracker.get_slot('sub_category')
             
             # Debug information
-            print(f"ActionShowRegular: RESETTING page counter to 0")
-            print(f"Main category: {main_category}, Sub category: {sub_category}")
+            logger.debug("ActionShowRegular: resetting page counter to 0")
+            logger.debug("Main category: %s, Sub category: %s", main_category, sub_category)
             
             # Get base filtered data (no additional filters for regular view)
             regular_products = self.get_base_filtered_data(main_category, sub_category)
@@ -525,7 +541,7 @@ class ActionShowRegular(JewelryAction):
             ]
 
         except Exception as e:
-            print(f"Error in ActionShowRegular: {str(e)}")
+            logger.exception("Error in ActionShowRegular: %s", e)
             dispatcher.utter_message(
                 text="Sorry, I encountered an error while fetching products. Would you like to explore a different category?",
                 buttons=[
@@ -546,9 +562,9 @@ class ActionShowMore(JewelryAction):
     def name(self) -> Text:
         return "action_show_more"
 
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    def run_sync(self, dispatcher: CollectingDispatcher,
+                 tracker: Tracker,
+                 domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         try:
             # Get view state
@@ -561,12 +577,12 @@ class ActionShowMore(JewelryAction):
             # Determine if this is a continuation from shopping
             is_continuing = tracker.get_slot('intent') == 'continue_shopping'
             
-            print(f"ActionShowMore: current_page={current_page}, view_type={view_type}, continuing={is_continuing}")
+            logger.debug("ActionShowMore: current_page=%s, view_type=%s, continuing=%s", current_page, view_type, is_continuing)
             
             # Fix for missing view type
             if not view_type:
                 view_type = last_view_type or "regular"
-                print(f"Using fallback view_type: {view_type}")
+                logger.debug("Using fallback view_type: %s", view_type)
             
             # Get filtered data
             base_data = self.get_base_filtered_data(main_category, sub_category)
@@ -636,7 +652,7 @@ class ActionShowMore(JewelryAction):
             ]
 
         except Exception as e:
-            print(f"Error in ActionShowMore: {str(e)}")
+            logger.exception("Error in ActionShowMore: %s", e)
             dispatcher.utter_message(
                 text="Unable to load products. Please choose an alternative:",
                 buttons=[
@@ -655,13 +671,15 @@ class ActionShowMore(JewelryAction):
                 SlotSet("last_page", None)
             ]
 
-class ActionResetCategoryFlow(Action):
+class ActionResetCategoryFlow(OffloadedAction):
+    offload = False
+
     def name(self) -> Text:
         return "action_reset_category_flow"
 
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    def run_sync(self, dispatcher: CollectingDispatcher,
+                 tracker: Tracker,
+                 domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         # Show a confirmation message with a button to proceed
         dispatcher.utter_message(
@@ -690,13 +708,13 @@ class ActionResetCategoryFlow(Action):
             SlotSet("last_page", None)
         ]
     
-class ActionAddToCart(Action):
+class ActionAddToCart(OffloadedAction):
     def name(self) -> Text:
         return "action_add_to_cart"
 
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    def run_sync(self, dispatcher: CollectingDispatcher,
+                 tracker: Tracker,
+                 domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         try:
             # Extract product index from the entity
@@ -718,7 +736,7 @@ class ActionAddToCart(Action):
             current_page = int(tracker.get_slot('current_page') or 0)
             
             # Debug information
-            print(f"Adding to cart: product_idx={product_idx_str}, page={current_page}, view={view_type}")
+            logger.debug("Adding to cart: product_idx=%s, page=%s, view=%s", product_idx_str, current_page, view_type)
             
             # Get the filtered data
             base_data = jewelry_action.get_base_filtered_data(main_category, sub_category)
@@ -728,7 +746,7 @@ class ActionAddToCart(Action):
             try:
                 product_idx = int(product_idx_str)
             except ValueError:
-                print(f"Invalid product index: {product_idx_str}")
+                logger.warning("Invalid product index: %s", product_idx_str)
                 dispatcher.utter_message(
                     text="Sorry, I couldn't identify the product you're trying to add. Please try again."
                 )
@@ -739,11 +757,11 @@ class ActionAddToCart(Action):
             absolute_idx = product_idx - 1
             
             # Debug information
-            print(f"Calculated absolute index: {absolute_idx}")
+            logger.debug("Calculated absolute index: %s", absolute_idx)
             
             # Make sure we have valid data and index is within range
             if filtered_data.empty or absolute_idx >= len(filtered_data) or absolute_idx < 0:
-                print(f"Invalid index: absolute_idx={absolute_idx}, filtered_data size={len(filtered_data)}")
+                logger.warning("Invalid index: absolute_idx=%s, filtered_data size=%s", absolute_idx, len(filtered_data))
                 dispatcher.utter_message(
                     text="Sorry, I couldn't find that product. Please try again."
                 )
@@ -756,13 +774,14 @@ class ActionAddToCart(Action):
                 # Safely get product details with appropriate conversions
                 product_id = str(product.get('Product_ID', f"prod_{absolute_idx}"))  # Use absolute_idx instead of product_idx
                 product_name = str(product['Product_Name'])
+                sku = str(product.get('SKU', product_id))
                 
                 # Safely convert base price to float
                 try:
                     base_price = float(product['Base_Price_Without_Addon'])
                 except (ValueError, TypeError):
                     # If conversion fails, use a default value
-                    print(f"Warning: Could not convert base price to float: {product['Base_Price_Without_Addon']}")
+                    logger.warning("Could not convert base price to float: %s", product['Base_Price_Without_Addon'])
                     base_price = 0.0
                 
                 # Handle discounted price with safe conversion
@@ -770,13 +789,13 @@ class ActionAddToCart(Action):
                 if 'Discounted_Base_Price_Without_Addon' in product:
                     discount_value = product['Discounted_Base_Price_Without_Addon']
                     # Check if discount is a valid number
-                    if pd.notna(discount_value) and discount_value not in ['No Discount', 'NA', 'N/A', '-']:
+                    if notna(discount_value) and discount_value not in ['No Discount', 'NA', 'N/A', '-']:
                         try:
                             discounted_price = float(discount_value)
                         except (ValueError, TypeError):
-                            print(f"Warning: Invalid discount value: {discount_value}")
+                            logger.warning("Invalid discount value: %s", discount_value)
                 
-                print(f"Found product: {product_name}, ID: {product_id}, Base Price: {base_price}, Discounted: {discounted_price}")
+                logger.debug("Found product: %s, ID: %s, Base Price: %s, Discounted: %s", product_name, product_id, base_price, discounted_price)
                 
                 # Get current cart
                 cart = jewelry_action.get_cart(tracker)
@@ -793,6 +812,7 @@ class ActionAddToCart(Action):
                 if not product_in_cart:
                     cart.append({
                         'product_id': product_id,
+                        'sku': sku,
                         'product_name': product_name,
                         'base_price': base_price,
                         'discounted_price': discounted_price,
@@ -819,23 +839,25 @@ class ActionAddToCart(Action):
                 return [jewelry_action.set_cart(cart)] + browsing_context
                 
             except Exception as e:
-                print(f"Error getting product data: {str(e)}")
+                logger.exception("Error getting product data: %s", e)
                 raise
             
         except Exception as e:
-            print(f"Error in ActionAddToCart: {str(e)}")
+            logger.exception("Error in ActionAddToCart: %s", e)
             dispatcher.utter_message(
                 text="Sorry, I couldn't add this item to your cart. Please try again."
             )
             return []
 
-class ActionViewCart(Action):
+class ActionViewCart(OffloadedAction):
+    offload = False
+
     def name(self) -> Text:
         return "action_view_cart"
 
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    def run_sync(self, dispatcher: CollectingDispatcher,
+                 tracker: Tracker,
+                 domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         try:
             # Get current cart
@@ -929,20 +951,22 @@ class ActionViewCart(Action):
             return [SlotSet("shopping_context", "cart_viewing")]
             
         except Exception as e:
-            print(f"Error in ActionViewCart: {str(e)}")
+            logger.exception("Error in ActionViewCart: %s", e)
             dispatcher.utter_message(
                 text="Sorry, I couldn't retrieve your cart information. Please try again."
             )
             return []
 
 
-class ActionUpdateCart(Action):
+class ActionUpdateCart(OffloadedAction):
+    offload = False
+
     def name(self) -> Text:
         return "action_update_cart"
 
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    def run_sync(self, dispatcher: CollectingDispatcher,
+                 tracker: Tracker,
+                 domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         try:
             # Extract update details from entities
@@ -997,25 +1021,27 @@ class ActionUpdateCart(Action):
             cart_event = jewelry_action.set_cart(updated_cart)
             
             # Show the updated cart
-            ActionViewCart().run(dispatcher, tracker, domain)
+            ActionViewCart().run_sync(dispatcher, tracker, domain)
             
             return [cart_event, SlotSet("shopping_context", "cart_viewing")]
             
         except Exception as e:
-            print(f"Error in ActionUpdateCart: {str(e)}")
+            logger.exception("Error in ActionUpdateCart: %s", e)
             dispatcher.utter_message(
                 text="Sorry, I couldn't update your cart. Please try again."
             )
             return []
 
 
-class ActionClearCart(Action):
+class ActionClearCart(OffloadedAction):
+    offload = False
+
     def name(self) -> Text:
         return "action_clear_cart"
 
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    def run_sync(self, dispatcher: CollectingDispatcher,
+                 tracker: Tracker,
+                 domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         jewelry_action = JewelryAction()
         
@@ -1035,13 +1061,13 @@ class ActionClearCart(Action):
         ]
 
 
-class ActionContinueShopping(Action):
+class ActionContinueShopping(OffloadedAction):
     def name(self) -> Text:
         return "action_continue_shopping"
 
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    def run_sync(self, dispatcher: CollectingDispatcher,
+                 tracker: Tracker,
+                 domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         # Check if we have a detailed shopping context
         main_category = tracker.get_slot('main_category')
@@ -1051,7 +1077,7 @@ class ActionContinueShopping(Action):
         view_type = tracker.get_slot('last_view_type') or tracker.get_slot('view_type') or "regular"
         current_page = int(tracker.get_slot('current_page') or 0)
         
-        print(f"Continue shopping context: view: {view_type}, page: {current_page}")
+        logger.debug("Continue shopping context: view: %s, page: %s", view_type, current_page)
         
         if main_category and sub_category and view_type:
             # Tell the user we're returning to their previous browsing
@@ -1137,15 +1163,15 @@ class ActionContinueShopping(Action):
             return [SlotSet("intent", "continue_shopping")]
         else:
             # No active category, go back to category selection
-            return ActionResetCategoryFlow().run(dispatcher, tracker, domain)
+            return ActionResetCategoryFlow().run_sync(dispatcher, tracker, domain)
 
-class ActionCheckout(Action):
+class ActionCheckout(OffloadedAction):
     def name(self) -> Text:
         return "action_checkout"
 
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    def run_sync(self, dispatcher: CollectingDispatcher,
+                 tracker: Tracker,
+                 domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         jewelry_action = JewelryAction()
         cart = jewelry_action.get_cart(tracker)
@@ -1181,9 +1207,22 @@ class ActionCheckout(Action):
             else:
                 total_final_price += item_base_total
         
-        # Create a simulated order ID
-        import random
-        order_id = f"ORD-{random.randint(100000, 999999)}"
+        # Create a unique order ID
+        order_id = get_id_generator().next_order_id()
+        
+        # Persist the order so it can be tracked later
+        try:
+            get_order_store().create_order(order_id, cart, total_final_price, total_original_price)
+        except Exception as e:
+            logger.exception("Error saving order %s: %s", order_id, e)
+            dispatcher.utter_message(
+                text="Sorry, I couldn't place your order right now. Your cart is still saved, please try again.",
+                buttons=[
+                    {"title": "🛒 View Cart", "payload": "/view_cart"},
+                    {"title": "💳 Checkout", "payload": "/checkout"}
+                ]
+            )
+            return []
         
         message = "🎉 Thank you for your order!\n\n"
         message += f"Order ID: {order_id}\n"
@@ -1199,49 +1238,53 @@ class ActionCheckout(Action):
             ]
         )
         
-        # Clear the cart after checkout
-        return [jewelry_action.set_cart([])]
+        # Clear the cart after checkout and remember the order for tracking
+        return [jewelry_action.set_cart([]), SlotSet("order_id", order_id)]
     
-class ActionInitiateOrderTracking(Action):
+class ActionInitiateOrderTracking(OffloadedAction):
+    offload = False
+
     def name(self) -> Text:
         return "action_initiate_order_tracking"
 
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    def run_sync(self, dispatcher: CollectingDispatcher,
+                 tracker: Tracker,
+                 domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         # Reset order tracking state
         return [
             SlotSet("order_id", None),
-            SlotSet("order_details", None),
+            SlotSet("order_validation", None),
             FollowupAction("utter_ask_order_id")
         ]
 
 
-class ActionValidateOrderId(Action):
+class ActionValidateOrderId(OffloadedAction):
     def name(self) -> Text:
         return "action_validate_order_id"
 
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    def run_sync(self, dispatcher: CollectingDispatcher,
+                 tracker: Tracker,
+                 domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         # Try to get order_id from entity first (from button payload)
         order_id = next(tracker.get_latest_entity_values("order_id"), None)
+        if order_id:
+            order_id = extract_order_id(order_id) or order_id
         
-        print(f"DEBUG: Validating order ID. Entity value: {order_id}")
-        print(f"DEBUG: Intent: {tracker.latest_message.get('intent', {}).get('name')}")
-        print(f"DEBUG: Full message: {tracker.latest_message}")
+        logger.debug("Validating order ID. Entity value: %s", order_id)
+        logger.debug("Intent: %s", tracker.latest_message.get('intent', {}).get('name'))
+        logger.debug("Full message: %s", tracker.latest_message)
         
         # If no entity, try to extract from text
         if not order_id:
             user_message = tracker.latest_message.get('text', '')
-            print(f"DEBUG: No entity found, extracting from message: '{user_message}'")
+            logger.debug("No entity found, extracting from message: '%s'", user_message)
             
-            # Extract digits
-            digits = ''.join(filter(str.isdigit, user_message))
+            # Extract an order ID (ORD-... code or plain digits)
+            order_id = extract_order_id(user_message)
             
-            if not digits:
+            if not order_id:
                 dispatcher.utter_message(
                     text="Please select one of the sample order IDs, or enter a valid order number.",
                     buttons=[
@@ -1251,27 +1294,33 @@ class ActionValidateOrderId(Action):
                     ]
                 )
                 return [FollowupAction("utter_ask_order_id")]
-            
-            order_id = f"ORD-{digits}"
         
-        print(f"DEBUG: Final order_id: {order_id}")
+        logger.debug("Final order_id: %s", order_id)
         
-        # For simplicity, accept any order ID as valid in this demonstration
-        return [SlotSet("order_id", order_id)]
+        # Check the order exists in the order store
+        if not get_order_store().order_exists(order_id):
+            dispatcher.utter_message(
+                text=f"Sorry, I couldn't find an order with ID {order_id}. Please check the order ID and try again."
+            )
+            return [SlotSet("order_id", None), SlotSet("order_validation", "failed")]
+        
+        return [SlotSet("order_id", order_id), SlotSet("order_validation", "success")]
 
 
-class ActionShowOrderStatus(Action):
+class ActionShowOrderStatus(OffloadedAction):
     def name(self) -> Text:
         return "action_show_order_status"
 
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    def run_sync(self, dispatcher: CollectingDispatcher,
+                 tracker: Tracker,
+                 domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
             
         order_id = tracker.get_slot('order_id')
+        # Timelines are pre-rendered whenever the order status changes
+        rendered = get_order_store().get_rendered(order_id) if order_id else None
         
         # Check if we have a valid order_id
-        if not order_id:
+        if not rendered:
             dispatcher.utter_message(
                 text="I don't have a valid order ID to track. Let's try again.",
                 buttons=[
@@ -1281,75 +1330,8 @@ class ActionShowOrderStatus(Action):
             )
             return [FollowupAction("utter_ask_order_id")]
         
-        # Your existing code for generating order status...
-        # Generate mock data for the demo
-        import datetime
-        import random
-        
-        # Generate random order data for demo purposes
-        current_date = datetime.datetime.now()
-        order_date = (current_date - datetime.timedelta(days=random.randint(3, 10))).strftime("%d %b %Y")
-        
-        # Status options with corresponding emojis and dates
-        statuses = [
-            {"status": "Order Placed", "emoji": "📝", "date": order_date, "completed": True},
-            {"status": "Payment Confirmed", "emoji": "💰", "date": order_date, "completed": True},
-            {"status": "Processing", "emoji": "⚙️", "date": (current_date - datetime.timedelta(days=random.randint(1, 3))).strftime("%d %b %Y"), "completed": True},
-            {"status": "Ready for Shipment", "emoji": "📦", "date": (current_date - datetime.timedelta(days=random.randint(0, 2))).strftime("%d %b %Y"), "completed": True},
-            {"status": "Shipped", "emoji": "🚚", "date": current_date.strftime("%d %b %Y"), "completed": True},
-            {"status": "Out for Delivery", "emoji": "🛵", "date": (current_date + datetime.timedelta(days=1)).strftime("%d %b %Y"), "completed": False},
-            {"status": "Delivered", "emoji": "✅", "date": (current_date + datetime.timedelta(days=2)).strftime("%d %b %Y"), "completed": False}
-        ]
-        
-        # Determine current status (randomly between 3 and 5 for demo)
-        current_status_idx = random.randint(3, 5)
-        
-        # Mark statuses as completed or pending based on current_status_idx
-        for i in range(len(statuses)):
-            statuses[i]["completed"] = i <= current_status_idx
-        
-        # Format the current status
-        current_status = statuses[current_status_idx]["status"]
-        
-        # Create order details 
-        product_types = ["Necklace", "Earrings", "Bracelet", "Ring", "Anklet"]
-        product_name = f"{random.choice(['Gold', 'Silver', 'Diamond', 'Pearl'])} {random.choice(product_types)}"
-        amount = random.randint(1500, 15000)
-        shipping_address = "123 Sample Street, City, State, PIN"
-        estimated_delivery = statuses[6]["date"]  # Use the delivery date from the statuses
-        
-        # Build status timeline message
-        message = f"📋 *Order Details* (ID: {order_id})\n\n"
-        message += f"*Product:* {product_name}\n"
-        message += f"*Amount:* ₹{amount}\n"
-        message += f"*Shipping Address:* {shipping_address}\n"
-        message += f"*Current Status:* {current_status}\n"
-        message += f"*Estimated Delivery:* {estimated_delivery}\n\n"
-        
-        # Create visual timeline
-        message += "📊 *Order Timeline:*\n\n"
-        
-        for status in statuses:
-            if status["completed"]:
-                # Completed status
-                message += f"{status['emoji']} {status['status']}: ✅ {status['date']}\n"
-            else:
-                # Pending status
-                message += f"{status['emoji']} {status['status']}: ⏳ {status['date']} (Estimated)\n"
-                
-        # Store order details in a slot for future reference
-        order_details = {
-            "order_id": order_id,
-            "product": product_name,
-            "amount": amount,
-            "shipping_address": shipping_address,
-            "current_status": current_status,
-            "estimated_delivery": estimated_delivery,
-            "status_timeline": statuses
-        }
-        
         dispatcher.utter_message(
-            text=message,
+            text=rendered["status_message"],
             buttons=[
                 {"title": "View Order Details", "payload": "/view_order_details"},
                 {"title": "Report an Issue", "payload": "/report_issue"},
@@ -1358,21 +1340,22 @@ class ActionShowOrderStatus(Action):
             ]
         )
         
-        return [SlotSet("order_details", order_details)]
+        return []
 
 
-class ActionShowOrderDetails(Action):
+class ActionShowOrderDetails(OffloadedAction):
 
     def name(self) -> Text:
         return "action_show_order_details"
 
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    def run_sync(self, dispatcher: CollectingDispatcher,
+                 tracker: Tracker,
+                 domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
-        order_details = tracker.get_slot('order_details')
+        order_id = tracker.get_slot('order_id')
+        rendered = get_order_store().get_rendered(order_id) if order_id else None
         
-        if not order_details:
+        if not rendered:
             dispatcher.utter_message(
                 text="I don't have any order details to display. Please try tracking your order again.",
                 buttons=[
@@ -1382,34 +1365,10 @@ class ActionShowOrderDetails(Action):
             )
             return []
         
-        # Format all order details for display
-        message = "📦 *Detailed Order Information*\n\n"
-        message += f"*Order ID:* {order_details.get('order_id', 'N/A')}\n"
-        message += f"*Product:* {order_details.get('product', 'N/A')}\n"
-        message += f"*Amount:* ₹{order_details.get('amount', 'N/A')}\n"
-        message += f"*Order Date:* {order_details.get('status_timeline', [])[0].get('date', 'N/A')}\n"
-        message += f"*Current Status:* {order_details.get('current_status', 'N/A')}\n"
-        message += f"*Shipping Address:* {order_details.get('shipping_address', 'N/A')}\n"
-        message += f"*Estimated Delivery:* {order_details.get('estimated_delivery', 'N/A')}\n\n"
-        
-        # Add payment info
-        message += "*Payment Information:*\n"
-        message += "Method: Credit Card (ending in ****1234)\n"
-        message += f"Amount: ₹{order_details.get('amount', 'N/A')}\n"
-        message += "Status: Paid\n\n"
-        
-        # Add shipping info
-        message += "*Shipping Information:*\n"
-        message += "Courier: Express Delivery Services\n"
-        message += "Tracking Number: EXP123456789\n\n"
-        
-        # Add a note about jewelry care
-        message += "*Product Care:* All jewelry items come with a care instruction card. Please follow the instructions to maintain your item's appearance.\n"
-        
         dispatcher.utter_message(
-            text=message,
+            text=rendered["details_message"],
             buttons=[
-                {"title": "Track Status", "payload": f"/track_order{{\"order_id\": \"{order_details.get('order_id', '')}\"}}"},
+                {"title": "Track Status", "payload": f"/track_order{{\"order_id\": \"{order_id}\"}}"},
                 {"title": "Report an Issue", "payload": "/report_issue"},
                 {"title": "Track Another Order", "payload": "/track_order"},
                 {"title": "Back to Main Menu", "payload": "/greet"}
@@ -1419,18 +1378,17 @@ class ActionShowOrderDetails(Action):
         return []
 
 
-class ActionReportIssue(Action):
+class ActionReportIssue(OffloadedAction):
     def name(self) -> Text:
         return "action_report_issue"
 
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    def run_sync(self, dispatcher: CollectingDispatcher,
+                 tracker: Tracker,
+                 domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
-        order_details = tracker.get_slot('order_details')
-        order_id = order_details.get('order_id') if order_details else tracker.get_slot('order_id')
+        order_id = tracker.get_slot('order_id')
         
-        if not order_id:
+        if not order_id or not get_order_store().order_exists(order_id):
             dispatcher.utter_message(
                 text="I need an order ID to report an issue. Please provide your order ID first.",
                 buttons=[
@@ -1440,10 +1398,28 @@ class ActionReportIssue(Action):
             return []
         
         # Generate a reference number for the issue
-        import random
-        import string
+        reference_id = get_id_generator().next_issue_reference()
         
-        reference_id = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
+        # Log the issue for the support team, and only confirm the reference once it is on disk
+        try:
+            get_issue_log().report(
+                reference_id,
+                order_id,
+                description=tracker.latest_message.get('text', ''),
+                sender_id=tracker.sender_id,
+                wait=True
+            )
+        except OSError as e:
+            logger.error("Could not log issue %s for order %s: %s", reference_id, order_id, e)
+            dispatcher.utter_message(
+                text="Sorry, I couldn't log your issue right now. Please try again in a moment, "
+                     "or contact our customer support at 📞 +91-9994481257.",
+                buttons=[
+                    {"title": "Report an Issue", "payload": "/report_issue"},
+                    {"title": "Back to Main Menu", "payload": "/greet"}
+                ]
+            )
+            return []
         
         message = "🔔 *Issue Reported Successfully*\n\n"
         message += f"Thank you for bringing this to our attention. Your issue with order {order_id} has been logged.\n\n"
@@ -1467,18 +1443,21 @@ class ActionReportIssue(Action):
 
 
 
-# Update this URL with your actual ngrok URL from Google Colab
-CHATBOT_API_URL = "https://5884-34-16-172-151.ngrok-free.app"  # Replace with your actual ngrok URL
-if CHATBOT_API_URL.endswith('/'):
-    CHATBOT_API_URL = CHATBOT_API_URL[:-1]
-
 class ActionJewelryStylingAdvice(Action):
     """Action to get jewelry styling advice from the external PDF chatbot service"""
 
     def name(self) -> Text:
         return "action_jewelry_styling_advice"
 
-    def run(
+    def local_answer(self, question: Text):
+        """Styling advice from the bundled knowledge base, or None"""
+        retriever = get_styling_retriever()
+        if retriever is None:
+            return None
+        return retriever.answer(question)
+
+    @instrumented
+    async def run(
         self, 
         dispatcher: CollectingDispatcher,
         tracker: Tracker,
@@ -1487,6 +1466,31 @@ class ActionJewelryStylingAdvice(Action):
         # Get the user's question from the latest message
         user_question = tracker.latest_message.get("text")
         
+        # Local mode answers from the bundled knowledge base without any network call
+        if STYLING_MODE == "local":
+            styling_advice = self.local_answer(user_question)
+            dispatcher.utter_message(
+                text=styling_advice or "I couldn't find specific advice for that. Could you try asking differently?",
+                metadata={"from_jewelry_pdf": True, "rephrase": False}
+            )
+            return []
+        
+        # Imported here so that servers that never get a styling question don't load aiohttp
+        from .styling_client import get_styling_client, StylingServiceUnavailable
+        from .styling_health import get_health_prober
+        
+        client = get_styling_client()
+        get_health_prober().ensure_started()
+        
+        # Known to be down and nothing cached: answer straight away instead of waiting for a timeout
+        if client.will_fail_fast(user_question):
+            styling_advice = self.local_answer(user_question)
+            dispatcher.utter_message(
+                text=styling_advice or "My jewelry styling knowledge is temporarily unavailable. Please try again in a few minutes.",
+                metadata={"from_jewelry_pdf": True, "rephrase": False}
+            )
+            return []
+        
         # Show thinking message with rephrasing disabled
         dispatcher.utter_message(
             text="Let me look up some jewelry styling advice for you...",
@@ -1494,37 +1498,24 @@ class ActionJewelryStylingAdvice(Action):
         )
         
         try:
-            # Call the PDF chatbot API
-            response = requests.post(
-                f"{CHATBOT_API_URL}/query",
-                json={"question": user_question},
-                timeout=300  # 5 minutes timeout
-            )
+            # Call the PDF chatbot API through the shared, pooled client
+            answer_data = await client.query(user_question)
+            styling_advice = answer_data.get("answer", "I couldn't find specific advice for that. Could you try asking differently?")
             
-            if response.status_code == 200:
-                answer_data = response.json()
-                styling_advice = answer_data.get("answer", "I couldn't find specific advice for that. Could you try asking differently?")
-                
-                # Send the response back to the user with rephrasing disabled
-                dispatcher.utter_message(
-                    text=styling_advice,
-                    metadata={"from_jewelry_pdf": True, "rephrase": False}
-                )
-                return []
-            else:
-                error_msg = f"Error from styling service: {response.status_code} - {response.text}"
-                print(error_msg)
-                dispatcher.utter_message(
-                    text="I'm having trouble connecting to my jewelry styling knowledge. Please try again later.",
-                    metadata={"rephrase": False}  # Prevent LLM from rephrasing this response
-                )
-                return []
+            # Send the response back to the user with rephrasing disabled
+            dispatcher.utter_message(
+                text=styling_advice,
+                metadata={"from_jewelry_pdf": True, "rephrase": False}
+            )
+            return []
                 
-        except requests.exceptions.RequestException as e:
-            # Handle connection errors
-            print(f"Error connecting to PDF chatbot API: {str(e)}")
+        except StylingServiceUnavailable as e:
+            # Handle connection errors, error responses and a saturated client
+            logger.warning("Error from styling service: %s", e)
+            # Fall back to the bundled knowledge base
+            styling_advice = self.local_answer(user_question)
             dispatcher.utter_message(
-                text="I'm having trouble connecting to my jewelry styling knowledge. Please try again later.",
+                text=styling_advice or "I'm having trouble connecting to my jewelry styling knowledge. Please try again later.",
                 metadata={"from_jewelry_pdf": True, "rephrase": False}
             )
             return []
@@ -1535,83 +1526,87 @@ class ActionInitializeJewelryStyling(Action):
     def name(self) -> Text:
         return "action_initialize_jewelry_styling"
 
-    def run(
+    @instrumented
+    async def run(
         self, 
         dispatcher: CollectingDispatcher,
         tracker: Tracker,
         domain: Dict[Text, Any]
     ) -> List[Dict[Text, Any]]:
-        try:
-            # Check if the API is available
-            response = requests.get(
-                f"{CHATBOT_API_URL}/health",
-                timeout=60
+        # Local mode needs no remote service, just the bundled knowledge base
+        if STYLING_MODE == "local":
+            return [SlotSet("jewelry_styling_initialized", get_styling_retriever() is not None)]
+        
+        # Readiness comes from the background prober, not a call inside this turn
+        from .styling_health import get_health_prober
+        prober = get_health_prober()
+        await prober.wait_first_probe()
+        health = prober.state
+        
+        if health["ready"]:
+            # System is ready
+            return [SlotSet("jewelry_styling_initialized", True)]
+        elif get_styling_retriever() is not None:
+            # Remote service not ready, questions will be answered from the local knowledge base
+            logger.info("Styling service not ready, using local knowledge base: %s", health['error'])
+            return [SlotSet("jewelry_styling_initialized", True)]
+        elif health["reachable"] and health["status"] == 200:
+            # System is running but not ready
+            dispatcher.utter_message(
+                text="I'm still preparing my jewelry styling knowledge. Please try again in a moment.",
+                metadata={"from_jewelry_pdf": True, "rephrase": False}  # Prevent LLM from rephrasing this response
             )
-            
-            if response.status_code == 200:
-                health_data = response.json()
-                if health_data.get("ready", False):
-                    # System is ready
-                    return [SlotSet("jewelry_styling_initialized", True)]
-                else:
-                    # System is running but not ready
-                    dispatcher.utter_message(
-                        text="I'm still preparing my jewelry styling knowledge. Please try again in a moment.",
-                        metadata={"from_jewelry_pdf": True, "rephrase": False}  # Prevent LLM from rephrasing this response
-                    )
-                    print("API is running but not ready yet")
-                    return [SlotSet("jewelry_styling_initialized", False)]
-            else:
-                # Non-200 response
-                dispatcher.utter_message(
-                    text="I'm having trouble accessing my jewelry styling knowledge. Please try again later.",
-                    metadata={"from_jewelry_pdf": True, "rephrase": False}  # Prevent LLM from rephrasing this response
-                )
-                print(f"API health check failed: {response.status_code} - {response.text}")
-                return [SlotSet("jewelry_styling_initialized", False)]
-                
-        except requests.exceptions.RequestException as e:
-            # Connection error
+            logger.info("API is running but not ready yet")
+        elif health["reachable"]:
+            # Non-200 response
+            dispatcher.utter_message(
+                text="I'm having trouble accessing my jewelry styling knowledge. Please try again later.",
+                metadata={"from_jewelry_pdf": True, "rephrase": False}  # Prevent LLM from rephrasing this response
+            )
+            logger.warning("API health check failed: %s", health['error'])
+        else:
+            # Connection error, or no probe result yet
             dispatcher.utter_message(
                 text="I'm having trouble connecting to my jewelry styling service. Please try again later.",
                 metadata={"from_jewelry_pdf": True, "rephrase": False}  # Prevent LLM from rephrasing this response
             )
-            print(f"Error connecting to PDF chatbot API: {str(e)}")
-            return [SlotSet("jewelry_styling_initialized", False)]
+            logger.warning("Error connecting to PDF chatbot API: %s", health['error'])
+        return [SlotSet("jewelry_styling_initialized", False)]
         
-class ActionAnalyzeReviewSentiment(Action):
+class ActionAnalyzeReviewSentiment(OffloadedAction):
     def name(self) -> Text:
         return "action_analyze_review_sentiment"
 
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    def run_sync(self, dispatcher: CollectingDispatcher,
+                 tracker: Tracker,
+                 domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         # Get the review text
         review_text = tracker.latest_message.get('text', '')
         
-        # Simple sentiment analysis using keyword matching
-        # In a real system, you would use a more sophisticated NLP model
-        positive_words = ['good', 'great', 'excellent', 'amazing', 'wonderful', 
-                         'love', 'like', 'best', 'fantastic', 'helpful', 'happy',
-                         'satisfied', 'perfect', 'awesome', 'impressive']
-                         
-        negative_words = ['bad', 'poor', 'terrible', 'awful', 'horrible', 
-                         'hate', 'dislike', 'worst', 'disappointing', 'unhappy',
-                         'unsatisfied', 'broken', 'useless', 'waste', 'expensive']
-        
-        # Count positive and negative words
-        positive_count = sum(1 for word in positive_words if word in review_text.lower())
-        negative_count = sum(1 for word in negative_words if word in review_text.lower())
+        # Lexicon based sentiment with negation and intensifier handling
+        score = score_text(review_text)
+        sentiment = label_for(score)
         
-        # Determine sentiment
-        sentiment = "positive" if positive_count > negative_count else "negative"
+        # Keep the review against the products it is about: the tracked order's items, else the cart
+        order_id = tracker.get_slot('order_id')
+        order = get_order_store().get_order(order_id) if order_id else None
+        items = order["items"] if order else JewelryAction().get_cart(tracker)
+        skus = [item.get('sku') for item in items]
+        try:
+            get_review_store().add_review(
+                skus, review_text, sentiment, score, order_id=order_id, sender_id=tracker.sender_id
+            )
+        except Exception as e:
+            logger.exception("Error saving review: %s", e)
         
         # Dispatch appropriate response based on sentiment
         if sentiment == "positive":
             dispatcher.utter_message(response="utter_thank_positive_review")
-        else:
+        elif sentiment == "negative":
             dispatcher.utter_message(response="utter_thank_negative_review")
+        else:
+            dispatcher.utter_message(response="utter_thank_neutral_review")
             
         # Ask if user wants to upload an image
         dispatcher.utter_message(response="utter_ask_for_image")
@@ -1622,13 +1617,15 @@ class ActionAnalyzeReviewSentiment(Action):
             SlotSet("review_sentiment", sentiment)
         ]
 
-class ActionHandleReviewImage(Action):
+class ActionHandleReviewImage(OffloadedAction):
+    offload = False
+
     def name(self) -> Text:
         return "action_handle_review_image"
 
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    def run_sync(self, dispatcher: CollectingDispatcher,
+                 tracker: Tracker,
+                 domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         # In Rasa, we can't directly handle file uploads through the chatbot
         # This would typically be done through a separate web interface
@@ -1637,4 +1634,20 @@ class ActionHandleReviewImage(Action):
         dispatcher.utter_message(text="Thank you for wanting to share an image with your review! In a real application, this would open an upload dialog.")
         dispatcher.utter_message(response="utter_confirm_review_submission")
         
-        return []
\ No newline at end of file
+        return []
+
+
+def warm_product_pages():
+    """Render the first page of every category and view, so the first shopper doesn't run cold code"""
+    action = JewelryAction()
+    for main_category, sub_category in get_catalog().categories():
+        base_data = action.get_base_filtered_data(main_category, sub_category)
+        for view_type in ("bestseller", "discount", "regular"):
+            data = action.apply_view_filter(base_data, view_type)
+            products = action.get_page_slice(data, 0)
+            action.format_product_message(products, 0, len(data), view_type)
+            action.create_product_buttons(products, 0)
+
+
+startup.add_step("product_pages", warm_product_pages, per_process=True)
+startup.imported()
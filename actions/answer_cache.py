@@ -0,0 +1,97 @@
+import asyncio
+import collections
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Text, Tuple
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_question(text: Optional[Text]) -> Text:
+    """Cache key for a question: lowercase words only, so case, spacing and punctuation don't matter"""
+    return " ".join(WORD_RE.findall((text or "").lower()))
+
+
+class AnswerCache:
+    """TTL + LRU cache for upstream answers with single-flight request coalescing.
+
+    While an answer for a key is being fetched, identical requests wait on the
+    same future instead of making their own upstream call. The fetch runs as
+    its own task, so cancelling the request that started it doesn't cancel
+    it for the others (the answer is still cached). Failures are shared with
+    the waiters but never cached.
+    """
+
+    def __init__(self, ttl: float = 3600.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "collections.OrderedDict[Text, Tuple[float, Any, float]]" = collections.OrderedDict()
+        self._in_flight: Dict[Text, asyncio.Future] = {}
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0,
+                      "upstream_seconds": 0.0, "saved_seconds": 0.0}
+
+    def get(self, key: Text) -> Optional[Tuple[Any, float]]:
+        """Fresh (value, upstream cost) for key, or None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value, cost = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value, cost
+
+    def put(self, key: Text, value: Any, cost: float = 0.0):
+        self._entries[key] = (time.monotonic() + self.ttl, value, cost)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def reset_in_flight(self):
+        """Forget pending fetches, e.g. when the event loop they belong to has gone away"""
+        self._in_flight.clear()
+
+    async def get_or_fetch(self, key: Text, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        cached = self.get(key)
+        if cached is not None:
+            value, cost = cached
+            self.stats["hits"] += 1
+            self.stats["saved_seconds"] += cost
+            return value
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.stats["coalesced"] += 1
+            value, cost = await asyncio.shield(pending)
+            self.stats["saved_seconds"] += cost
+            return value
+
+        self.stats["misses"] += 1
+        task = asyncio.ensure_future(self._fetch(key, fetch))
+        self._in_flight[key] = task
+        task.add_done_callback(lambda done: self._fetch_done(key, done))
+        value, _ = await asyncio.shield(task)
+        return value
+
+    async def _fetch(self, key: Text, fetch: Callable[[], Awaitable[Any]]) -> Tuple[Any, float]:
+        start = time.perf_counter()
+        value = await fetch()
+        cost = time.perf_counter() - start
+        self.stats["upstream_seconds"] += cost
+        self.put(key, value, cost)
+        return value, cost
+
+    def _fetch_done(self, key: Text, task: asyncio.Future):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved, every request waiting on it may have been cancelled
+
+    def metrics(self) -> Dict[Text, float]:
+        """Counters plus hit rate (hits and coalesced requests both avoided an upstream call)"""
+        served = self.stats["hits"] + self.stats["coalesced"] + self.stats["misses"]
+        avoided = self.stats["hits"] + self.stats["coalesced"]
+        return dict(self.stats, entries=len(self._entries),
+                    hit_rate=avoided / served if served else 0.0)
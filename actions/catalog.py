@@ -0,0 +1,85 @@
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional, Text, Tuple
+
+from .instrumentation import record_catalog_lookup
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+ACTIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+CATALOG_PATH = os.environ.get("DIYA_CATALOG_PATH") or os.path.join(ACTIONS_DIR, "jewelry_data.csv")
+
+
+class Catalog:
+    """The product catalog, loaded once per process and indexed by category.
+
+    Every action instance used to read the CSV itself; now they all share
+    this one DataFrame. Each (main_category, sub_category) slice is built
+    once up front, so a category page is a dictionary lookup instead of a
+    scan of the whole catalog. Frames handed out are shared and must be
+    treated as read-only.
+
+    Loaded in the pre-fork parent (see actions.prefork), the catalog pages
+    are shared copy-on-write by all worker processes.
+    """
+
+    def __init__(self, path: Text = CATALOG_PATH):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"CSV file not found at: {path}")
+        start = time.perf_counter()
+        import pandas as pd  # imported on first load, actions that never touch the catalog don't pay for it
+        self.path = path
+        self.df = pd.read_csv(path)
+        self._empty = self.df.iloc[0:0]
+        self._by_category: Dict[Tuple[Text, Text], "pd.DataFrame"] = {
+            key: frame for key, frame in self.df.groupby(["main_category", "sub_category"], sort=False)
+        }
+        self.load_seconds = time.perf_counter() - start
+        self.stats = {"hits": 0, "misses": 0}
+
+    def category(self, main_category: Optional[Text], sub_category: Optional[Text]) -> "pd.DataFrame":
+        """All products in a category, in catalog order (empty if the category is unknown)"""
+        frame = self._by_category.get((main_category, sub_category))
+        record_catalog_lookup(frame is not None)
+        if frame is None:
+            self.stats["misses"] += 1
+            return self._empty
+        self.stats["hits"] += 1
+        return frame
+
+    def categories(self):
+        """The (main_category, sub_category) pairs in the catalog"""
+        return list(self._by_category)
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+
+def notna(value: Any) -> bool:
+    """pandas.notna for a single cell, without needing pandas: False for None, NaN and NaT"""
+    return value is not None and value == value
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> Catalog:
+    """Return the process wide catalog, loading it on first use"""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = Catalog()
+    return _catalog
+
+
+def reload_catalog(path: Optional[Text] = None) -> Catalog:
+    """Load the catalog again (e.g. after the CSV was updated) and make it the process wide one"""
+    global _catalog
+    catalog = Catalog(path or CATALOG_PATH)
+    with _catalog_lock:
+        _catalog = catalog
+    return catalog
@@ -0,0 +1,92 @@
+import time
+from typing import Dict, Optional, Text
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+BREAKER_STATES = (CLOSED, OPEN, HALF_OPEN)
+
+
+class CircuitBreaker:
+    """Closed/open/half-open circuit breaker for calls to a flaky dependency.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    calls are refused without touching the network. Once ``reset_timeout``
+    seconds have passed it goes half-open and lets a single trial call
+    through: success closes it again, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_started_at: Optional[float] = None
+        self.stats = {"opened": 0, "short_circuited": 0, "failures": 0, "successes": 0}
+
+    @property
+    def state(self) -> Text:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._trial_started_at = None
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls would be refused outright"""
+        state = self.state
+        if state == HALF_OPEN:
+            return not self._trial_available()
+        return state == OPEN
+
+    def _trial_available(self) -> bool:
+        # A trial that never reported back (e.g. cancelled) must not wedge the breaker
+        return self._trial_started_at is None or time.monotonic() - self._trial_started_at >= self.reset_timeout
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and self._trial_available():
+            self._trial_started_at = time.monotonic()
+            return True
+        self.stats["short_circuited"] += 1
+        return False
+
+    def record_success(self):
+        self.stats["successes"] += 1
+        self._failures = 0
+        self._state = CLOSED
+        self._trial_started_at = None
+
+    def record_failure(self):
+        self.stats["failures"] += 1
+        self._failures += 1
+        if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+            self.trip()
+
+    def trip(self):
+        """Open the breaker now"""
+        if self._state != OPEN:
+            self.stats["opened"] += 1
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._trial_started_at = None
+
+    def metrics(self) -> Dict[Text, float]:
+        """Counters plus the current state, read without moving an expired open period to half-open"""
+        state = self._state
+        if state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            state = HALF_OPEN
+        return dict(self.stats, state=state)
+
+    def half_open(self):
+        """Let the next call through as a trial once the open period has passed, e.g. after a health probe
+        succeeded (a healthy /health doesn't cut short an open period that failing queries started)"""
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._trial_started_at = None
+
+    def snapshot(self) -> Dict[Text, object]:
+        return dict(self.stats, state=self.state, consecutive_failures=self._failures)
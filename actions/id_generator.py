@@ -0,0 +1,255 @@
+import hashlib
+import logging
+import os
+import re
+import socket
+import threading
+import time
+from typing import Optional, Text, Tuple
+
+from .storage import connect_sqlite, data_path
+
+logger = logging.getLogger(__name__)
+
+# IDs are 63 bit integers laid out as | 41 bits ms since EPOCH | 10 bits worker | 12 bits sequence |
+# which gives unique, time sortable IDs as long as no two live processes share a worker ID.
+# Worker IDs come from DIYA_WORKER_ID, or are leased from a SQLite table in the data directory,
+# which keeps them unique among the processes sharing that directory. Containers that don't share
+# DIYA_DATA_DIR must each be given their own DIYA_WORKER_ID (or block of IDs under the pre-fork launcher).
+EPOCH_MS = 1735689600000  # 2025-01-01T00:00:00Z
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+# Crockford base32: no I, L, O or U so IDs are easy to read out over the phone
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+ENCODED_LENGTH = 13  # enough for 63 bits, fixed width keeps string order == numeric order
+DECODE_MAP = {char: i for i, char in enumerate(ALPHABET)}
+DECODE_MAP.update({"I": 1, "L": 1, "O": 0})
+
+ORDER_PREFIX = "ORD-"
+ISSUE_PREFIX = "ISS-"
+
+LEASE_TTL = float(os.environ.get("DIYA_WORKER_LEASE_TTL", "900"))  # seconds, renewed at half-life
+
+# "ORD-" and a generated code (Crockford base32, I/L/O accepted as typos) or a legacy 6 digit number
+_CODE = f"[{ALPHABET}ILO]{{{ENCODED_LENGTH}}}"
+ORDER_ID_PATTERN = re.compile(rf"(?<![0-9A-Z])ORD-({_CODE}|[0-9]{{6}})(?![0-9A-Z])", re.IGNORECASE)
+# Without the prefix: a generated code (checked by its decoded timestamp) or a legacy 6 digit number
+BARE_CODE_PATTERN = re.compile(rf"(?<![0-9A-Z])({_CODE})(?![0-9A-Z])", re.IGNORECASE)
+LEGACY_NUMBER_PATTERN = re.compile(r"(?<![0-9])([0-9]{6})(?![0-9])")
+
+
+class WorkerLease:
+    """A worker ID claimed in the shared SQLite store and renewed while the process lives"""
+
+    def __init__(self, db_path: Optional[Text] = None):
+        self.db_path = db_path or os.environ.get("DIYA_WORKER_LEASE_DB") or data_path("worker_ids.db")
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.worker_id: Optional[int] = None
+        self.renew_at = 0.0
+
+    def claim(self) -> int:
+        """Take the first free (or expired, or left by a dead local process) ID, probing from a hash of the owner"""
+        start = _owner_hash(self.owner)
+        conn = connect_sqlite(self.db_path)
+        try:
+            conn.execute("CREATE TABLE IF NOT EXISTS worker_leases ("
+                         "worker_id INTEGER PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)")
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                now = time.time()
+                leases = {row["worker_id"]: row for row in conn.execute("SELECT * FROM worker_leases")}
+                for i in range(MAX_WORKER_ID + 1):
+                    candidate = (start + i) & MAX_WORKER_ID
+                    lease = leases.get(candidate)
+                    if (lease is None or lease["expires"] < now or lease["owner"] == self.owner
+                            or _dead_local_owner(lease["owner"])):
+                        conn.execute(
+                            "INSERT INTO worker_leases (worker_id, owner, expires) VALUES (?, ?, ?) "
+                            "ON CONFLICT(worker_id) DO UPDATE SET owner = excluded.owner, expires = excluded.expires",
+                            (candidate, self.owner, now + LEASE_TTL),
+                        )
+                        break
+                else:
+                    raise RuntimeError(f"All {MAX_WORKER_ID + 1} worker IDs in {self.db_path} are leased")
+        finally:
+            conn.close()
+        self.worker_id = candidate
+        # Wall clock, like the expiry in the table: a process suspended past the TTL renews (and finds
+        # its lease lost) before the next ID, where a monotonic clock may not count the suspension
+        self.renew_at = time.time() + LEASE_TTL / 2
+        logger.info("Leased worker ID %d for %s", candidate, self.owner)
+        return candidate
+
+    def renew(self) -> int:
+        """Extend the lease; if it was lost (e.g. the process was suspended past the TTL), claim a new ID"""
+        conn = connect_sqlite(self.db_path)
+        try:
+            renewed = conn.execute(
+                "UPDATE worker_leases SET expires = ? WHERE worker_id = ? AND owner = ?",
+                (time.time() + LEASE_TTL, self.worker_id, self.owner),
+            ).rowcount
+        finally:
+            conn.close()
+        if not renewed:
+            logger.error("Worker ID lease %s for %s was lost, claiming a new one", self.worker_id, self.owner)
+            return self.claim()
+        self.renew_at = time.time() + LEASE_TTL / 2
+        return self.worker_id
+
+
+def _owner_hash(owner: Text) -> int:
+    return int.from_bytes(hashlib.blake2b(owner.encode("utf-8"), digest_size=4).digest(), "big") & MAX_WORKER_ID
+
+
+def _dead_local_owner(owner: Text) -> bool:
+    host, _, pid = owner.rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass
+    return False
+
+
+def default_worker_id() -> Tuple[int, Optional[WorkerLease]]:
+    """Worker ID from DIYA_WORKER_ID, else a lease from the shared store (and the lease to renew)"""
+    env_value = os.environ.get("DIYA_WORKER_ID")
+    if env_value is not None:
+        worker_id = int(env_value)
+        if not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"DIYA_WORKER_ID must be between 0 and {MAX_WORKER_ID}, got {worker_id}")
+        return worker_id, None
+    lease = WorkerLease()
+    try:
+        return lease.claim(), lease
+    except Exception as e:
+        worker_id = _owner_hash(f"{socket.gethostname()}:{os.getpid()}")
+        logger.warning("Could not lease a worker ID (%s); using %d from a hash of host and pid, "
+                       "which may collide with another process. Set DIYA_WORKER_ID.", e, worker_id)
+        return worker_id, None
+
+
+def encode(value: int) -> Text:
+    """Encode an ID as fixed width Crockford base32"""
+    chars = []
+    for _ in range(ENCODED_LENGTH):
+        chars.append(ALPHABET[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def decode(text: Text) -> int:
+    """Decode a Crockford base32 ID (case insensitive, I/L read as 1 and O as 0)"""
+    value = 0
+    for char in text.upper():
+        value = (value << 5) | DECODE_MAP[char]
+    return value
+
+
+class IdGenerator:
+    """Thread safe generator of monotonic, sortable 63 bit IDs for one worker"""
+
+    def __init__(self, worker_id: Optional[int] = None):
+        self._lease: Optional[WorkerLease] = None
+        if worker_id is None:
+            worker_id, self._lease = default_worker_id()
+        self.worker_id = worker_id
+        if not 0 <= self.worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"worker_id must be between 0 and {MAX_WORKER_ID}")
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+
+    def next_id(self) -> int:
+        """Return the next ID, waiting for the clock if this millisecond's sequence is used up"""
+        with self._lock:
+            if self._lease is not None and time.time() >= self._lease.renew_at:
+                self.worker_id = self._lease.renew()
+            now_ms = int(time.time() * 1000) - EPOCH_MS
+            # Never go backwards, even if the wall clock does
+            if now_ms < self._last_ms:
+                now_ms = self._last_ms
+            if now_ms == self._last_ms:
+                self._sequence = (self._sequence + 1) & MAX_SEQUENCE
+                if self._sequence == 0:
+                    # 4096 IDs issued this millisecond, move on to the next one
+                    now_ms = self._last_ms + 1
+                    while int(time.time() * 1000) - EPOCH_MS < now_ms:
+                        time.sleep(0.0001)
+            else:
+                self._sequence = 0
+            self._last_ms = now_ms
+            return (now_ms << (WORKER_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS) | self._sequence
+
+    def next_order_id(self) -> Text:
+        return ORDER_PREFIX + encode(self.next_id())
+
+    def next_issue_reference(self) -> Text:
+        return ISSUE_PREFIX + encode(self.next_id())
+
+
+def parse_id(text: Text) -> Tuple[float, int, int]:
+    """Split a generated ID (with or without prefix) into (unix timestamp, worker id, sequence)"""
+    value = decode(text.split("-")[-1])
+    sequence = value & MAX_SEQUENCE
+    worker_id = (value >> SEQUENCE_BITS) & MAX_WORKER_ID
+    timestamp_ms = (value >> (WORKER_BITS + SEQUENCE_BITS)) + EPOCH_MS
+    return timestamp_ms / 1000.0, worker_id, sequence
+
+
+def _plausible_code(code: Text) -> bool:
+    """A generated code decodes to a 63 bit ID issued between EPOCH and now"""
+    value = decode(code)
+    if value >> 63:
+        return False
+    timestamp_ms = (value >> (WORKER_BITS + SEQUENCE_BITS)) + EPOCH_MS
+    return timestamp_ms <= time.time() * 1000 + 60_000
+
+
+def extract_order_id(text: Text) -> Optional[Text]:
+    """Find an order ID in free text, e.g. 'my order is ord-06KBETNSG0M00', 'ORD-123456' or a bare '123456'"""
+    text = text or ""
+    match = ORDER_ID_PATTERN.search(text)
+    if match:
+        code = match.group(1).upper()
+        if len(code) == ENCODED_LENGTH:
+            code = encode(decode(code))  # normalise I/L/O typos
+        return ORDER_PREFIX + code
+    # Without the prefix, only a code that decodes to a plausible ID, so ordinary words don't match
+    for match in BARE_CODE_PATTERN.finditer(text):
+        if _plausible_code(match.group(1)):
+            return ORDER_PREFIX + encode(decode(match.group(1)))
+    # Older numeric order IDs can be typed without the prefix
+    match = LEGACY_NUMBER_PATTERN.search(text)
+    return ORDER_PREFIX + match.group(1) if match else None
+
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def get_id_generator() -> IdGenerator:
+    """Return the process wide ID generator"""
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                _generator = IdGenerator()
+    return _generator
+
+
+def _reset_after_fork():
+    # A forked worker must not reuse the parent's worker ID and sequence
+    global _generator, _generator_lock
+    _generator = None
+    _generator_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
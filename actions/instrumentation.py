@@ -0,0 +1,381 @@
+"""Per-action metrics and structured logging for the action server.
+
+Every action's ``run`` is wrapped with ``instrumented``, which records a
+latency histogram and an error count per action name; catalog lookups made
+while an action runs are counted per action as hits or misses. Recording a
+call costs a couple of microseconds: two clock reads, a bisect over the
+bucket bounds and a few integer increments under an uncontended lock.
+
+Metrics are served in Prometheus text format from a small HTTP server on a
+background thread, started on first use:
+
+    curl http://127.0.0.1:9105/metrics
+
+Once the process has used them, the styling client's answer cache and
+circuit breaker and the issue log's write counters are exported too.
+
+The same server answers the readiness probe (see actions.startup) and
+takes the profiling switches (see actions.profiling).
+
+ACTION_METRICS_PORT sets the port (0 disables the endpoint); with several
+pre-forked workers each worker listens on port + its worker ID.
+
+Logging goes through the ``actions`` logger hierarchy. ACTION_LOG_LEVEL sets
+its level (default INFO) and ACTION_LOG_FORMAT=json or logfmt gives it its
+own structured handler; records then carry the action name and sender ID of
+the call they were logged from.
+"""
+import bisect
+import contextvars
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Text
+from urllib.parse import parse_qs, urlsplit
+
+from .circuit_breaker import BREAKER_STATES
+from .profiling import PROFILE_MAX_SECONDS, profiler
+from .startup import startup
+
+METRICS_HOST = os.environ.get("ACTION_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("ACTION_METRICS_PORT", "9105") or 0)
+LOG_LEVEL = os.environ.get("ACTION_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("ACTION_LOG_FORMAT", "").lower()
+
+# Upper bounds in seconds, from sub-millisecond catalog pages to slow styling calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+current_action: contextvars.ContextVar = contextvars.ContextVar("current_action", default=None)
+current_sender: contextvars.ContextVar = contextvars.ContextVar("current_sender", default=None)
+
+logger = logging.getLogger(__name__)
+
+
+class ActionMetrics:
+    """Latency histogram, call and error counts and catalog lookups for one action"""
+
+    __slots__ = ("buckets", "total_seconds", "calls", "errors", "catalog_hits", "catalog_misses")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # last bucket is +Inf
+        self.total_seconds = 0.0
+        self.calls = 0
+        self.errors = 0
+        self.catalog_hits = 0
+        self.catalog_misses = 0
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._actions: Dict[Text, ActionMetrics] = {}
+
+    def _get(self, name: Text) -> ActionMetrics:
+        metrics = self._actions.get(name)
+        if metrics is None:
+            metrics = self._actions.setdefault(name, ActionMetrics())
+        return metrics
+
+    def observe(self, name: Text, seconds: float, failed: bool = False):
+        index = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        with self._lock:
+            metrics = self._get(name)
+            metrics.buckets[index] += 1
+            metrics.total_seconds += seconds
+            metrics.calls += 1
+            if failed:
+                metrics.errors += 1
+
+    def catalog_lookup(self, name: Text, hit: bool):
+        with self._lock:
+            metrics = self._get(name)
+            if hit:
+                metrics.catalog_hits += 1
+            else:
+                metrics.catalog_misses += 1
+
+    def snapshot(self) -> Dict[Text, Dict]:
+        """Plain-dict copy of all metrics, e.g. for benchmarks"""
+        with self._lock:
+            return {
+                name: {
+                    "calls": m.calls,
+                    "errors": m.errors,
+                    "total_seconds": m.total_seconds,
+                    "buckets": list(m.buckets),
+                    "catalog_hits": m.catalog_hits,
+                    "catalog_misses": m.catalog_misses,
+                }
+                for name, m in self._actions.items()
+            }
+
+    def render_prometheus(self) -> Text:
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP diya_action_latency_seconds Time spent in an action's run.",
+            "# TYPE diya_action_latency_seconds histogram",
+        ]
+        for name, m in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, m["buckets"]):
+                cumulative += count
+                lines.append(f'diya_action_latency_seconds_bucket{{action="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'diya_action_latency_seconds_bucket{{action="{name}",le="+Inf"}} {m["calls"]}')
+            lines.append(f'diya_action_latency_seconds_sum{{action="{name}"}} {m["total_seconds"]:.6f}')
+            lines.append(f'diya_action_latency_seconds_count{{action="{name}"}} {m["calls"]}')
+        lines += [
+            "# HELP diya_action_errors_total Action runs that raised an exception.",
+            "# TYPE diya_action_errors_total counter",
+        ]
+        for name, m in sorted(snapshot.items()):
+            lines.append(f'diya_action_errors_total{{action="{name}"}} {m["errors"]}')
+        lines += [
+            "# HELP diya_catalog_lookups_total Catalog category lookups made by an action.",
+            "# TYPE diya_catalog_lookups_total counter",
+        ]
+        for name, m in sorted(snapshot.items()):
+            if m["catalog_hits"] or m["catalog_misses"]:
+                lines.append(f'diya_catalog_lookups_total{{action="{name}",result="hit"}} {m["catalog_hits"]}')
+                lines.append(f'diya_catalog_lookups_total{{action="{name}",result="miss"}} {m["catalog_misses"]}')
+        lines += _styling_metrics() + _issue_log_metrics()
+        return "\n".join(lines) + "\n"
+
+
+def _loaded(module: Text, name: Text):
+    # Only what this process already created: the metrics endpoint must not create the styling
+    # client (or import aiohttp) or open the issue log itself
+    return getattr(sys.modules.get(f"{__package__}.{module}"), name, None)
+
+
+def _styling_metrics() -> List[Text]:
+    """Answer cache and circuit breaker of the styling client"""
+    client = _loaded("styling_client", "_client")
+    if client is None:
+        return []
+    cache = client.cache.metrics()
+    breaker = client.breaker.metrics()
+    lines = [
+        "# HELP diya_styling_cache_requests_total Styling questions by how the answer cache served them.",
+        "# TYPE diya_styling_cache_requests_total counter",
+    ]
+    for result in ("hits", "coalesced", "misses"):
+        lines.append(f'diya_styling_cache_requests_total{{result="{result}"}} {cache[result]}')
+    lines += [
+        "# HELP diya_styling_cache_hit_ratio Share of styling questions answered without a new upstream call.",
+        "# TYPE diya_styling_cache_hit_ratio gauge",
+        f"diya_styling_cache_hit_ratio {cache['hit_rate']:.6f}",
+        "# HELP diya_styling_cache_saved_seconds_total Upstream time saved by cached and coalesced answers.",
+        "# TYPE diya_styling_cache_saved_seconds_total counter",
+        f"diya_styling_cache_saved_seconds_total {cache['saved_seconds']:.6f}",
+        "# HELP diya_styling_cache_entries Answers currently cached.",
+        "# TYPE diya_styling_cache_entries gauge",
+        f"diya_styling_cache_entries {cache['entries']}",
+        "# HELP diya_styling_cache_evictions_total Answers evicted to stay under the size limit.",
+        "# TYPE diya_styling_cache_evictions_total counter",
+        f"diya_styling_cache_evictions_total {cache['evictions']}",
+        "# HELP diya_styling_breaker_state Styling circuit breaker state (1 for the current one).",
+        "# TYPE diya_styling_breaker_state gauge",
+    ]
+    for state in BREAKER_STATES:
+        lines.append(f'diya_styling_breaker_state{{state="{state}"}} {int(breaker["state"] == state)}')
+    lines += [
+        "# HELP diya_styling_breaker_events_total Styling circuit breaker events.",
+        "# TYPE diya_styling_breaker_events_total counter",
+    ]
+    for event in ("opened", "short_circuited", "failures", "successes"):
+        lines.append(f'diya_styling_breaker_events_total{{event="{event}"}} {breaker[event]}')
+    return lines
+
+
+def _issue_log_metrics() -> List[Text]:
+    """Commit counters of the issue log"""
+    log = _loaded("issue_log", "_issue_log")
+    if log is None:
+        return []
+    lines = []
+    for stat, help_text in (("records", "Issues written and fsynced."),
+                            ("batches", "Batches of issues written in one go."),
+                            ("fsyncs", "fsync calls made by the issue log writer."),
+                            ("write_errors", "Issue log writes or fsyncs that failed.")):
+        lines += [
+            f"# HELP diya_issue_log_{stat}_total {help_text}",
+            f"# TYPE diya_issue_log_{stat}_total counter",
+            f"diya_issue_log_{stat}_total {log.stats[stat]}",
+        ]
+    return lines
+
+
+registry = MetricsRegistry()
+
+
+def record_catalog_lookup(hit: bool):
+    """Count a catalog lookup against the action currently running"""
+    registry.catalog_lookup(current_action.get() or "unknown", hit)
+
+
+def instrumented(run):
+    """Decorator for an action's async run: latency, errors and log context"""
+    @functools.wraps(run)
+    async def wrapper(self, dispatcher, tracker, domain):
+        _ensure_metrics_server()
+        name = self.name()
+        action_token = current_action.set(name)
+        sender_token = current_sender.set(getattr(tracker, "sender_id", None))
+        failed = False
+        start = time.perf_counter()
+        try:
+            return await run(self, dispatcher, tracker, domain)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            registry.observe(name, time.perf_counter() - start, failed)
+            startup.response_sent()
+            current_action.reset(action_token)
+            current_sender.reset(sender_token)
+    return wrapper
+
+
+# Metrics endpoint
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/metrics":
+            self._send(200, registry.render_prometheus(), "text/plain; version=0.0.4; charset=utf-8")
+        elif path == "/profile":
+            self._send_json(200, profiler.status())
+        elif path == "/ready":
+            self._send_json(200 if startup.ready else 503, {"ready": startup.ready})
+        elif path == "/startup":
+            self._send_json(200, startup.status())
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/profile/start":
+            try:
+                status = profiler.start(
+                    actions=",".join(query.get("actions", [])).split(","),
+                    rate=float(query["rate"][0]) if "rate" in query else None,
+                    mode=query.get("mode", [None])[0],
+                    max_seconds=float(query["seconds"][0]) if "seconds" in query else PROFILE_MAX_SECONDS,
+                )
+            except ValueError as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            self._send_json(200, status)
+        elif url.path == "/profile/stop":
+            self._send_json(200, profiler.stop())
+        else:
+            self.send_error(404)
+
+    def _send_json(self, code: int, payload: Dict):
+        self._send(code, json.dumps(payload) + "\n", "application/json")
+
+    def _send(self, code: int, text: Text, content_type: Text):
+        body = text.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_pid: Optional[int] = None
+_server_lock = threading.Lock()
+
+
+def metrics_port() -> int:
+    if not METRICS_PORT:
+        return 0
+    return METRICS_PORT + int(os.environ.get("DIYA_WORKER_SLOT", "0") or 0)
+
+
+def _ensure_metrics_server():
+    if _server_pid == os.getpid() or not METRICS_PORT:
+        return
+    start_metrics_server()
+
+
+def start_metrics_server(port: Optional[int] = None) -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics from a daemon thread in this process (once per process)"""
+    global _server, _server_pid
+    with _server_lock:
+        if _server_pid == os.getpid():
+            return _server
+        _server_pid = os.getpid()
+        port = metrics_port() if port is None else port
+        try:
+            _server = ThreadingHTTPServer((METRICS_HOST, port), _MetricsHandler)
+        except OSError as e:
+            logger.warning("Metrics endpoint not started on %s:%s: %s", METRICS_HOST, port, e)
+            _server = None
+            return None
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        logger.info("Serving metrics on http://%s:%s/metrics", METRICS_HOST, _server.server_address[1])
+        return _server
+
+
+# Structured logging
+
+class _ContextFilter(logging.Filter):
+    def filter(self, record):
+        record.action = current_action.get()
+        record.sender_id = current_sender.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "action": getattr(record, "action", None),
+            "sender_id": getattr(record, "sender_id", None),
+            "pid": record.process,
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class LogfmtFormatter(logging.Formatter):
+    def format(self, record):
+        message = record.getMessage().replace('"', "'")
+        line = (f'ts={record.created:.3f} level={record.levelname.lower()} logger={record.name} '
+                f'action={getattr(record, "action", None) or "-"} '
+                f'sender={getattr(record, "sender_id", None) or "-"} msg="{message}"')
+        if record.exc_info:
+            line += " exc=" + json.dumps(self.formatException(record.exc_info))
+        return line
+
+
+def configure_logging(level: Text = LOG_LEVEL, fmt: Text = LOG_FORMAT):
+    """Set the level of the actions loggers and, for json/logfmt, give them a structured handler"""
+    package_logger = logging.getLogger(__package__ or "actions")
+    package_logger.setLevel(getattr(logging, level, logging.INFO))
+    formatters = {"json": JsonFormatter, "logfmt": LogfmtFormatter}
+    if fmt in formatters:
+        handler = logging.StreamHandler()
+        handler.setFormatter(formatters[fmt]())
+        handler.addFilter(_ContextFilter())
+        package_logger.handlers[:] = [handler]
+        package_logger.propagate = False
+
+
+configure_logging()
@@ -0,0 +1,263 @@
+"""Append-only log of issues reported by shoppers, with a query API for support.
+
+``IssueLog.report`` only queues the record, so reporting adds next to nothing
+to the action's latency. A background writer drains the queue and writes
+everything pending in one append followed by one fsync (group commit), so a
+burst of reports costs a handful of fsyncs rather than one per issue.
+
+Several action-server workers can append to the same file. Readers keep a
+compact in-memory index (byte offsets by reference number and by order ID)
+that is brought up to date by reading only the tail of the log.
+
+Usage:
+    python -m actions.issue_log --order ORD-06KBETNSG0M00
+    python -m actions.issue_log --reference ISS-06KBETNSG0M01
+    python -m actions.issue_log --tail 20
+"""
+import argparse
+import atexit
+import collections
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Text
+
+from .storage import data_path
+
+logger = logging.getLogger(__name__)
+
+GROUP_COMMIT_MAX_RECORDS = 512
+GROUP_COMMIT_LINGER = 0.002  # seconds to wait for more records before committing a batch
+
+
+class IssueLog:
+    """Durable append-only issue log with batched fsyncs and an offset index"""
+
+    def __init__(self, path: Optional[Text] = None):
+        self.path = path or os.environ.get("DIYA_ISSUE_LOG") or data_path("issues.jsonl")
+        self._queue = queue.SimpleQueue()
+        self._writer = None
+        self._writer_pid = None
+        self._start_lock = threading.Lock()
+        self._index_lock = threading.Lock()
+        self._indexed_upto = 0
+        self._unflushed_error: Optional[OSError] = None  # last write error since the last flush()
+        self._by_reference: Dict[Text, int] = {}
+        self._by_order: Dict[Text, List[int]] = {}
+        self.stats = {"records": 0, "batches": 0, "fsyncs": 0, "write_errors": 0}
+
+    # Writing
+
+    def report(self, reference_id: Text, order_id: Text, description: Text = "",
+               sender_id: Optional[Text] = None, wait: bool = False) -> Dict[Text, Any]:
+        """Queue an issue for durable storage. With wait=True, block until it is fsynced,
+        raising the OSError if it could not be written"""
+        record = {
+            "reference_id": reference_id,
+            "order_id": order_id,
+            "description": description,
+            "sender_id": sender_id,
+            "status": "open",
+            "created_at": time.time(),
+        }
+        waiter = _Waiter() if wait else None
+        self._ensure_writer()
+        self._queue.put((record, waiter))
+        if waiter is not None:
+            waiter.done.wait()
+            if waiter.error is not None:
+                raise waiter.error
+        return record
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far has been written and fsynced.
+        Returns False if a write failed since the previous flush, or the timeout ran out"""
+        if self._writer is None or self._writer_pid != os.getpid():
+            return True
+        waiter = _Waiter()
+        self._queue.put((None, waiter))
+        return waiter.done.wait(timeout) and waiter.error is None
+
+    def _ensure_writer(self):
+        # The writer thread does not survive a fork, so each worker starts its own
+        if self._writer is not None and self._writer_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._writer is None or self._writer_pid != os.getpid():
+                self._queue = queue.SimpleQueue()
+                self._writer_pid = os.getpid()
+                self._writer = threading.Thread(target=self._write_loop, name="issue-log-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            while True:
+                batch = [self._queue.get()]
+                # Give concurrent reporters a moment to join this commit
+                deadline = time.monotonic() + GROUP_COMMIT_LINGER
+                while len(batch) < GROUP_COMMIT_MAX_RECORDS:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+                self._commit(fd, batch)
+        finally:
+            os.close(fd)
+
+    def _commit(self, fd: int, batch):
+        records = [record for record, _ in batch if record is not None]
+        error = None
+        if records:
+            data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode("utf-8")
+            remaining = memoryview(data)
+            try:
+                # One write keeps the batch contiguous even with other workers appending;
+                # only a short write (e.g. the disk filling up) takes another turn
+                while remaining:
+                    remaining = remaining[os.write(fd, remaining):]
+                os.fsync(fd)
+                self.stats["records"] += len(records)
+                self.stats["batches"] += 1
+                self.stats["fsyncs"] += 1
+            except OSError as e:
+                error = self._unflushed_error = e
+                self.stats["write_errors"] += 1
+                logger.error("Error writing issue log batch of %d records: %s", len(records), e)
+                if 0 < len(remaining) < len(data):
+                    # End the partial line, so the next batch starts on a line of its own
+                    try:
+                        os.write(fd, b"\n")
+                    except OSError:
+                        pass
+        for record, waiter in batch:
+            if waiter is None:
+                continue
+            if record is None:
+                # flush() covers every record queued before it, including those of earlier batches
+                waiter.error, self._unflushed_error = self._unflushed_error, None
+            else:
+                waiter.error = error
+            waiter.done.set()
+
+    # Reading
+
+    def refresh(self):
+        """Index records appended since the last refresh (by this or any other worker)"""
+        with self._index_lock:
+            if not os.path.exists(self.path):
+                return
+            with open(self.path, "rb") as f:
+                f.seek(self._indexed_upto)
+                offset = self._indexed_upto
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # another worker is mid-append, pick it up next time
+                    record = _parse_line(line, offset)
+                    if record is None:
+                        offset += len(line)
+                        continue
+                    self._by_reference[record["reference_id"]] = offset
+                    self._by_order.setdefault(record["order_id"], []).append(offset)
+                    offset += len(line)
+                self._indexed_upto = offset
+
+    def _read_at(self, f, offset: int) -> Dict[Text, Any]:
+        f.seek(offset)
+        return json.loads(f.readline())
+
+    def get(self, reference_id: Text) -> Optional[Dict[Text, Any]]:
+        """Look up an issue by its reference number"""
+        self.refresh()
+        offset = self._by_reference.get(reference_id)
+        if offset is None:
+            return None
+        with open(self.path, "rb") as f:
+            return self._read_at(f, offset)
+
+    def find_by_order(self, order_id: Text) -> List[Dict[Text, Any]]:
+        """All issues reported for an order, oldest first"""
+        self.refresh()
+        offsets = list(self._by_order.get(order_id, []))
+        if not offsets:
+            return []
+        with open(self.path, "rb") as f:
+            return [self._read_at(f, offset) for offset in offsets]
+
+    def iter_issues(self, since: Optional[float] = None) -> Iterator[Dict[Text, Any]]:
+        """Stream every issue, optionally only those created at or after a unix timestamp"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                record = _parse_line(line)
+                if record is not None and (since is None or record["created_at"] >= since):
+                    yield record
+
+
+class _Waiter:
+    """Wakes a reporter once its batch is committed, with the error if the commit failed"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error: Optional[OSError] = None
+
+
+def _parse_line(line: bytes, offset: Optional[int] = None) -> Optional[Dict[Text, Any]]:
+    # A batch cut short by a failed write leaves a partial line behind; skip it
+    try:
+        return json.loads(line)
+    except ValueError:
+        logger.warning("Skipping a malformed issue log line%s", f" at offset {offset}" if offset is not None else "")
+        return None
+
+
+_issue_log = None
+_issue_log_lock = threading.Lock()
+
+
+def get_issue_log() -> IssueLog:
+    """Return the process wide issue log"""
+    global _issue_log
+    if _issue_log is None:
+        with _issue_log_lock:
+            if _issue_log is None:
+                _issue_log = IssueLog()
+                # Make sure queued issues reach the disk before the worker exits
+                atexit.register(_issue_log.flush, 5.0)
+    return _issue_log
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--order", help="show all issues for an order ID")
+    group.add_argument("--reference", help="show one issue by reference number")
+    group.add_argument("--tail", type=int, help="show the most recent N issues")
+    parser.add_argument("--path", help="issue log path (defaults to the action server's log)")
+    args = parser.parse_args()
+
+    log = IssueLog(args.path) if args.path else get_issue_log()
+    if args.order:
+        issues = log.find_by_order(args.order)
+    elif args.reference:
+        issue = log.get(args.reference)
+        issues = [issue] if issue else []
+    else:
+        issues = list(collections.deque(log.iter_issues(), maxlen=args.tail))
+    for issue in issues:
+        print(json.dumps(issue, ensure_ascii=False))
+    if not issues:
+        print("No matching issues found.")
+
+
+if __name__ == "__main__":
+    main()
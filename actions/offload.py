@@ -0,0 +1,76 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Text
+
+from rasa_sdk import Action, Tracker
+from rasa_sdk.executor import CollectingDispatcher
+
+from .instrumentation import instrumented
+from .profiling import profiler
+
+# Threads for blocking action work (pandas filtering, product rendering, SQLite)
+ACTION_WORKERS = int(os.environ.get("ACTION_WORKERS", str(min(8, (os.cpu_count() or 1) + 2))))
+# "threads" runs blocking work on the pool; "inline" runs it on the event loop (the old behaviour)
+OFFLOAD_MODE = os.environ.get("ACTION_OFFLOAD", "threads").lower()
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return this process's bounded pool for blocking action work"""
+    global _executor, _executor_pid
+    # Pool threads don't survive a fork, each worker process gets its own pool
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(max_workers=ACTION_WORKERS, thread_name_prefix="action-worker")
+                _executor_pid = os.getpid()
+    return _executor
+
+
+async def run_blocking(func: Callable, *args, **kwargs):
+    """Run a blocking function without holding up the event loop"""
+    if OFFLOAD_MODE == "inline":
+        return func(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    # Carry the caller's context (current action, sender) over to the worker thread
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), functools.partial(context.run, func, *args, **kwargs))
+
+
+class OffloadedAction(Action):
+    """Action with an async run whose synchronous body lives in run_sync.
+
+    The action server shares one event loop between all conversations, so
+    blocking work there stalls every other shopper. run_sync runs on the
+    worker pool; actions with only trivial work set ``offload = False`` and
+    run inline. Nested calls from one action's body to another should call
+    ``run_sync`` directly, they are already off the loop.
+    """
+
+    offload = True
+
+    def name(self) -> Text:
+        return "offloaded_action_base"
+
+    def run_sync(self, dispatcher: CollectingDispatcher,
+                 tracker: Tracker,
+                 domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+        raise NotImplementedError("An action must implement run_sync")
+
+    @instrumented
+    async def run(self, dispatcher: CollectingDispatcher,
+                  tracker: Tracker,
+                  domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+        func = self.run_sync
+        if profiler.active and profiler.should_profile(self.name()):
+            func = functools.partial(profiler.profile, self.name(), self.run_sync)
+        if not self.offload:
+            return func(dispatcher, tracker, domain)
+        return await run_blocking(func, dispatcher, tracker, domain)
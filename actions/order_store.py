@@ -0,0 +1,385 @@
+import datetime
+import functools
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+from .storage import connect_sqlite, data_path
+
+# Order lifecycle with the emoji shown in the tracking timeline and the
+# expected number of days after the order date for each step
+STATUS_STEPS = [
+    {"status": "Order Placed", "emoji": "📝", "eta_days": 0},
+    {"status": "Payment Confirmed", "emoji": "💰", "eta_days": 0},
+    {"status": "Processing", "emoji": "⚙️", "eta_days": 1},
+    {"status": "Ready for Shipment", "emoji": "📦", "eta_days": 3},
+    {"status": "Shipped", "emoji": "🚚", "eta_days": 3},
+    {"status": "Out for Delivery", "emoji": "🛵", "eta_days": 10},
+    {"status": "Delivered", "emoji": "✅", "eta_days": 12},
+]
+STATUS_INDEX = {step["status"]: i for i, step in enumerate(STATUS_STEPS)}
+
+DEFAULT_SHIPPING_ADDRESS = "123 Sample Street, City, State, PIN"
+
+# Stay well below SQLite's limit on bound parameters per statement
+SQL_VARIABLE_CHUNK = 500
+
+# Sample orders offered by the "Track ORD-..." buttons in utter_ask_order_id, kept
+# days_ago days old (they are moved forward when re-rendered on a later day)
+DEMO_ORDERS = [
+    {
+        "order_id": "ORD-123456",
+        "days_ago": 5,
+        "statuses": ["Order Placed", "Payment Confirmed", "Processing", "Ready for Shipment", "Shipped"],
+        "items": [{"sku": "M57611", "product_id": "M57611", "product_name": "aathmika version 3 haaram",
+                   "base_price": 2429.0, "discounted_price": None, "quantity": 1}],
+    },
+    {
+        "order_id": "ORD-987654",
+        "days_ago": 2,
+        "statuses": ["Order Placed", "Payment Confirmed", "Processing"],
+        "items": [{"sku": "M91478", "product_id": "M91478", "product_name": "ajanta victoria neckpiece – aadi",
+                   "base_price": 2099.0, "discounted_price": 2029.0, "quantity": 1}],
+    },
+]
+DEMO_ORDER_IDS = {demo["order_id"] for demo in DEMO_ORDERS}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    order_id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    items TEXT NOT NULL,
+    total_amount REAL NOT NULL,
+    original_amount REAL NOT NULL,
+    shipping_address TEXT NOT NULL,
+    current_status TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS order_events (
+    order_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    event_time REAL NOT NULL,
+    PRIMARY KEY (order_id, status)
+) WITHOUT ROWID;
+
+-- Pre-rendered tracking messages, refreshed whenever an order's status changes
+CREATE TABLE IF NOT EXISTS order_timelines (
+    order_id TEXT PRIMARY KEY,
+    status_message TEXT NOT NULL,
+    details_message TEXT NOT NULL,
+    updated_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+@functools.lru_cache(maxsize=4096)
+def _format_day(day: datetime.date) -> Text:
+    return day.strftime("%d %b %Y")
+
+
+def format_date(timestamp: float) -> Text:
+    """Format a unix timestamp the way dates are shown to shoppers"""
+    return _format_day(datetime.date.fromtimestamp(timestamp))
+
+
+class OrderStore:
+    """SQLite backed store for placed orders and their status history.
+
+    Orders are keyed by order ID (primary key lookups), so validating, tracking
+    and reporting issues never scan the table. Each thread gets its own
+    connection and connections are reopened after a fork.
+    """
+
+    def __init__(self, db_path: Optional[Text] = None):
+        self.db_path = db_path or os.environ.get("DIYA_ORDER_DB") or data_path("orders.db")
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+        self.seed_demo_orders()
+
+    def _conn(self):
+        """Return this thread's connection, reopening it if we are in a forked child"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = connect_sqlite(self.db_path)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def create_order(self, order_id: Text, items: List[Dict], total_amount: float,
+                     original_amount: float, shipping_address: Text = DEFAULT_SHIPPING_ADDRESS,
+                     created_at: Optional[float] = None,
+                     statuses: Optional[List[Text]] = None) -> Dict[Text, Any]:
+        """Persist a new order together with its initial status events"""
+        created_at = created_at or time.time()
+        statuses = statuses or ["Order Placed"]
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT INTO orders (order_id, created_at, items, total_amount, original_amount, "
+                "shipping_address, current_status) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (order_id, created_at, json.dumps(items), total_amount, original_amount,
+                 shipping_address, statuses[-1])
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO order_events (order_id, status, event_time) VALUES (?, ?, ?)",
+                [(order_id, status, created_at) for status in statuses]
+            )
+            order = self._load_order(conn, order_id)
+            self._store_timeline(conn, order)
+        return order
+
+    def add_status(self, order_id: Text, status: Text, event_time: Optional[float] = None) -> bool:
+        """Record a status change for an order. Returns False if the order is unknown"""
+        applied, _ = self.apply_status_batch([(order_id, status, event_time or time.time())])
+        return applied == 1
+
+    def apply_status_batch(self, rows: List[Tuple[Text, Text, float]]) -> Tuple[int, int]:
+        """Apply (order_id, status, event_time) rows in a single transaction.
+
+        Re-renders the cached timeline of every order touched by the batch.
+        Returns (applied rows, rows skipped because the order is unknown).
+        """
+        for _, status, _ in rows:
+            if status not in STATUS_INDEX:
+                raise ValueError(f"Unknown order status: {status}")
+        order_ids = list({row[0] for row in rows})
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Load every touched order (and its earlier events) with a few IN queries
+            orders = self._load_orders(conn, order_ids)
+            applicable = [row for row in rows if row[0] in orders]
+            conn.executemany(
+                "INSERT OR REPLACE INTO order_events (order_id, status, event_time) VALUES (?, ?, ?)",
+                applicable
+            )
+            status_updates = []
+            for order_id, status, event_time in applicable:
+                orders[order_id]["events"][status] = event_time
+            for order_id, order in orders.items():
+                # The current status is the furthest step reached, whatever order the events arrived in
+                current_status = max(order["events"], key=lambda status: STATUS_INDEX.get(status, -1))
+                if current_status != order["current_status"]:
+                    order["current_status"] = current_status
+                    status_updates.append((current_status, order_id))
+            conn.executemany("UPDATE orders SET current_status = ? WHERE order_id = ?", status_updates)
+            self._store_timelines(conn, list(orders.values()))
+        return len(applicable), len(rows) - len(applicable)
+
+    def order_exists(self, order_id: Text) -> bool:
+        """Check whether an order ID is known"""
+        row = self._conn().execute(
+            "SELECT 1 FROM orders WHERE order_id = ?", (order_id,)
+        ).fetchone()
+        return row is not None
+
+    def get_order(self, order_id: Text) -> Optional[Dict[Text, Any]]:
+        """Fetch an order and its status events, or None if the order is unknown"""
+        return self._load_order(self._conn(), order_id)
+
+    def get_rendered(self, order_id: Text) -> Optional[Dict[Text, Text]]:
+        """Return the cached status and details messages for an order, or None if the order is unknown"""
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT status_message, details_message, updated_at FROM order_timelines WHERE order_id = ?",
+            (order_id,)
+        ).fetchone()
+        # Estimated dates are relative to the day the timeline was rendered
+        if row is not None and format_date(row["updated_at"]) == format_date(time.time()):
+            return {"status_message": row["status_message"], "details_message": row["details_message"]}
+        if order_id in DEMO_ORDER_IDS:
+            self.seed_demo_orders(refresh=True)
+            return self.get_rendered(order_id)
+        # Orders stored before timelines were cached (or rendered on an earlier day) are rendered on access
+        order = self._load_order(conn, order_id)
+        if order is None:
+            return None
+        with conn:
+            rendered = self._store_timeline(conn, order)
+        return rendered
+
+    def _load_order(self, conn, order_id: Text) -> Optional[Dict[Text, Any]]:
+        return self._load_orders(conn, [order_id]).get(order_id)
+
+    def _load_orders(self, conn, order_ids: List[Text]) -> Dict[Text, Dict[Text, Any]]:
+        orders = {}
+        for i in range(0, len(order_ids), SQL_VARIABLE_CHUNK):
+            chunk = order_ids[i:i + SQL_VARIABLE_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            for row in conn.execute(f"SELECT * FROM orders WHERE order_id IN ({placeholders})", chunk):
+                order = dict(row)
+                order["items"] = json.loads(order["items"])
+                order["events"] = {}
+                orders[order["order_id"]] = order
+            for event in conn.execute(
+                f"SELECT order_id, status, event_time FROM order_events WHERE order_id IN ({placeholders})", chunk
+            ):
+                orders[event["order_id"]]["events"][event["status"]] = event["event_time"]
+        return orders
+
+    def _store_timeline(self, conn, order: Dict[Text, Any]) -> Dict[Text, Text]:
+        return self._store_timelines(conn, [order])[0]
+
+    def _store_timelines(self, conn, orders: List[Dict[Text, Any]]) -> List[Dict[Text, Text]]:
+        now = time.time()
+        rendered = []
+        for order in orders:
+            timeline = build_status_timeline(order)
+            rendered.append({
+                "status_message": render_status_message(order, timeline),
+                "details_message": render_details_message(order, timeline)
+            })
+        conn.executemany(
+            "INSERT OR REPLACE INTO order_timelines (order_id, status_message, details_message, updated_at) "
+            "VALUES (?, ?, ?, ?)",
+            [(order["order_id"], r["status_message"], r["details_message"], now) for order, r in zip(orders, rendered)]
+        )
+        return rendered
+
+    def seed_demo_orders(self, refresh: bool = False):
+        """Insert the sample orders used by the tracking buttons if they are missing, or with refresh,
+        move them forward so they were placed days_ago days before today"""
+        conn = self._conn()
+        for demo in DEMO_ORDERS:
+            now = time.time()
+            created_at = now - demo["days_ago"] * 86400
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                # Checked inside the transaction, so workers starting together seed each order once
+                row = conn.execute("SELECT created_at FROM orders WHERE order_id = ?", (demo["order_id"],)).fetchone()
+                if row is not None and (not refresh or format_date(row["created_at"]) == format_date(created_at)):
+                    continue
+                items = demo["items"]
+                conn.execute(
+                    "INSERT OR REPLACE INTO orders (order_id, created_at, items, total_amount, original_amount, "
+                    "shipping_address, current_status) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (demo["order_id"], created_at, json.dumps(items),
+                     sum((item["discounted_price"] or item["base_price"]) * item["quantity"] for item in items),
+                     sum(item["base_price"] * item["quantity"] for item in items),
+                     DEFAULT_SHIPPING_ADDRESS, demo["statuses"][-1])
+                )
+                conn.execute("DELETE FROM order_events WHERE order_id = ?", (demo["order_id"],))
+                conn.executemany(
+                    "INSERT INTO order_events (order_id, status, event_time) VALUES (?, ?, ?)",
+                    [(demo["order_id"], status,
+                      min(created_at + STATUS_STEPS[STATUS_INDEX[status]]["eta_days"] * 86400, now))
+                     for status in demo["statuses"]]
+                )
+                self._store_timeline(conn, self._load_order(conn, demo["order_id"]))
+
+
+def build_status_timeline(order: Dict[Text, Any], now: Optional[float] = None) -> List[Dict[Text, Any]]:
+    """Build the per-step timeline for an order, estimating dates for pending steps.
+
+    Completed steps the feed skipped are dated no later than the next recorded
+    event, or today. Pending steps are estimated from the latest completed
+    step, and never before today.
+    """
+    now = now or time.time()
+    events = order.get("events", {})
+    current_idx = STATUS_INDEX.get(order.get("current_status"), 0)
+    timeline = []
+    anchor_time, anchor_days = order["created_at"], 0
+    for i, step in enumerate(STATUS_STEPS):
+        completed = i <= current_idx
+        event_time = events.get(step["status"])
+        if event_time is None and completed:
+            later = [events[later_step["status"]] for later_step in STATUS_STEPS[i + 1:current_idx + 1]
+                     if later_step["status"] in events]
+            event_time = max(min([order["created_at"] + step["eta_days"] * 86400, now] + later), anchor_time)
+        elif event_time is None:
+            event_time = max(anchor_time + (step["eta_days"] - anchor_days) * 86400, now)
+        if completed:
+            anchor_time, anchor_days = event_time, step["eta_days"]
+        timeline.append({
+            "status": step["status"],
+            "emoji": step["emoji"],
+            "date": format_date(event_time),
+            "completed": completed
+        })
+    return timeline
+
+
+def describe_items(order: Dict[Text, Any]) -> Text:
+    """Short product summary for an order, e.g. 'aathmika haaram × 2, ...'"""
+    names = []
+    for item in order.get("items", []):
+        quantity = item.get("quantity", 1)
+        name = item.get("product_name", "Unknown Product")
+        names.append(f"{name} × {quantity}" if quantity > 1 else name)
+    return ", ".join(names) or "N/A"
+
+
+def render_status_message(order: Dict[Text, Any], statuses: Optional[List[Dict]] = None) -> Text:
+    """Render the order tracking message with its status timeline"""
+    statuses = statuses or build_status_timeline(order)
+    estimated_delivery = statuses[-1]["date"]  # Use the delivery date from the statuses
+
+    # Build status timeline message
+    message = f"📋 *Order Details* (ID: {order['order_id']})\n\n"
+    message += f"*Product:* {describe_items(order)}\n"
+    message += f"*Amount:* ₹{order['total_amount']:.2f}\n"
+    message += f"*Shipping Address:* {order['shipping_address']}\n"
+    message += f"*Current Status:* {order['current_status']}\n"
+    message += f"*Estimated Delivery:* {estimated_delivery}\n\n"
+
+    # Create visual timeline
+    message += "📊 *Order Timeline:*\n\n"
+
+    for status in statuses:
+        if status["completed"]:
+            # Completed status
+            message += f"{status['emoji']} {status['status']}: ✅ {status['date']}\n"
+        else:
+            # Pending status
+            message += f"{status['emoji']} {status['status']}: ⏳ {status['date']} (Estimated)\n"
+    return message
+
+
+def render_details_message(order: Dict[Text, Any], statuses: Optional[List[Dict]] = None) -> Text:
+    """Render the detailed order information message"""
+    statuses = statuses or build_status_timeline(order)
+    payment_status = "Paid" if "Payment Confirmed" in order["events"] else "Pending"
+
+    # Format all order details for display
+    message = "📦 *Detailed Order Information*\n\n"
+    message += f"*Order ID:* {order['order_id']}\n"
+    message += f"*Product:* {describe_items(order)}\n"
+    message += f"*Amount:* ₹{order['total_amount']:.2f}\n"
+    message += f"*Order Date:* {statuses[0]['date']}\n"
+    message += f"*Current Status:* {order['current_status']}\n"
+    message += f"*Shipping Address:* {order['shipping_address']}\n"
+    message += f"*Estimated Delivery:* {statuses[-1]['date']}\n\n"
+
+    # Add payment info
+    message += "*Payment Information:*\n"
+    message += "Method: Credit Card (ending in ****1234)\n"
+    message += f"Amount: ₹{order['total_amount']:.2f}\n"
+    message += f"Status: {payment_status}\n\n"
+
+    # Add shipping info
+    message += "*Shipping Information:*\n"
+    message += "Courier: Express Delivery Services\n"
+    message += "Tracking Number: EXP123456789\n\n"
+
+    # Add a note about jewelry care
+    message += "*Product Care:* All jewelry items come with a care instruction card. Please follow the instructions to maintain your item's appearance.\n"
+    return message
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_order_store() -> OrderStore:
+    """Return the process wide order store"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = OrderStore()
+    return _store
@@ -0,0 +1,347 @@
+"""Pre-fork launcher for the action server.
+
+The parent process imports the actions, loads and indexes the product
+catalog once, freezes the garbage collector's view of those objects and
+then forks the workers. Workers share the catalog pages copy-on-write, so
+adding workers adds little memory, and they all accept connections from the
+same listening socket.
+
+Workers are recycled gracefully: a worker stops accepting new requests,
+finishes the ones in flight and exits, and the parent starts a replacement.
+This happens after a worker has served --max-requests requests, and for all
+workers (one at a time, after reloading the catalog) on SIGHUP. SIGTERM or
+Ctrl-C shuts everything down gracefully.
+
+Each worker gets a slot for its metrics port: 0..--workers-1, plus one
+spare slot (--workers) used by the replacement while a worker is rolled.
+Order IDs need a worker ID that no other live process shares: if
+DIYA_WORKER_ID is set for the launcher, the worker in slot N uses
+DIYA_WORKER_ID + N (give each replica its own block, at least --workers + 1
+apart); otherwise the workers lease IDs from the shared data directory (see
+actions.id_generator).
+
+Usage:
+    python -m actions.prefork --workers 4 --port 5055
+    kill -HUP <parent pid>    # reload the catalog and roll the workers
+    kill -USR2 <parent pid>   # toggle profiling in all workers (see actions.profiling)
+"""
+import argparse
+import asyncio
+import gc
+import importlib
+import os
+import random
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List, Optional, Text
+
+MAX_WORKER_IDS = 1024  # worker IDs feed the 10-bit worker field of generated order IDs
+
+SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def bind_socket(host: Text, port: int, backlog: int = 1024) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def memory_usage(pid: int) -> Dict[Text, int]:
+    """Memory of a process in kB from /proc/<pid>/smaps_rollup (empty if unavailable)"""
+    usage = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in SMAPS_FIELDS:
+                    usage[key] = int(value.split()[0])
+    except OSError:
+        pass
+    return usage
+
+
+def preload():
+    """Import everything the workers need and run the shared warm-up steps, before forking"""
+    from .startup import startup
+    startup.auto = False  # shared steps run here, the per-process ones in each worker
+    importlib.import_module(".actions", __package__)  # rasa_sdk and the action classes
+    if not startup.run(per_process=False):
+        raise SystemExit(f"Warm-up failed: {startup.errors}")
+    from .catalog import get_catalog
+    catalog = get_catalog()
+    print(f"Catalog loaded: {len(catalog)} products from {catalog.path} in {catalog.load_seconds:.2f}s")
+    print("Warm-up: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in startup.timings.items()))
+
+
+def freeze_heap():
+    # Move everything allocated so far out of the collector's reach, so collections
+    # in the workers don't write to (and un-share) the parent's pages
+    gc.collect()
+    gc.freeze()
+
+
+async def serve(sock: socket.socket, max_requests: int, graceful_timeout: float, cors: List[Text]):
+    from rasa_sdk.endpoint import create_app
+    from sanic import response
+
+    from .startup import startup
+
+    app = create_app("actions", cors_origins=cors)
+    state = {"served": 0, "in_flight": 0}
+    stop = asyncio.Event()
+
+    @app.route("/ready", methods=["GET"])
+    async def ready(request):
+        return response.json(startup.status(), status=200 if startup.ready else 503)
+
+    @app.middleware("request")
+    async def count_request(request):
+        state["in_flight"] += 1
+
+    @app.middleware("response")
+    async def count_response(request, response):
+        state["in_flight"] -= 1
+        state["served"] += 1
+        if max_requests and state["served"] >= max_requests:
+            stop.set()
+
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop.set)
+
+    server = await app.create_server(sock=sock, return_asyncio_server=True)
+    await server.startup()
+    await server.before_start()
+    await server.after_start()
+    await stop.wait()
+    startup.ready = False  # draining
+
+    # Stop accepting, then give requests in flight time to finish
+    closing = server.close()
+    if closing is not None:
+        await closing
+    deadline = loop.time() + graceful_timeout
+    while state["in_flight"] > 0 and loop.time() < deadline:
+        await asyncio.sleep(0.05)
+    await server.before_stop()
+    await server.after_stop()
+    print(f"Worker {os.getpid()} exiting after {state['served']} requests")
+
+
+def worker_main(sock: socket.socket, worker_id: int, max_requests: int,
+                graceful_timeout: float, cors: List[Text]):
+    for signum in (signal.SIGHUP, signal.SIGCHLD, signal.SIGTERM, signal.SIGINT, signal.SIGUSR2):
+        signal.signal(signum, signal.SIG_DFL)
+    os.environ["DIYA_WORKER_SLOT"] = str(worker_id)
+    base_id = os.environ.get("DIYA_WORKER_BASE_ID")
+    if base_id is not None:
+        os.environ["DIYA_WORKER_ID"] = str(int(base_id) + worker_id)
+    from .instrumentation import start_metrics_server
+    from .profiling import install_signal_handler
+    from .startup import startup
+    install_signal_handler(force=True)  # SIGUSR2 toggles profiling in the worker
+    startup.after_fork()
+    startup.run(shared=False)  # SQLite connections and anything else that can't be inherited
+    startup.mark_ready()
+    start_metrics_server()
+    # Spread recycling out so the workers don't all restart at once
+    if max_requests:
+        max_requests += random.randint(0, max(1, max_requests // 10))
+    asyncio.run(serve(sock, max_requests, graceful_timeout, cors))
+
+
+class Arbiter:
+    """Parent process: forks the workers, replaces the ones that exit, handles signals"""
+
+    def __init__(self, sock: socket.socket, workers: int, max_requests: int = 0,
+                 graceful_timeout: float = 30.0, cors: Optional[List[Text]] = None,
+                 memory_interval: float = 0.0):
+        self.sock = sock
+        self.num_workers = workers
+        self.max_requests = max_requests
+        self.graceful_timeout = graceful_timeout
+        self.cors = cors or ["*"]
+        self.memory_interval = memory_interval
+        self.children: Dict[int, int] = {}  # pid -> worker id
+        self._stopping = False
+        self._reload = False
+
+    def spawn(self) -> int:
+        # Live workers must never share a worker ID, or their order IDs could collide, and must stay
+        # inside the launcher's block: the workers' slots plus the spare one for a rolling restart
+        used = set(self.children.values())
+        worker_id = next((i for i in range(self.num_workers + 1) if i not in used), None)
+        if worker_id is None:
+            raise RuntimeError(f"All {self.num_workers + 1} worker slots are in use")
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                worker_main(self.sock, worker_id, self.max_requests, self.graceful_timeout, self.cors)
+            except BaseException as e:
+                print(f"Worker {os.getpid()} failed: {str(e)}")
+                code = 1
+            finally:
+                # os._exit skips atexit, so the issue log's queued reports are written here
+                from . import issue_log
+                if issue_log._issue_log is not None and not issue_log._issue_log.flush(5.0):
+                    print(f"Worker {os.getpid()} could not flush the issue log")
+                sys.stdout.flush()
+                os._exit(code)
+        self.children[pid] = worker_id
+        return pid
+
+    def _on_signal(self, signum, frame):
+        if signum == signal.SIGHUP:
+            self._reload = True
+        elif signum in (signal.SIGTERM, signal.SIGINT):
+            self._stopping = True
+        elif signum == signal.SIGUSR2:
+            for pid in list(self.children):
+                try:
+                    os.kill(pid, signal.SIGUSR2)
+                except ProcessLookupError:
+                    pass
+
+    def reap(self) -> int:
+        """Collect exited workers, returns how many of them failed"""
+        failed = 0
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            if self.children.pop(pid, None) is not None:
+                code = os.waitstatus_to_exitcode(status)
+                if code != 0 and not self._stopping:
+                    print(f"Worker {pid} exited with status {code}")
+                    failed += 1
+        return failed
+
+    def rolling_restart(self):
+        """Reload the catalog, then replace the workers one at a time"""
+        gc.unfreeze()  # let the old catalog be collected once it is replaced
+        try:
+            from .catalog import reload_catalog
+            catalog = reload_catalog()
+            print(f"Catalog reloaded: {len(catalog)} products")
+        except Exception as e:
+            print(f"Catalog reload failed, keeping the current one: {str(e)}")
+        freeze_heap()
+        for pid in list(self.children):
+            # The replacement takes the spare slot, so at most one old worker may still be running
+            self.spawn()
+            self._stop_worker(pid)
+            deadline = time.monotonic() + self.graceful_timeout + 5
+            while pid in self.children and time.monotonic() < deadline and not self._stopping:
+                time.sleep(0.1)
+                self.reap()
+            if pid in self.children:
+                self._stop_worker(pid, signal.SIGKILL)
+                while pid in self.children:
+                    time.sleep(0.05)
+                    self.reap()
+
+    def _stop_worker(self, pid: int, signum: int = signal.SIGTERM):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def report_memory(self):
+        total_pss = 0
+        for pid, worker_id in sorted(self.children.items(), key=lambda item: item[1]):
+            usage = memory_usage(pid)
+            if not usage:
+                continue
+            total_pss += usage.get("Pss", 0)
+            private = usage.get("Private_Clean", 0) + usage.get("Private_Dirty", 0)
+            shared = usage.get("Shared_Clean", 0) + usage.get("Shared_Dirty", 0)
+            print(f"worker {worker_id} (pid {pid}): rss={usage.get('Rss', 0) / 1024:.1f}MB "
+                  f"pss={usage.get('Pss', 0) / 1024:.1f}MB private={private / 1024:.1f}MB "
+                  f"shared={shared / 1024:.1f}MB")
+        parent = memory_usage(os.getpid())
+        total_pss += parent.get("Pss", 0)
+        print(f"total pss (parent + {len(self.children)} workers): {total_pss / 1024:.1f}MB")
+
+    def run(self):
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGUSR2):
+            signal.signal(signum, self._on_signal)
+        # Wake the supervision loop promptly when a worker exits
+        signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+
+        for _ in range(self.num_workers):
+            self.spawn()
+        print(f"Started {self.num_workers} workers: {sorted(self.children)}")
+
+        last_report = time.monotonic()
+        last_failure = 0.0
+        while not self._stopping:
+            if self.reap() and not self._stopping:
+                # Back off briefly if workers keep failing (e.g. a broken deploy)
+                if time.monotonic() - last_failure < 1.0:
+                    time.sleep(1.0)
+                last_failure = time.monotonic()
+            while len(self.children) < self.num_workers and not self._stopping:
+                self.spawn()
+            if self._reload:
+                self._reload = False
+                self.rolling_restart()
+            if self.memory_interval and time.monotonic() - last_report >= self.memory_interval:
+                self.report_memory()
+                last_report = time.monotonic()
+            time.sleep(0.5)
+
+        self.shutdown()
+
+    def shutdown(self):
+        for pid in list(self.children):
+            self._stop_worker(pid)
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self.children and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in list(self.children):
+            self._stop_worker(pid, signal.SIGKILL)
+        self.reap()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-requests", type=int, default=int(os.environ.get("ACTION_MAX_REQUESTS", "0")),
+                        help="recycle a worker after this many requests (0: never)")
+    parser.add_argument("--graceful-timeout", type=float, default=30.0,
+                        help="seconds a stopping worker gets to finish requests in flight")
+    parser.add_argument("--memory-report", type=float, default=0.0, metavar="SECONDS",
+                        help="print per-worker memory use every N seconds")
+    parser.add_argument("--cors", nargs="*", default=["*"])
+    args = parser.parse_args()
+
+    # Workers derive their worker IDs from the launcher's (see the module docstring)
+    base_id = os.environ.pop("DIYA_WORKER_ID", None)
+    if base_id is not None:
+        block = args.workers + 1  # the workers plus the spare slot
+        if not 0 <= int(base_id) <= MAX_WORKER_IDS - block:
+            raise SystemExit(f"DIYA_WORKER_ID must be between 0 and {MAX_WORKER_IDS - block} "
+                             f"for {args.workers} workers, got {base_id}")
+        os.environ["DIYA_WORKER_BASE_ID"] = base_id
+
+    sock = bind_socket(args.host, args.port)
+    preload()
+    freeze_heap()
+    print(f"Action server listening on {args.host}:{args.port}")
+    Arbiter(sock, args.workers, args.max_requests, args.graceful_timeout, args.cors, args.memory_report).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""On-demand profiling of live action-server workers.
+
+Profiling is off by default and then costs one attribute check per action
+call. Once switched on, a fraction of the calls to the chosen actions run
+under the profiler:
+
+- "stack" (default): a background thread samples the stacks of the threads
+  running profiled calls every few milliseconds. Any number of calls can be
+  sampled at once and the calls themselves are not slowed down. Output is a
+  collapsed-stack file for flamegraph.pl or speedscope.
+- "cprofile": the call runs under cProfile, giving exact call counts at
+  the price of a slower call. Only one call per process is profiled at a
+  time; calls arriving meanwhile run normally. Output is a pstats file per
+  action (python -m pstats, snakeviz).
+
+Switching on and off:
+
+    kill -USR2 <worker pid>   # toggle, using the ACTION_PROFILE_* settings
+    curl -X POST 'http://127.0.0.1:9105/profile/start?actions=action_show_more&rate=0.2&mode=stack'
+    curl -X POST http://127.0.0.1:9105/profile/stop
+    curl http://127.0.0.1:9105/profile
+
+With the pre-fork launcher, SIGUSR2 to the parent toggles all workers.
+Profiling stops by itself after ACTION_PROFILE_MAX_SECONDS. Results are
+written when it stops, to ACTION_PROFILE_DIR (local_data/profiles), one
+file per worker process.
+"""
+import collections
+import cProfile
+import logging
+import os
+import pstats
+import random
+import signal
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Text
+
+from .storage import DATA_DIR
+
+PROFILE_ACTIONS = os.environ.get("ACTION_PROFILE_ACTIONS", "")  # comma separated, empty: all actions
+PROFILE_RATE = float(os.environ.get("ACTION_PROFILE_RATE", "0.1"))
+PROFILE_MODE = os.environ.get("ACTION_PROFILE_MODE", "stack").lower()
+PROFILE_INTERVAL_MS = float(os.environ.get("ACTION_PROFILE_INTERVAL_MS", "5"))
+PROFILE_MAX_SECONDS = float(os.environ.get("ACTION_PROFILE_MAX_SECONDS", "300"))
+PROFILE_DIR = os.environ.get("ACTION_PROFILE_DIR") or os.path.join(DATA_DIR, "profiles")
+PROFILE_MODES = ("stack", "cprofile")
+
+logger = logging.getLogger(__name__)
+
+
+def _frame_label(frame) -> Text:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class Profiler:
+    """Per-process profiling state, switched on and off at runtime"""
+
+    def __init__(self):
+        self.active = False  # read on every action call, keep it a plain attribute
+        self.actions: Optional[frozenset] = None  # None: all actions
+        self.rate = PROFILE_RATE
+        self.mode = PROFILE_MODE
+        self.interval = PROFILE_INTERVAL_MS / 1000
+        self.started_at = 0.0
+        self.profiled_calls = 0
+        self.skipped_calls = 0
+        self.last_files: List[Text] = []
+        self._lock = threading.Lock()
+        self._targets: Dict[int, tuple] = {}  # thread id -> (action name, frame of the profiled call)
+        self._stacks: collections.Counter = collections.Counter()
+        self._samples = 0
+        self._stats: Dict[Text, pstats.Stats] = {}
+        self._stats_lock = threading.Lock()  # guards _stats: merged into by calls, swapped out by _write
+        self._cprofile_lock = threading.Lock()
+        self._sampler: Optional[threading.Thread] = None
+        self._timer: Optional[threading.Timer] = None
+        self._generation = 0
+
+    def start(self, actions: Optional[Iterable[Text]] = None, rate: Optional[float] = None,
+              mode: Optional[Text] = None, max_seconds: float = PROFILE_MAX_SECONDS) -> Dict:
+        mode = (mode or PROFILE_MODE).lower()
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profiling mode {mode!r}, expected one of {', '.join(PROFILE_MODES)}")
+        rate = PROFILE_RATE if rate is None else rate
+        if not 0 < rate <= 1:
+            raise ValueError("Profiling rate must be in (0, 1]")
+        actions = [a.strip() for a in (actions or []) if a.strip()]
+        with self._lock:
+            if self.active:
+                return self.status()
+            self.actions = frozenset(actions) if actions else None
+            self.rate = rate
+            self.mode = mode
+            self.started_at = time.time()
+            self.profiled_calls = 0
+            self.skipped_calls = 0
+            self._stacks = collections.Counter()
+            self._samples = 0
+            with self._stats_lock:
+                self._stats = {}
+            self._generation += 1
+            if mode == "stack":
+                self._sampler = threading.Thread(target=self._sample_loop, args=(self._generation,),
+                                                 name="profile-sampler", daemon=True)
+                self._sampler.start()
+            if max_seconds:
+                self._timer = threading.Timer(max_seconds, self.stop)
+                self._timer.daemon = True
+                self._timer.start()
+            self.active = True
+        logger.info("Profiling started: mode=%s rate=%s actions=%s", mode, rate,
+                    ",".join(sorted(self.actions)) if self.actions else "all")
+        return self.status()
+
+    def stop(self) -> Dict:
+        """Switch profiling off and write out what was collected"""
+        with self._lock:
+            if not self.active:
+                return self.status()
+            self.active = False
+            self._generation += 1
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            sampler, self._sampler = self._sampler, None
+        if sampler is not None and sampler is not threading.current_thread():
+            sampler.join(timeout=1.0)
+        self.last_files = self._write()
+        logger.info("Profiling stopped after %d calls, wrote %s", self.profiled_calls,
+                    ", ".join(self.last_files) or "nothing")
+        return self.status()
+
+    def toggle(self) -> Dict:
+        if self.active:
+            return self.stop()
+        return self.start([a for a in PROFILE_ACTIONS.split(",")])
+
+    def status(self) -> Dict:
+        return {
+            "active": self.active,
+            "pid": os.getpid(),
+            "mode": self.mode,
+            "rate": self.rate,
+            "actions": sorted(self.actions) if self.actions else "all",
+            "running_seconds": round(time.time() - self.started_at, 1) if self.active else 0,
+            "profiled_calls": self.profiled_calls,
+            "skipped_calls": self.skipped_calls,
+            "samples": self._samples,
+            "files": self.last_files,
+        }
+
+    def should_profile(self, name: Text) -> bool:
+        if self.actions is not None and name not in self.actions:
+            return False
+        return random.random() < self.rate
+
+    def profile(self, name: Text, func: Callable, *args, **kwargs):
+        """Call func, profiling the call in whichever mode is on"""
+        if not self.active:
+            return func(*args, **kwargs)
+        if self.mode == "cprofile":
+            return self._run_cprofile(name, func, *args, **kwargs)
+        return self._run_sampled(name, func, *args, **kwargs)
+
+    def _run_sampled(self, name: Text, func: Callable, *args, **kwargs):
+        thread_id = threading.get_ident()
+        self._targets[thread_id] = (name, sys._getframe())
+        self.profiled_calls += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._targets.pop(thread_id, None)
+
+    def _run_cprofile(self, name: Text, func: Callable, *args, **kwargs):
+        # cProfile can't nest or overlap safely; calls arriving while one is profiled run as usual
+        if not self._cprofile_lock.acquire(blocking=False):
+            self.skipped_calls += 1
+            return func(*args, **kwargs)
+        try:
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.disable()
+                self.profiled_calls += 1
+                with self._stats_lock:
+                    stats = self._stats.get(name)
+                    if stats is None:
+                        self._stats[name] = pstats.Stats(profile)
+                    else:
+                        stats.add(profile)
+        finally:
+            self._cprofile_lock.release()
+
+    def _sample_loop(self, generation: int):
+        own = threading.get_ident()
+        while self._generation == generation:
+            time.sleep(self.interval)
+            if not self._targets:
+                continue
+            frames = sys._current_frames()
+            for thread_id, (name, call_frame) in list(self._targets.items()):
+                frame = frames.get(thread_id)
+                if frame is None or thread_id == own:
+                    continue
+                labels = []
+                # Walk from the innermost frame out to the profiled call
+                while frame is not None and frame is not call_frame:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(name)
+                self._stacks[";".join(reversed(labels))] += 1
+                self._samples += 1
+
+    def _write(self) -> List[Text]:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        files = []
+        if self._stacks:
+            path = os.path.join(PROFILE_DIR, f"{stamp}-{os.getpid()}.collapsed")
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in self._stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            files.append(path)
+        # Calls still finishing after stop() merge into the fresh dict, not the one being dumped
+        with self._stats_lock:
+            collected, self._stats = self._stats, {}
+        for name, stats in collected.items():
+            path = os.path.join(PROFILE_DIR, f"{stamp}-{os.getpid()}-{name}.pstats")
+            stats.dump_stats(path)
+            files.append(path)
+        return files
+
+
+profiler = Profiler()
+
+
+def _on_sigusr2(signum, frame):
+    # Don't write files from inside the signal handler, hand the toggle to a thread
+    threading.Thread(target=profiler.toggle, name="profile-toggle", daemon=True).start()
+
+
+def install_signal_handler(force: bool = False) -> bool:
+    """Toggle profiling on SIGUSR2 (only from the main thread, and not over another handler)"""
+    if not hasattr(signal, "SIGUSR2") or threading.current_thread() is not threading.main_thread():
+        return False
+    if not force and signal.getsignal(signal.SIGUSR2) not in (signal.SIG_DFL, None):
+        return False
+    signal.signal(signal.SIGUSR2, _on_sigusr2)
+    return True
+
+
+install_signal_handler()
@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Text
+
+from .storage import connect_sqlite, data_path
+
+# Weight of the newest review in the recent-trend moving average
+TREND_ALPHA = 0.2
+# Minimum gap between recent and lifetime sentiment before we show a trend arrow
+TREND_THRESHOLD = 0.2
+SQL_VARIABLE_CHUNK = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    review_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sku TEXT,
+    order_id TEXT,
+    sender_id TEXT,
+    review_text TEXT NOT NULL,
+    sentiment TEXT NOT NULL,
+    score REAL NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reviews_by_sku ON reviews (sku, created_at);
+
+-- Running totals per SKU, updated in the same transaction as each review
+CREATE TABLE IF NOT EXISTS review_aggregates (
+    sku TEXT PRIMARY KEY,
+    review_count INTEGER NOT NULL,
+    positive_count INTEGER NOT NULL,
+    negative_count INTEGER NOT NULL,
+    recent_trend REAL NOT NULL,
+    updated_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+SENTIMENT_SIGNAL = {"positive": 1.0, "negative": -1.0, "neutral": 0.0}
+
+
+class ReviewStore:
+    """SQLite backed store for product reviews with O(1) per-SKU rating aggregates"""
+
+    def __init__(self, db_path: Optional[Text] = None):
+        self.db_path = db_path or os.environ.get("DIYA_REVIEW_DB") or data_path("reviews.db")
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        """Return this thread's connection, reopening it if we are in a forked child"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = connect_sqlite(self.db_path)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def add_review(self, skus: Iterable[Text], review_text: Text, sentiment: Text, score: float,
+                   order_id: Optional[Text] = None, sender_id: Optional[Text] = None) -> int:
+        """Store a review against each SKU it is about and update their aggregates.
+
+        A review that cannot be tied to a product is still kept (with no SKU).
+        Returns the number of review rows written.
+        """
+        skus = list(dict.fromkeys(sku for sku in skus if sku)) or [None]
+        now = time.time()
+        signal = SENTIMENT_SIGNAL.get(sentiment, 0.0)
+        positive = 1 if sentiment == "positive" else 0
+        negative = 1 if sentiment == "negative" else 0
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO reviews (sku, order_id, sender_id, review_text, sentiment, score, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(sku, order_id, sender_id, review_text, sentiment, score, now) for sku in skus]
+            )
+            # Constant-time incremental update: counts and an exponential moving average
+            conn.executemany(
+                "INSERT INTO review_aggregates "
+                "(sku, review_count, positive_count, negative_count, recent_trend, updated_at) "
+                "VALUES (?, 1, ?, ?, ?, ?) "
+                "ON CONFLICT(sku) DO UPDATE SET "
+                "review_count = review_count + 1, "
+                "positive_count = positive_count + excluded.positive_count, "
+                "negative_count = negative_count + excluded.negative_count, "
+                f"recent_trend = recent_trend * {1 - TREND_ALPHA} + excluded.recent_trend * {TREND_ALPHA}, "
+                "updated_at = excluded.updated_at",
+                [(sku, positive, negative, signal, now) for sku in skus if sku is not None]
+            )
+        return len(skus)
+
+    def get_aggregates(self, skus: Iterable[Text]) -> Dict[Text, Dict[Text, Any]]:
+        """Aggregates for a page of SKUs in one query. SKUs without reviews are left out"""
+        skus = [sku for sku in dict.fromkeys(skus) if sku]
+        aggregates = {}
+        conn = self._conn()
+        for i in range(0, len(skus), SQL_VARIABLE_CHUNK):
+            chunk = skus[i:i + SQL_VARIABLE_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            for row in conn.execute(
+                f"SELECT * FROM review_aggregates WHERE sku IN ({placeholders})", chunk
+            ):
+                aggregates[row["sku"]] = dict(row)
+        return aggregates
+
+    def get_reviews(self, sku: Text, limit: int = 20) -> List[Dict[Text, Any]]:
+        """Most recent reviews for a SKU"""
+        rows = self._conn().execute(
+            "SELECT * FROM reviews WHERE sku = ? ORDER BY created_at DESC LIMIT ?", (sku, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def format_rating_badge(aggregate: Optional[Dict[Text, Any]]) -> Optional[Text]:
+    """One-line rating badge for a product card, e.g. '⭐ 86% positive (14 reviews) 📈'"""
+    if not aggregate or not aggregate["review_count"]:
+        return None
+    count = aggregate["review_count"]
+    positive_share = aggregate["positive_count"] / count
+    badge = f"⭐ {positive_share:.0%} positive ({count} review{'s' if count != 1 else ''})"
+    # Compare recent sentiment with the lifetime average to show a trend
+    lifetime = (aggregate["positive_count"] - aggregate["negative_count"]) / count
+    if count >= 3:
+        if aggregate["recent_trend"] - lifetime > TREND_THRESHOLD:
+            badge += " 📈"
+        elif lifetime - aggregate["recent_trend"] > TREND_THRESHOLD:
+            badge += " 📉"
+    return badge
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_review_store() -> ReviewStore:
+    """Return the process wide review store"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ReviewStore()
+    return _store
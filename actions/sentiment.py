@@ -0,0 +1,197 @@
+"""Lexicon based review sentiment scoring.
+
+Reviews are tokenised once and every token is looked up in a single compiled
+lexicon (word -> role and weight), so scoring is one pass over the text.
+Whole-word matching means "like" no longer matches inside "dislike". Negators
+("not", "never", "didn't"...) flip the polarity of the next few words, and
+intensifiers/diminishers ("very", "slightly"...) scale it. Text with no
+sentiment words, or an exact tie, is "neutral".
+
+The batch mode scores a whole review export with a process pool and reports
+throughput, for backfilling sentiment over historic reviews:
+
+    python -m actions.sentiment reviews.csv scored.csv --column review_text --processes 8
+"""
+import argparse
+import collections
+import csv
+import multiprocessing
+import re
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Text, Tuple
+
+POSITIVE_WORDS = {
+    "good": 1.0, "great": 1.5, "excellent": 2.0, "amazing": 2.0, "wonderful": 2.0,
+    "love": 2.0, "loved": 2.0, "lovely": 1.5, "like": 1.0, "liked": 1.0, "best": 1.5,
+    "fantastic": 2.0, "helpful": 1.0, "happy": 1.5, "satisfied": 1.0, "perfect": 2.0,
+    "awesome": 2.0, "impressive": 1.5, "beautiful": 1.5, "gorgeous": 2.0, "elegant": 1.5,
+    "stunning": 2.0, "pretty": 1.0, "nice": 1.0, "recommend": 1.0, "quick": 0.5, "fast": 0.5,
+    "worth": 1.0, "quality": 0.5, "thanks": 0.5, "thank": 0.5,
+}
+
+NEGATIVE_WORDS = {
+    "bad": 1.0, "poor": 1.5, "terrible": 2.0, "awful": 2.0, "horrible": 2.0,
+    "hate": 2.0, "hated": 2.0, "dislike": 1.5, "worst": 2.0, "disappointing": 1.5,
+    "disappointed": 1.5, "unhappy": 1.5, "unsatisfied": 1.5, "broken": 1.5, "broke": 1.5,
+    "useless": 2.0, "waste": 1.5, "expensive": 1.0, "damaged": 1.5, "late": 1.0,
+    "delayed": 1.0, "fake": 2.0, "cheap": 1.0, "faded": 1.0, "tarnished": 1.5, "wrong": 1.0,
+    "rude": 1.5, "refund": 0.5,
+}
+
+NEGATORS = {
+    "not", "no", "never", "nothing", "nor", "neither", "hardly", "barely", "cannot",
+    "dont", "don't", "didnt", "didn't", "doesnt", "doesn't", "isnt", "isn't", "wasnt", "wasn't",
+    "arent", "aren't", "werent", "weren't", "wont", "won't", "cant", "can't", "couldnt", "couldn't",
+}
+
+INTENSIFIERS = {
+    "very": 1.5, "really": 1.5, "extremely": 2.0, "so": 1.3, "super": 1.5, "absolutely": 1.8,
+    "totally": 1.5, "highly": 1.5, "too": 1.3, "truly": 1.5, "incredibly": 1.8,
+    "slightly": 0.5, "somewhat": 0.6, "bit": 0.6, "little": 0.6, "fairly": 0.8,
+}
+
+NEGATION_SCOPE = 3  # words after a negator whose polarity is flipped
+
+TOKEN_RE = re.compile(r"[a-z]+(?:'[a-z]+)?|[.!?;,]")
+# Phone keyboards type "don’t", which must hit the same lexicon entry as "don't"
+APOSTROPHES = str.maketrans({"\u2019": "'", "\u2018": "'"})
+CLAUSE_BREAKS = {".", "!", "?", ";", ",", "but"}
+
+# Compiled lexicon: a single dict lookup per token tells us what the word does
+_POLARITY, _NEGATOR, _SCALER, _BREAK = 0, 1, 2, 3
+LEXICON: Dict[Text, Tuple[int, float]] = {}
+LEXICON.update({word: (_POLARITY, weight) for word, weight in POSITIVE_WORDS.items()})
+LEXICON.update({word: (_POLARITY, -weight) for word, weight in NEGATIVE_WORDS.items()})
+LEXICON.update({word: (_SCALER, factor) for word, factor in INTENSIFIERS.items()})
+LEXICON.update({word: (_NEGATOR, -1.0) for word in NEGATORS})
+LEXICON.update({token: (_BREAK, 0.0) for token in CLAUSE_BREAKS})
+
+
+def score_text(text: Optional[Text]) -> float:
+    """Sentiment score of a text: > 0 positive, < 0 negative, 0 neutral"""
+    score = 0.0
+    negate_left = 0
+    scale = 1.0
+    for token in TOKEN_RE.findall((text or "").lower().translate(APOSTROPHES)):
+        entry = LEXICON.get(token)
+        if entry is None:
+            if negate_left:
+                negate_left -= 1
+            continue
+        kind, value = entry
+        if kind == _POLARITY:
+            weight = value * scale
+            if negate_left:
+                # "not good" is mildly negative, "not bad" mildly positive
+                weight = -weight * 0.75
+                negate_left = 0
+            score += weight
+            scale = 1.0
+        elif kind == _NEGATOR:
+            negate_left = NEGATION_SCOPE
+        elif kind == _SCALER:
+            scale *= value
+        else:
+            negate_left = 0
+            scale = 1.0
+    return score
+
+
+def label_for(score: float) -> Text:
+    if score > 0:
+        return "positive"
+    if score < 0:
+        return "negative"
+    return "neutral"
+
+
+def classify(text: Optional[Text]) -> Text:
+    """Classify a review as positive, negative or neutral"""
+    return label_for(score_text(text))
+
+
+def _score_chunk(texts: List[Text]) -> List[Tuple[float, Text]]:
+    results = []
+    for text in texts:
+        score = score_text(text)
+        results.append((score, label_for(score)))
+    return results
+
+
+def _chunks(rows: Iterable[Dict], column: Text, size: int) -> Iterator[Tuple[List[Dict], List[Text]]]:
+    rows_chunk, texts = [], []
+    for row in rows:
+        rows_chunk.append(row)
+        texts.append(row.get(column) or "")
+        if len(rows_chunk) >= size:
+            yield rows_chunk, texts
+            rows_chunk, texts = [], []
+    if rows_chunk:
+        yield rows_chunk, texts
+
+
+def score_file(in_path: Text, out_path: Text, column: Text = "review_text",
+               processes: Optional[int] = None, chunk_size: int = 10000,
+               report_every: float = 5.0) -> Dict[Text, float]:
+    """Score every row of a CSV review export, writing sentiment_score and sentiment columns.
+
+    Rows are streamed in chunks and scored by a process pool, so memory use
+    stays flat regardless of the export size. Output keeps the input order.
+    """
+    processes = processes or multiprocessing.cpu_count()
+    rows = 0
+    start = last_report = time.perf_counter()
+    with open(in_path, newline="", encoding="utf-8") as fin, \
+            open(out_path, "w", newline="", encoding="utf-8") as fout:
+        reader = csv.DictReader(fin)
+        if column not in (reader.fieldnames or []):
+            raise ValueError(f"Column '{column}' not found in {in_path}")
+        writer = csv.DictWriter(fout, fieldnames=list(reader.fieldnames) + ["sentiment_score", "sentiment"])
+        writer.writeheader()
+
+        # Keep a bounded number of chunks in flight so memory stays flat; results
+        # are collected in submission order so the output keeps the input order
+        in_flight = collections.deque()
+        max_in_flight = processes * 2
+
+        def write_oldest():
+            nonlocal rows, last_report
+            rows_chunk, result = in_flight.popleft()
+            for row, (score, label) in zip(rows_chunk, result.get()):
+                row["sentiment_score"] = f"{score:.3f}"
+                row["sentiment"] = label
+            writer.writerows(rows_chunk)
+            rows += len(rows_chunk)
+            now = time.perf_counter()
+            if now - last_report >= report_every:
+                print(f"{rows:,} reviews scored, {rows / (now - start):,.0f} reviews/s")
+                last_report = now
+
+        with multiprocessing.Pool(processes) as pool:
+            for rows_chunk, texts in _chunks(reader, column, chunk_size):
+                in_flight.append((rows_chunk, pool.apply_async(_score_chunk, (texts,))))
+                if len(in_flight) >= max_in_flight:
+                    write_oldest()
+            while in_flight:
+                write_oldest()
+
+    elapsed = time.perf_counter() - start
+    return {"rows": rows, "seconds": elapsed, "rows_per_second": rows / elapsed if elapsed else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="CSV review export")
+    parser.add_argument("output", help="CSV to write with sentiment columns added")
+    parser.add_argument("--column", default="review_text", help="column holding the review text")
+    parser.add_argument("--processes", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="reviews per task")
+    args = parser.parse_args()
+
+    stats = score_file(args.input, args.output, args.column, args.processes, args.chunk_size)
+    print(f"Scored {stats['rows']:,} reviews in {stats['seconds']:.2f}s "
+          f"({stats['rows_per_second']:,.0f} reviews/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Warm-up and readiness for the action server.
+
+Without a warm-up the first shopper after a deploy pays for importing
+pandas, parsing and indexing the catalog, opening the SQLite stores and
+mapping the styling index. The warm-up does all of that before the server
+reports ready, and times each step.
+
+ACTION_WARMUP selects when it runs:
+
+- "sync" (default): during the import, before ``rasa run actions`` starts
+  listening, so port 5055 takes no traffic until the process is warm
+- "background": in a thread started when the actions are imported, so the
+  server listens at once while /ready answers 503 until the warm-up is
+  done. Only use it where traffic is gated on that probe, e.g.
+  readinessProbe: {httpGet: {path: /ready, port: 9105}} in Kubernetes
+- "off": not at all, everything loads on first use
+
+Readiness and startup timings are served next to the metrics:
+
+    curl http://127.0.0.1:9105/ready      # 200 once warm, 503 before
+    curl http://127.0.0.1:9105/startup    # step timings, time to first response
+
+The pre-fork launcher warms the catalog and indexes once in the parent and
+the per-process steps (SQLite connections) in each worker before it
+accepts requests; its workers also answer /ready on the action port.
+"""
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Text, Tuple
+
+WARMUP_MODE = os.environ.get("ACTION_WARMUP", "sync").lower()
+
+logger = logging.getLogger(__name__)
+
+_clock_started = time.monotonic()
+
+
+def process_age() -> float:
+    """Seconds since this process started (since this module was imported, where /proc is unavailable)"""
+    try:
+        with open("/proc/self/stat") as f:
+            # The command name may contain spaces; the fields after it are fixed
+            fields = f.read().rsplit(")", 1)[1].split()
+        started = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - started)
+    except (OSError, ValueError, IndexError):
+        return time.monotonic() - _clock_started
+
+
+def _warm_catalog():
+    from .catalog import get_catalog  # imports pandas
+    get_catalog()
+
+
+def _warm_styling_index():
+    from .styling_retriever import STYLING_MODE, get_styling_retriever
+    retriever = get_styling_retriever()
+    if retriever is not None:
+        retriever.search("how to style a necklace")
+    if STYLING_MODE != "local":
+        importlib.import_module("aiohttp")  # the styling client's first request shouldn't pay for it
+
+
+def _warm_sentiment():
+    from .sentiment import score_text
+    score_text("loved it, not bad at all")
+
+
+def _warm_stores():
+    from .order_store import get_order_store
+    from .review_store import get_review_store
+    get_order_store().order_exists("ORD-WARMUP")
+    get_review_store().get_aggregates([])
+
+
+class Startup:
+    """Warm-up steps, their timings and the readiness flag of this process"""
+
+    def __init__(self):
+        # (name, function, critical, per_process); per-process steps open things that must not cross a fork
+        self.steps: List[Tuple[Text, Callable, bool, bool]] = [
+            ("catalog", _warm_catalog, True, False),
+            ("styling_index", _warm_styling_index, False, False),
+            ("sentiment", _warm_sentiment, False, False),
+            ("stores", _warm_stores, False, True),
+        ]
+        self.ready = False
+        self.timings: Dict[Text, float] = {}
+        self.errors: Dict[Text, Text] = {}
+        self.imported_at: Optional[float] = None
+        self.ready_at: Optional[float] = None
+        self.first_response_at: Optional[float] = None
+        self.auto = True  # warm up when the actions are imported; the pre-fork launcher drives it itself
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_step(self, name: Text, func: Callable, critical: bool = False, per_process: bool = False):
+        self.steps.append((name, func, critical, per_process))
+
+    def run(self, shared: bool = True, per_process: bool = True) -> bool:
+        """Run the warm-up steps (all, or only the shared or per-process ones); True if nothing critical failed"""
+        from .instrumentation import current_action
+        ok = True
+        token = current_action.set("warm_up")  # catalog lookups made while warming are counted apart
+        with self._lock:
+            for name, func, critical, is_per_process in self.steps:
+                if (is_per_process and not per_process) or (not is_per_process and not shared):
+                    continue
+                start = time.perf_counter()
+                try:
+                    func()
+                except Exception as e:
+                    self.errors[name] = str(e)
+                    logger.log(logging.ERROR if critical else logging.WARNING, "Warm-up step %s failed: %s", name, e)
+                    ok = ok and not critical
+                self.timings[name] = time.perf_counter() - start
+        current_action.reset(token)
+        return ok
+
+    def warm_up(self) -> bool:
+        """Run every step, then report ready (unless a critical step failed)"""
+        ok = self.run()
+        if ok:
+            self.mark_ready()
+        return ok
+
+    def mark_ready(self):
+        self.ready = True
+        self.ready_at = process_age()
+        logger.info("Ready after %.2fs (%s)", self.ready_at,
+                    ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.timings.items()))
+
+    def after_fork(self):
+        """Forget the per-process state inherited from the parent"""
+        self._lock = threading.Lock()
+        self._thread = None
+        self.ready = False
+        self.ready_at = None
+        self.first_response_at = None
+
+    def imported(self):
+        """Called once the actions are imported: record the time and start the warm-up"""
+        self.imported_at = process_age()
+        if not self.auto:
+            return
+        from .instrumentation import start_metrics_server
+        start_metrics_server()
+        if WARMUP_MODE == "off":
+            self.mark_ready()
+        elif WARMUP_MODE == "sync":
+            self.warm_up()
+        else:
+            self._thread = threading.Thread(target=self.warm_up, name="warm-up", daemon=True)
+            self._thread.start()
+
+    def response_sent(self):
+        # Called after every action run; only the first one is recorded
+        if self.first_response_at is None:
+            self.first_response_at = process_age()
+
+    def status(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "pid": os.getpid(),
+            "warm_up": WARMUP_MODE,
+            "imported_at_s": _rounded(self.imported_at),
+            "ready_at_s": _rounded(self.ready_at),
+            "first_response_at_s": _rounded(self.first_response_at),
+            "steps_s": {name: round(seconds, 4) for name, seconds in self.timings.items()},
+            "errors": self.errors,
+        }
+
+
+def _rounded(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 4)
+
+
+startup = Startup()
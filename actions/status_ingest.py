@@ -0,0 +1,170 @@
+"""Bulk ingest of courier and warehouse status exports into the order store.
+
+Streams CSV or JSONL files row by row, so files larger than memory are fine,
+and applies them in batched transactions. Every order touched by a batch gets
+its cached tracking timeline re-rendered.
+
+Each row needs an order ID, a status and a timestamp (ISO 8601 or unix
+seconds). Column names are matched case-insensitively against a few
+common courier spellings, e.g. ``order_id``/``awb_ref``, ``status``/``event``
+and ``timestamp``/``event_time``.
+
+Usage:
+    python -m actions.status_ingest exports/courier_2025-03-01.csv exports/warehouse.jsonl
+"""
+import argparse
+import csv
+import datetime
+import json
+import math
+import os
+import time
+from typing import Dict, Iterator, Optional, Text, Tuple
+
+from .order_store import STATUS_INDEX, OrderStore, get_order_store
+
+ORDER_ID_COLUMNS = ("order_id", "order", "order_ref", "awb_ref", "reference")
+STATUS_COLUMNS = ("status", "event", "status_code", "event_code")
+TIME_COLUMNS = ("timestamp", "event_time", "time", "updated_at", "date")
+
+# Courier / warehouse status codes mapped to our order lifecycle
+STATUS_ALIASES = {
+    "placed": "Order Placed",
+    "order_placed": "Order Placed",
+    "paid": "Payment Confirmed",
+    "payment_confirmed": "Payment Confirmed",
+    "processing": "Processing",
+    "picked": "Processing",
+    "packed": "Ready for Shipment",
+    "ready_for_shipment": "Ready for Shipment",
+    "manifested": "Ready for Shipment",
+    "shipped": "Shipped",
+    "dispatched": "Shipped",
+    "in_transit": "Shipped",
+    "out_for_delivery": "Out for Delivery",
+    "ofd": "Out for Delivery",
+    "delivered": "Delivered",
+}
+STATUS_ALIASES.update({status.lower().replace(" ", "_"): status for status in STATUS_INDEX})
+
+
+def normalize_status(value: Text) -> Optional[Text]:
+    """Map a courier status string to one of our lifecycle steps"""
+    key = value.strip().lower().replace(" ", "_").replace("-", "_")
+    return STATUS_ALIASES.get(key)
+
+
+def parse_timestamp(value) -> float:
+    """Parse unix seconds or an ISO 8601 timestamp, raising ValueError for anything else (nan and inf too)"""
+    if isinstance(value, (int, float)):
+        timestamp = float(value)
+    else:
+        value = str(value).strip()
+        try:
+            timestamp = float(value)
+        except ValueError:
+            return datetime.datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    if not math.isfinite(timestamp):
+        raise ValueError(f"Not a timestamp: {value!r}")
+    return timestamp
+
+
+def _pick(record: Dict, candidates: Tuple[Text, ...]):
+    for key in candidates:
+        if key in record and record[key] not in (None, ""):
+            return record[key]
+    return None
+
+
+def iter_records(path: Text, stats: Optional[Dict[Text, int]] = None) -> Iterator[Dict]:
+    """Stream raw records from a CSV or JSONL file with lowercased keys, counting JSONL lines that don't parse"""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".ndjson", ".json")):
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                if not isinstance(record, dict):
+                    if stats is not None:
+                        stats["malformed"] += 1
+                    continue
+                yield {key.lower(): value for key, value in record.items()}
+        else:
+            for record in csv.DictReader(f):
+                yield {(key or "").strip().lower(): value for key, value in record.items()}
+
+
+def iter_status_rows(path: Text, stats: Dict[Text, int]) -> Iterator[Tuple[Text, Text, float]]:
+    """Yield (order_id, status, event_time) rows, counting rows that cannot be parsed"""
+    for record in iter_records(path, stats):
+        order_id = _pick(record, ORDER_ID_COLUMNS)
+        raw_status = _pick(record, STATUS_COLUMNS)
+        raw_time = _pick(record, TIME_COLUMNS)
+        status = normalize_status(str(raw_status)) if raw_status is not None else None
+        if not order_id or not status or raw_time is None:
+            stats["invalid"] += 1
+            continue
+        try:
+            event_time = parse_timestamp(raw_time)
+        except ValueError:
+            stats["invalid"] += 1
+            continue
+        yield str(order_id).strip().upper(), status, event_time
+
+
+def ingest_file(path: Text, store: Optional[OrderStore] = None, batch_size: int = 5000,
+                report_every: float = 5.0) -> Dict[Text, float]:
+    """Ingest one export file and return counters including rows per second"""
+    store = store or get_order_store()
+    stats = {"rows": 0, "applied": 0, "unknown_orders": 0, "invalid": 0, "malformed": 0}
+    start = last_report = time.perf_counter()
+    batch = []
+
+    def flush():
+        applied, unknown = store.apply_status_batch(batch)
+        stats["applied"] += applied
+        stats["unknown_orders"] += unknown
+        batch.clear()
+
+    for row in iter_status_rows(path, stats):
+        batch.append(row)
+        stats["rows"] += 1
+        if len(batch) >= batch_size:
+            flush()
+            now = time.perf_counter()
+            if now - last_report >= report_every:
+                print(f"{os.path.basename(path)}: {stats['rows']:,} rows, "
+                      f"{stats['rows'] / (now - start):,.0f} rows/s")
+                last_report = now
+    if batch:
+        flush()
+
+    stats["seconds"] = time.perf_counter() - start
+    stats["rows_per_second"] = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="CSV or JSONL status export files")
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows per transaction")
+    parser.add_argument("--db", help="order store path (defaults to the action server's store)")
+    args = parser.parse_args()
+
+    store = OrderStore(args.db) if args.db else get_order_store()
+    for path in args.paths:
+        stats = ingest_file(path, store, batch_size=args.batch_size)
+        print(
+            f"{path}: {stats['rows']:,} rows in {stats['seconds']:.2f}s "
+            f"({stats['rows_per_second']:,.0f} rows/s), applied={stats['applied']:,} "
+            f"unknown_orders={stats['unknown_orders']:,} invalid={stats['invalid']:,} "
+            f"malformed={stats['malformed']:,}"
+        )
+
+
+if __name__ == "__main__":
+    main()
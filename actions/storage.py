@@ -0,0 +1,26 @@
+import os
+import sqlite3
+from typing import Text
+
+# Directory for the bot's local databases and logs (orders, issues, reviews...)
+DATA_DIR = os.environ.get(
+    "DIYA_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "local_data")
+)
+
+
+def data_path(filename: Text) -> Text:
+    """Return the path of a file inside the local data directory, creating the directory if needed"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, filename)
+
+
+def connect_sqlite(db_path: Text) -> sqlite3.Connection:
+    """Open a SQLite connection tuned for many small reads and writes from several workers"""
+    conn = sqlite3.connect(db_path, timeout=10, isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    # WAL lets readers run while another worker is writing
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=10000")
+    return conn
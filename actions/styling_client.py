@@ -0,0 +1,295 @@
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Optional, Text
+
+import aiohttp
+
+from .answer_cache import AnswerCache, normalize_question
+from .circuit_breaker import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+# Update this URL with your actual ngrok URL from Google Colab (or set CHATBOT_API_URL)
+CHATBOT_API_URL = os.environ.get("CHATBOT_API_URL", "https://5884-34-16-172-151.ngrok-free.app").rstrip("/")
+
+# Outbound call limits, so a slow styling backend cannot tie up the action server
+MAX_CONCURRENT_CALLS = int(os.environ.get("STYLING_MAX_CONCURRENCY", "8"))
+MAX_QUEUED_CALLS = int(os.environ.get("STYLING_MAX_QUEUE", "32"))
+QUEUE_TIMEOUT = float(os.environ.get("STYLING_QUEUE_TIMEOUT", "2"))
+CONNECT_TIMEOUT = float(os.environ.get("STYLING_CONNECT_TIMEOUT", "3"))
+QUERY_READ_TIMEOUT = float(os.environ.get("STYLING_READ_TIMEOUT", "60"))
+# Health probes don't queue behind queries: their own connection slot and a short total timeout
+HEALTH_TIMEOUT = float(os.environ.get("STYLING_HEALTH_TIMEOUT", "2"))
+# Answers to repeated questions are served from memory
+CACHE_TTL = float(os.environ.get("STYLING_CACHE_TTL", "3600"))
+CACHE_MAX_ENTRIES = int(os.environ.get("STYLING_CACHE_SIZE", "1024"))
+# Stop calling /query after this many consecutive failures, retry after the reset timeout
+BREAKER_FAILURES = int(os.environ.get("STYLING_BREAKER_FAILURES", "5"))
+BREAKER_RESET_TIMEOUT = float(os.environ.get("STYLING_BREAKER_RESET", "30"))
+# Questions arriving within this window are sent together to /query_batch (0 disables batching)
+BATCH_WINDOW_MS = float(os.environ.get("STYLING_BATCH_WINDOW_MS", "5"))
+BATCH_MAX_SIZE = int(os.environ.get("STYLING_BATCH_MAX", "16"))
+
+
+class StylingServiceUnavailable(Exception):
+    """The styling service could not be reached or answered with an error"""
+
+    def __init__(self, message: Text, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status  # HTTP status for error responses, None if unreachable
+
+
+class StylingServiceBusy(StylingServiceUnavailable):
+    """Too many styling calls are already waiting, fail fast instead of queueing"""
+
+
+class StylingCircuitOpen(StylingServiceUnavailable):
+    """The styling service is known to be down, the call was not attempted"""
+
+
+class QueryBatcher:
+    """Collects questions for a few milliseconds and sends them as one /query_batch call.
+
+    The batch endpoint takes {"questions": [...]} and returns {"answers": [...]}
+    in the same order. If the service doesn't have it (404/405) the batcher
+    switches itself off and questions go to /query one at a time again.
+    The circuit breaker counts each upstream call once, however many
+    questions it carried.
+    """
+
+    def __init__(self, client: "StylingClient", window_ms: float = BATCH_WINDOW_MS,
+                 max_size: int = BATCH_MAX_SIZE):
+        self.client = client
+        self.window = window_ms / 1000.0
+        self.max_size = max_size
+        self.supported = True
+        self._pending = []
+        self._flush_handle = None
+        self._tasks = set()
+        self.stats = {"batches": 0, "batched_questions": 0, "single_questions": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.supported and self.window > 0 and self.max_size > 1
+
+    def reset(self):
+        """Drop pending state that belongs to a previous event loop"""
+        self._pending = []
+        self._flush_handle = None
+        self._tasks = set()
+
+    async def submit(self, question: Text) -> Dict[Text, Any]:
+        if not self.enabled:
+            self.stats["single_questions"] += 1
+            return await self._call("/query", {"question": question})
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((question, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch):
+        batch = [(question, future) for question, future in batch if not future.done()]
+        if not batch:
+            return
+        try:
+            if len(batch) == 1:
+                self.stats["single_questions"] += 1
+                results = [await self._call("/query", {"question": batch[0][0]})]
+            else:
+                results = await self._call("/query_batch", {"questions": [question for question, _ in batch]})
+                self.stats["batches"] += 1
+                self.stats["batched_questions"] += len(batch)
+        except StylingServiceUnavailable as e:
+            if len(batch) > 1 and e.status in (404, 405):
+                logger.info("Styling service has no /query_batch endpoint, sending questions one at a time")
+                self.supported = False
+                await asyncio.gather(*(self._send([item]) for item in batch))
+                return
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result if isinstance(result, dict) else {"answer": result})
+
+    async def _call(self, path: Text, payload: Dict[Text, Any]):
+        """One upstream call, its outcome recorded once in the circuit breaker"""
+        breaker = self.client.breaker
+        try:
+            data = await self.client._request("POST", path, payload)
+            if path == "/query_batch":
+                data = data.get("answers") if isinstance(data, dict) else None
+                if not isinstance(data, list) or len(data) != len(payload["questions"]):
+                    raise StylingServiceUnavailable("Malformed /query_batch response")
+            elif not isinstance(data, dict):
+                raise StylingServiceUnavailable(f"Malformed {path} response")
+        except StylingServiceBusy:
+            raise  # our own queue is full, says nothing about the service
+        except StylingServiceUnavailable as e:
+            if not (path == "/query_batch" and e.status in (404, 405)):
+                breaker.record_failure()
+            raise
+        breaker.record_success()
+        return data
+
+
+class StylingClient:
+    """Shared async client for the styling-advice service.
+
+    One pooled aiohttp session (keep-alive connections) is shared by all
+    conversations. At most MAX_CONCURRENT_CALLS requests are in flight; up to
+    MAX_QUEUED_CALLS more may wait QUEUE_TIMEOUT seconds for a slot, anything
+    beyond that fails immediately with StylingServiceBusy. Health probes
+    bypass that limit: they have a connection slot of their own, and
+    concurrent probes share one request.
+
+    Answers are cached by normalised question text, and identical questions
+    asked while one is already in flight share that single upstream call.
+    Calls to /query go through a circuit breaker, so while the service is
+    down questions fail immediately with StylingCircuitOpen. Questions that
+    reach the service within a few milliseconds of each other are batched.
+    """
+
+    def __init__(self, base_url: Text = CHATBOT_API_URL,
+                 max_concurrency: int = MAX_CONCURRENT_CALLS,
+                 max_queue: int = MAX_QUEUED_CALLS,
+                 queue_timeout: float = QUEUE_TIMEOUT,
+                 connect_timeout: float = CONNECT_TIMEOUT,
+                 read_timeout: float = QUERY_READ_TIMEOUT,
+                 cache: Optional[AnswerCache] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 batch_window_ms: float = BATCH_WINDOW_MS,
+                 batch_max_size: int = BATCH_MAX_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._session = None
+        self._semaphore = None
+        self._health_task = None
+        self._loop = None
+        self._waiting = 0
+        self.cache = cache if cache is not None else AnswerCache(CACHE_TTL, CACHE_MAX_ENTRIES)
+        self.breaker = breaker if breaker is not None else CircuitBreaker(BREAKER_FAILURES, BREAKER_RESET_TIMEOUT)
+        self.batcher = QueryBatcher(self, batch_window_ms, batch_max_size)
+        self.stats = {"requests": 0, "errors": 0, "rejected": 0}
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        # Sessions and semaphores are bound to the event loop they were created on
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            # One connection more than the query limit, kept free for health probes
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency + 1, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=None, connect=self.connect_timeout,
+                                              sock_read=self.read_timeout)
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._health_task = None
+            self._loop = loop
+            self._waiting = 0
+            self.cache.reset_in_flight()
+            self.batcher.reset()
+        return self._session
+
+    async def _request(self, method: Text, path: Text, payload: Optional[Dict] = None) -> Dict[Text, Any]:
+        session = self._ensure_session()
+        if self._semaphore.locked() and self._waiting >= self.max_queue:
+            self.stats["rejected"] += 1
+            raise StylingServiceBusy("Too many styling requests waiting")
+
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.stats["rejected"] += 1
+            raise StylingServiceBusy("Timed out waiting for a free styling connection")
+        finally:
+            self._waiting -= 1
+
+        try:
+            return await self._send(session, method, path, payload)
+        finally:
+            self._semaphore.release()
+
+    async def _send(self, session: aiohttp.ClientSession, method: Text, path: Text,
+                    payload: Optional[Dict] = None, timeout: Optional[aiohttp.ClientTimeout] = None) -> Dict[Text, Any]:
+        self.stats["requests"] += 1
+        try:
+            async with session.request(method, f"{self.base_url}{path}", json=payload, timeout=timeout) as response:
+                if response.status != 200:
+                    body = await response.text()
+                    raise StylingServiceUnavailable(f"{response.status} - {body[:200]}", response.status)
+                return await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            self.stats["errors"] += 1
+            raise StylingServiceUnavailable(f"{type(e).__name__}: {e}") from e
+        except StylingServiceUnavailable:
+            self.stats["errors"] += 1
+            raise
+
+    async def query(self, question: Text) -> Dict[Text, Any]:
+        """Ask the styling service a question, returns its JSON answer"""
+        self._ensure_session()
+        key = normalize_question(question)
+        if not key:
+            return await self._query_upstream(question)
+        return await self.cache.get_or_fetch(key, lambda: self._query_upstream(question))
+
+    async def _query_upstream(self, question: Text) -> Dict[Text, Any]:
+        if not self.breaker.allow_request():
+            raise StylingCircuitOpen("Styling service is unavailable, circuit open")
+        # The batcher records the outcome of the upstream call in the breaker
+        return await self.batcher.submit(question)
+
+    def will_fail_fast(self, question: Text) -> bool:
+        """True if asking now would be refused by the open breaker (no cached answer either)"""
+        return self.breaker.is_open and self.cache.get(normalize_question(question)) is None
+
+    async def health(self) -> Dict[Text, Any]:
+        """Fetch the service health, e.g. {"ready": true}, without waiting behind queued queries"""
+        session = self._ensure_session()
+        if self._health_task is None or self._health_task.done():
+            timeout = aiohttp.ClientTimeout(total=HEALTH_TIMEOUT)
+            self._health_task = asyncio.ensure_future(self._send(session, "GET", "/health", timeout=timeout))
+        # shield: a caller giving up doesn't cancel the probe the other callers are waiting on
+        return await asyncio.shield(self._health_task)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+_client = None
+
+
+def get_styling_client() -> StylingClient:
+    """Return the process wide styling client"""
+    global _client
+    if _client is None:
+        _client = StylingClient()
+    return _client
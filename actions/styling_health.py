@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Optional, Text
+
+from .styling_client import StylingClient, StylingServiceBusy, StylingServiceUnavailable, get_styling_client
+
+logger = logging.getLogger(__name__)
+
+PROBE_INTERVAL = float(os.environ.get("STYLING_PROBE_INTERVAL", "15"))
+# Probe more often while the service is down or still loading, so recovery is noticed quickly
+PROBE_INTERVAL_NOT_READY = float(os.environ.get("STYLING_PROBE_INTERVAL_NOT_READY", "5"))
+# How long the very first styling request may wait for the first probe result
+FIRST_PROBE_WAIT = float(os.environ.get("STYLING_FIRST_PROBE_WAIT", "1"))
+
+
+class HealthProber:
+    """Polls the styling service's /health in the background and caches the result.
+
+    Actions read ``state`` instead of calling /health inside the user's turn.
+    Probe results also feed the client's circuit breaker: an unreachable
+    service (or a probe that timed out) counts as one failure, a healthy one
+    lets the next query through as a trial once the open period is over.
+    """
+
+    def __init__(self, client: StylingClient):
+        self.client = client
+        self.state: Dict[Text, Any] = {
+            "ready": False,
+            "reachable": False,
+            "status": None,
+            "error": None,
+            "checked_at": None,
+        }
+        self._task: Optional[asyncio.Task] = None
+        self._first_probe: Optional[asyncio.Event] = None
+
+    def ensure_started(self):
+        """Start the probe loop on the running event loop if it isn't running there yet"""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._task.get_loop() is loop:
+            return
+        self._first_probe = asyncio.Event()
+        if self.state["checked_at"] is not None:
+            self._first_probe.set()
+        self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await self.probe()
+            await asyncio.sleep(PROBE_INTERVAL if self.state["ready"] else PROBE_INTERVAL_NOT_READY)
+
+    async def probe(self):
+        """Run one health check now and update the cached state"""
+        try:
+            health_data = await self.client.health()
+        except StylingServiceBusy:
+            return  # our own client is saturated, keep the last known state
+        except StylingServiceUnavailable as e:
+            self.state.update(ready=False, reachable=e.status is not None, status=e.status, error=str(e))
+            if e.status is None:
+                # One failure, not a trip: a probe can time out while the service is busy with long queries
+                self.client.breaker.record_failure()
+        except Exception as e:
+            logger.exception("Unexpected error probing styling service: %s", e)
+            self.state.update(ready=False, reachable=False, status=None, error=str(e))
+        else:
+            ready = isinstance(health_data, dict) and bool(health_data.get("ready", False))
+            self.state.update(ready=ready, reachable=True, status=200,
+                              error=None if isinstance(health_data, dict) else "Malformed /health response")
+            if ready:
+                self.client.breaker.half_open()
+        finally:
+            self.state["checked_at"] = time.time()
+            if self._first_probe is not None:
+                self._first_probe.set()
+
+    async def wait_first_probe(self, timeout: float = FIRST_PROBE_WAIT):
+        """On a cold start, give the first probe a moment to report"""
+        self.ensure_started()
+        if self.state["checked_at"] is None:
+            try:
+                await asyncio.wait_for(self._first_probe.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+_prober = None
+
+
+def get_health_prober() -> HealthProber:
+    """Return the process wide health prober for the shared styling client"""
+    global _prober
+    if _prober is None:
+        _prober = HealthProber(get_styling_client())
+    return _prober
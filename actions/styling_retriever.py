@@ -0,0 +1,277 @@
+"""Local BM25 retrieval over the bundled styling knowledge base.
+
+The knowledge base is a set of JSONL files in ``actions/styling_kb`` (one
+chunk of styling guidance per line: id, title, text). ``build`` tokenises it
+once and writes a compact index: a small JSON header (vocabulary, chunk
+texts) plus two flat binary arrays holding the postings, doc IDs and
+precomputed BM25 term weights. At query time the binary arrays are
+memory-mapped, so loading is instant, several worker processes share the
+same pages, and a query is a handful of dictionary lookups and additions.
+
+Rebuilding never touches files a running server has mapped: every build
+writes its arrays under new names (temp file, then os.replace), switches
+the header last, and only then removes arrays no header names. Readers map
+the arrays the header names and check their sizes against it.
+
+Build the index ahead of time (the Dockerfile does this):
+
+    python -m actions.styling_retriever build
+    python -m actions.styling_retriever query "what earrings go with a saree"
+"""
+import argparse
+import array
+import heapq
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Text, Tuple
+
+logger = logging.getLogger(__name__)
+
+ACTIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+KB_DIR = os.environ.get("STYLING_KB_DIR") or os.path.join(ACTIONS_DIR, "styling_kb")
+INDEX_DIR = os.environ.get("STYLING_INDEX_DIR") or os.path.join(ACTIONS_DIR, "styling_index")
+INDEX_VERSION = 2
+# "remote": ask the styling service, answer from the local index when it is unavailable
+# "local": answer from the local index only, no network calls
+STYLING_MODE = os.environ.get("STYLING_MODE", "remote").lower()
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_BOOST = 2  # title words count this many times
+MIN_SCORE = 2.0  # below this the best chunk is not a real answer
+SECOND_CHUNK_RATIO = 0.7  # include the runner-up chunk if it scores this close to the best
+
+TOKEN_RE = re.compile(r"[a-z]+")
+STOP_WORDS = {
+    "a", "an", "the", "and", "or", "but", "of", "to", "in", "on", "for", "with", "at", "by",
+    "from", "is", "are", "be", "it", "its", "this", "that", "these", "those", "as", "so",
+    "i", "me", "my", "we", "you", "your", "what", "which", "how", "should", "can", "could",
+    "would", "do", "does", "did", "go", "goes", "wear", "wearing", "best", "good", "some",
+    "any", "about", "tell", "suggest", "please", "want", "need", "if", "will", "am", "look",
+    "looks", "like", "most", "more", "very", "all", "one", "also", "them", "their", "they",
+}
+# Spelling variants shoppers use for the same thing
+SYNONYMS = {
+    "jewelry": "jewellery", "jewels": "jewellery", "necklace": "neckpiece", "necklaces": "neckpiece",
+    "neckpieces": "neckpiece", "jhumka": "jhumkas", "jimikki": "jhumkas", "haar": "haaram",
+    "colour": "color", "colours": "color", "colors": "color", "cz": "american",
+}
+
+
+def tokenize(text: Optional[Text]) -> List[Text]:
+    tokens = []
+    for word in TOKEN_RE.findall((text or "").lower()):
+        if word in STOP_WORDS:
+            continue
+        word = SYNONYMS.get(word, word)
+        # Light plural folding: earrings -> earring, bangles -> bangle
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def load_chunks(kb_dir: Text = KB_DIR) -> List[Dict[Text, Text]]:
+    chunks = []
+    for filename in sorted(os.listdir(kb_dir)):
+        if not filename.endswith(".jsonl"):
+            continue
+        with open(os.path.join(kb_dir, filename), encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    chunks.append(json.loads(line))
+    return chunks
+
+
+def build_index(kb_dir: Text = KB_DIR, index_dir: Text = INDEX_DIR) -> Dict[Text, float]:
+    """Tokenise the knowledge base and write the BM25 index files"""
+    start = time.perf_counter()
+    chunks = load_chunks(kb_dir)
+    if not chunks:
+        raise ValueError(f"No styling knowledge base chunks found in {kb_dir}")
+
+    term_freqs = []
+    for chunk in chunks:
+        tokens = tokenize(chunk["text"]) + tokenize(chunk.get("title", "")) * TITLE_BOOST
+        freqs: Dict[Text, int] = {}
+        for token in tokens:
+            freqs[token] = freqs.get(token, 0) + 1
+        term_freqs.append((freqs, len(tokens)))
+
+    num_chunks = len(chunks)
+    avgdl = sum(length for _, length in term_freqs) / num_chunks
+    postings: Dict[Text, List[Tuple[int, int]]] = {}
+    for doc_id, (freqs, _) in enumerate(term_freqs):
+        for term, tf in freqs.items():
+            postings.setdefault(term, []).append((doc_id, tf))
+
+    # Precompute the full BM25 weight of every (term, chunk) pair, so a query only adds numbers up
+    doc_ids = array.array("I")
+    weights = array.array("f")
+    terms = {}
+    for term in sorted(postings):
+        entries = postings[term]
+        df = len(entries)
+        idf = math.log(1 + (num_chunks - df + 0.5) / (df + 0.5))
+        terms[term] = [len(doc_ids), df]
+        for doc_id, tf in entries:
+            length = term_freqs[doc_id][1]
+            norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avgdl)
+            doc_ids.append(doc_id)
+            weights.append(idf * tf * (BM25_K1 + 1) / norm)
+
+    os.makedirs(index_dir, exist_ok=True)
+    # New names for every build: mapped arrays of the previous build are never rewritten in place
+    build_id = f"{int(time.time() * 1000)}-{os.getpid()}"
+    files = {"doc_ids": f"doc_ids-{build_id}.bin", "weights": f"weights-{build_id}.bin"}
+    _write_atomic(os.path.join(index_dir, files["doc_ids"]), doc_ids.tofile, "wb")
+    _write_atomic(os.path.join(index_dir, files["weights"]), weights.tofile, "wb")
+    meta = {
+        "version": INDEX_VERSION,
+        "build": build_id,
+        "files": files,
+        "postings": len(doc_ids),
+        "num_chunks": num_chunks,
+        "avgdl": avgdl,
+        "terms": terms,
+        "chunks": [{"id": c["id"], "title": c.get("title", ""), "text": c["text"]} for c in chunks],
+    }
+    # Header last, so a reader never sees a header without its arrays
+    _write_atomic(os.path.join(index_dir, "meta.json"),
+                  lambda f: json.dump(meta, f, ensure_ascii=False), "w", encoding="utf-8")
+    # Unlinking keeps the pages of a mapped file alive until its readers unmap it
+    for filename in os.listdir(index_dir):
+        if filename.endswith(".bin") and filename not in files.values():
+            try:
+                os.remove(os.path.join(index_dir, filename))
+            except OSError:
+                pass
+    return {"chunks": num_chunks, "terms": len(terms), "postings": len(doc_ids),
+            "seconds": time.perf_counter() - start}
+
+
+def _write_atomic(path: Text, write, mode: Text, **kwargs):
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, mode, **kwargs) as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+class StylingRetriever:
+    """Query side of the index: memory-mapped postings, BM25 scoring, top-k chunks"""
+
+    def __init__(self, index_dir: Text = INDEX_DIR):
+        with open(os.path.join(index_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"Styling index in {index_dir} has version {meta.get('version')}, "
+                             f"expected {INDEX_VERSION}; rebuild it")
+        self.terms: Dict[Text, List[int]] = meta["terms"]
+        self.chunks: List[Dict[Text, Text]] = meta["chunks"]
+        self.build = meta["build"]
+        self._doc_ids = self._map(os.path.join(index_dir, meta["files"]["doc_ids"]), "I", meta["postings"])
+        self._weights = self._map(os.path.join(index_dir, meta["files"]["weights"]), "f", meta["postings"])
+
+    @staticmethod
+    def _map(path: Text, typecode: Text, length: int) -> memoryview:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size != length * array.array(typecode).itemsize:
+                raise ValueError(f"Styling index file {path} has {size} bytes, its header expects "
+                                 f"{length} entries; rebuild the index")
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(mapped).cast(typecode)
+
+    def search(self, question: Text, k: int = 3) -> List[Tuple[float, Dict[Text, Text]]]:
+        """Top k (score, chunk) pairs for a question, best first"""
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(question)):
+            entry = self.terms.get(term)
+            if entry is None:
+                continue
+            start, count = entry
+            doc_ids = self._doc_ids[start:start + count]
+            weights = self._weights[start:start + count]
+            for doc_id, weight in zip(doc_ids, weights):
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(score, self.chunks[doc_id]) for doc_id, score in best]
+
+    def answer(self, question: Text) -> Optional[Text]:
+        """Styling advice for a question from the best matching chunks, or None if nothing fits"""
+        results = self.search(question, k=2)
+        if not results or results[0][0] < MIN_SCORE:
+            return None
+        best_score, best = results[0]
+        answer = best["text"]
+        if len(results) > 1 and results[1][0] >= best_score * SECOND_CHUNK_RATIO:
+            answer += "\n\n" + results[1][1]["text"]
+        return answer
+
+
+_retriever = None
+_retriever_lock = threading.Lock()
+
+
+def get_styling_retriever() -> Optional[StylingRetriever]:
+    """Return the process wide retriever, building the index on first use if it is missing.
+
+    Returns None if there is no knowledge base to serve from.
+    """
+    global _retriever
+    if _retriever is None:
+        with _retriever_lock:
+            if _retriever is None:
+                try:
+                    if not os.path.exists(os.path.join(INDEX_DIR, "meta.json")):
+                        logger.info("Styling index not found in %s, building it now", INDEX_DIR)
+                        build_index()
+                    try:
+                        _retriever = StylingRetriever()
+                    except (KeyError, ValueError, FileNotFoundError) as e:
+                        # e.g. an older index format, or meta.json without its .bin arrays
+                        logger.info("Styling index in %s is unusable (%s), rebuilding it", INDEX_DIR, e)
+                        build_index()
+                        _retriever = StylingRetriever()
+                except (OSError, ValueError) as e:
+                    logger.warning("Local styling knowledge base unavailable: %s", e)
+                    return None
+    return _retriever
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="build the index from the knowledge base")
+    build.add_argument("--kb-dir", default=KB_DIR)
+    build.add_argument("--index-dir", default=INDEX_DIR)
+    query = subparsers.add_parser("query", help="answer a question from the index")
+    query.add_argument("question")
+    query.add_argument("--index-dir", default=INDEX_DIR)
+    query.add_argument("-k", type=int, default=3, help="chunks to list")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        stats = build_index(args.kb_dir, args.index_dir)
+        print(f"Indexed {stats['chunks']} chunks, {stats['terms']} terms, "
+              f"{stats['postings']} postings in {stats['seconds'] * 1000:.1f}ms -> {args.index_dir}")
+    else:
+        retriever = StylingRetriever(args.index_dir)
+        start = time.perf_counter()
+        results = retriever.search(args.question, args.k)
+        elapsed = time.perf_counter() - start
+        for score, chunk in results:
+            print(f"{score:6.2f}  {chunk['id']}: {chunk['title']}")
+        print(f"({elapsed * 1000:.3f}ms)")
+        print()
+        print(retriever.answer(args.question) or "No confident answer.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""Shopping funnel and merchandising numbers from the exported conversation events.
+
+Reads the JSONL files written by event_broker.BatchedFileEventBroker and
+keeps, per category and view type (bestseller / discount / regular):
+
+- the funnel: conversations that viewed products, added one to the cart,
+  and checked out with it
+- page depth: how many of those conversations reached page 1, 2, 3... via
+  action_show_more
+- per-SKU add-to-cart counts
+
+The job is incremental. A checkpoint file keeps the byte offset reached in
+every event file, the aggregates so far and a small per-conversation state
+(current category, view, cart, funnel steps reached), so each run only
+reads the events appended since the previous one. Conversations idle for
+more than ``--idle-days`` are dropped from the state (their counts stay).
+The checkpoint is replaced atomically after each run; an interrupted run
+starts again from the previous one.
+
+Usage:
+    python -m analytics.funnel                        # process new events, write the tables
+    python -m analytics.funnel --top 20               # also print the 20 most added SKUs
+    python -m analytics.funnel --rebuild              # start over from the first event
+"""
+import argparse
+import collections
+import csv
+import glob
+import json
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional, Text, Tuple
+
+from actions.storage import data_path
+
+EVENTS_DIR = os.environ.get("DIYA_EVENTS_DIR") or data_path("events")
+ANALYTICS_DIR = os.environ.get("DIYA_ANALYTICS_DIR") or data_path("analytics")
+
+CHECKPOINT_VERSION = 1
+VIEW_ACTIONS = {
+    "action_show_bestsellers", "action_show_discounted", "action_show_regular",
+    "action_show_more", "action_continue_shopping",
+}
+TRACKED_SLOTS = {"main_category", "sub_category", "view_type", "current_page", "shopping_cart", "order_id"}
+# Only these events matter; everything else (user and bot messages, most of the data) is skipped unparsed
+WANTED = (b'"event": "action"', b'"event": "slot"', b'"event": "restart"')
+FUNNEL_STEPS = ("viewed", "added", "checked_out")
+
+
+def _key(main: Optional[Text], sub: Optional[Text], view: Optional[Text]) -> Text:
+    return "\t".join((main or "?", sub or "?", view or "regular"))
+
+
+def _cart_quantities(value: Any) -> Dict[Text, Tuple[int, Text]]:
+    """shopping_cart slot (a JSON string, see JewelryAction.set_cart) -> {sku: (quantity, name)}"""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return {}
+    cart = {}
+    for item in value or []:
+        if isinstance(item, dict):
+            sku = str(item.get("sku") or item.get("product_id") or "?")
+            cart[sku] = (int(item.get("quantity") or 1), item.get("product_name") or "")
+    return cart
+
+
+class FunnelState:
+    """Aggregates, per-conversation state and file offsets, saved as one checkpoint"""
+
+    def __init__(self, data: Optional[Dict[Text, Any]] = None):
+        data = data or {}
+        self.offsets: Dict[Text, int] = data.get("offsets", {})
+        self.conversations: Dict[Text, Dict[Text, Any]] = data.get("conversations", {})
+        self.funnel: Dict[Text, List[int]] = collections.defaultdict(lambda: [0, 0, 0], data.get("funnel", {}))
+        self.depth: Dict[Text, List[int]] = collections.defaultdict(list, data.get("depth", {}))
+        self.sku_adds: Dict[Text, List[Any]] = data.get("sku_adds", {})
+        self.events = data.get("events", 0)
+        self.last_event_time = data.get("last_event_time", 0.0)
+
+    @classmethod
+    def load(cls, path: Text) -> "FunnelState":
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CHECKPOINT_VERSION:
+            raise SystemExit(f"{path} was written by another version of this job, run with --rebuild")
+        return cls(data)
+
+    def save(self, path: Text):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": CHECKPOINT_VERSION, "offsets": self.offsets, "conversations": self.conversations,
+                "funnel": self.funnel, "depth": self.depth, "sku_adds": self.sku_adds,
+                "events": self.events, "last_event_time": self.last_event_time,
+            }, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    # Applying events
+
+    def apply(self, event: Dict[Text, Any]):
+        sender = event.get("sender_id") or "?"
+        conv = self.conversations.get(sender)
+        if conv is None:
+            conv = self.conversations[sender] = {"slots": {}, "action": None, "reached": {}, "pending": []}
+        conv["seen"] = event.get("timestamp") or 0.0
+        self.last_event_time = max(self.last_event_time, conv["seen"])
+        kind = event.get("event")
+
+        if kind == "action":
+            self._finish_action(conv)
+            conv["action"] = event.get("name")
+        elif kind == "slot":
+            name = event.get("name")
+            if name not in TRACKED_SLOTS:
+                return
+            value = event.get("value")
+            if name == "shopping_cart":
+                self._cart_changed(conv, value)
+            elif name == "order_id" and value and conv["action"] == "action_checkout":
+                self._checked_out(conv)
+            conv["slots"][name] = value
+        elif kind == "restart":
+            self._finish_action(conv)
+            self.conversations[sender] = {"slots": {}, "action": None, "reached": {}, "pending": [],
+                                          "seen": conv["seen"]}
+
+    def _finish_action(self, conv: Dict[Text, Any]):
+        # A view's slots (view_type, current_page) follow its action event, so it is counted once they are all in
+        if conv["action"] not in VIEW_ACTIONS:
+            return
+        slots = conv["slots"]
+        if not slots.get("view_type"):
+            return
+        key = _key(slots.get("main_category"), slots.get("sub_category"), slots["view_type"])
+        reached = conv["reached"].setdefault(key, [0, 0])  # [funnel steps reached, deepest page]
+        if reached[0] < 1:
+            reached[0] = 1
+            self.funnel[key][0] += 1
+        try:
+            page = int(slots.get("current_page") or 0) + 1
+        except (TypeError, ValueError):
+            page = 1
+        if page > reached[1]:
+            depth = self.depth[key]
+            depth.extend([0] * (page - len(depth)))
+            for p in range(reached[1], page):
+                depth[p] += 1
+            reached[1] = page
+
+    def _cart_changed(self, conv: Dict[Text, Any], value: Any):
+        if conv["action"] != "action_add_to_cart":
+            return
+        before = _cart_quantities(conv["slots"].get("shopping_cart"))
+        after = _cart_quantities(value)
+        slots = conv["slots"]
+        key = _key(slots.get("main_category"), slots.get("sub_category"), slots.get("view_type"))
+        for sku, (quantity, name) in after.items():
+            added = quantity - before.get(sku, (0, ""))[0]
+            if added <= 0:
+                continue
+            entry = self.sku_adds.setdefault(sku, [0, name, key])
+            entry[0] += added
+            reached = conv["reached"].setdefault(key, [0, 0])
+            if reached[0] < 2:
+                self.funnel[key][1] += 1
+                if reached[0] < 1:  # added without a view we saw (e.g. events before the first export)
+                    self.funnel[key][0] += 1
+                reached[0] = 2
+            if key not in conv["pending"]:
+                conv["pending"].append(key)
+
+    def _checked_out(self, conv: Dict[Text, Any]):
+        for key in conv["pending"]:
+            reached = conv["reached"].setdefault(key, [2, 0])
+            if reached[0] < 3:
+                reached[0] = 3
+                self.funnel[key][2] += 1
+        conv["pending"] = []
+
+    def forget_idle(self, idle_seconds: float) -> int:
+        cutoff = self.last_event_time - idle_seconds
+        idle = [sender for sender, conv in self.conversations.items() if conv.get("seen", 0.0) < cutoff]
+        for sender in idle:
+            del self.conversations[sender]
+        return len(idle)
+
+
+def new_events(state: FunnelState, events_dir: Text,
+               stats: Optional[Dict[Text, Any]] = None) -> Iterator[Dict[Text, Any]]:
+    """Events appended since the checkpoint, file by file, advancing the offsets as it goes.
+    Lines that don't parse (e.g. left by a failed broker write) are counted as malformed and skipped"""
+    for path in sorted(glob.glob(os.path.join(events_dir, "events-*.jsonl"))):
+        name = os.path.basename(path)
+        offset = state.offsets.get(name, 0)
+        if os.path.getsize(path) <= offset:
+            continue
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # the broker is mid-write, pick it up next run
+                offset += len(line)
+                if not any(marker in line for marker in WANTED):
+                    continue
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    event = None
+                if not isinstance(event, dict):
+                    if stats is not None:
+                        stats["malformed"] += 1
+                    continue
+                yield event
+        state.offsets[name] = offset
+
+
+def write_tables(state: FunnelState, output_dir: Text) -> List[Text]:
+    """Write funnel.csv, page_depth.csv and sku_adds.csv; returns their paths"""
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+
+    path = os.path.join(output_dir, "funnel.csv")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["main_category", "sub_category", "view_type", *FUNNEL_STEPS,
+                         "add_rate", "checkout_rate", "view_to_checkout"])
+        for key, (viewed, added, checked_out) in sorted(state.funnel.items()):
+            writer.writerow([*key.split("\t"), viewed, added, checked_out, _rate(added, viewed),
+                             _rate(checked_out, added), _rate(checked_out, viewed)])
+    paths.append(path)
+
+    path = os.path.join(output_dir, "page_depth.csv")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["main_category", "sub_category", "view_type", "page", "conversations", "share"])
+        for key, reached in sorted(state.depth.items()):
+            for page, count in enumerate(reached, 1):
+                writer.writerow([*key.split("\t"), page, count, _rate(count, reached[0])])
+    paths.append(path)
+
+    path = os.path.join(output_dir, "sku_adds.csv")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["sku", "product_name", "adds", "main_category", "sub_category", "view_type"])
+        for sku, (adds, name, key) in sorted(state.sku_adds.items(), key=lambda item: -item[1][0]):
+            writer.writerow([sku, name, adds, *key.split("\t")])
+    paths.append(path)
+    return paths
+
+
+def _rate(numerator: int, denominator: int) -> Text:
+    return f"{numerator / denominator:.4f}" if denominator else ""
+
+
+def run(events_dir: Text = EVENTS_DIR, output_dir: Text = ANALYTICS_DIR, rebuild: bool = False,
+        idle_days: float = 2.0) -> Tuple[FunnelState, Dict[Text, Any]]:
+    """Process the new events, save the checkpoint and write the tables"""
+    start = time.perf_counter()
+    checkpoint = os.path.join(output_dir, "checkpoint.json")
+    state = FunnelState() if rebuild else FunnelState.load(checkpoint)
+    processed = 0
+    read_stats = {"malformed": 0}
+    for event in new_events(state, events_dir, read_stats):
+        state.apply(event)
+        processed += 1
+    state.events += processed
+    forgotten = state.forget_idle(idle_days * 86400)
+    state.save(checkpoint)
+    write_tables(state, output_dir)
+    seconds = time.perf_counter() - start
+    return state, {"events": processed, "seconds": seconds, "forgotten": forgotten,
+                   "conversations": len(state.conversations), "malformed": read_stats["malformed"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events-dir", default=EVENTS_DIR, help="where the event broker writes")
+    parser.add_argument("--output-dir", default=ANALYTICS_DIR, help="checkpoint and summary tables")
+    parser.add_argument("--rebuild", action="store_true", help="ignore the checkpoint and read every event")
+    parser.add_argument("--idle-days", type=float, default=2.0, help="forget conversations idle this long")
+    parser.add_argument("--top", type=int, default=0, metavar="N", help="print the N most added SKUs")
+    args = parser.parse_args()
+
+    state, stats = run(args.events_dir, args.output_dir, args.rebuild, args.idle_days)
+    print(f"{stats['events']:,} new events in {stats['seconds']:.2f}s "
+          f"({stats['events'] / max(stats['seconds'], 1e-9):,.0f}/s), {stats['conversations']:,} open conversations, "
+          f"{stats['forgotten']:,} idle ones forgotten, {stats['malformed']:,} malformed lines skipped; "
+          f"{state.events:,} events in total")
+    print(f"{'category':40} {'view':10} {'viewed':>8} {'added':>8} {'checkout':>8} {'add %':>6} {'buy %':>6}")
+    for key, (viewed, added, checked_out) in sorted(state.funnel.items(), key=lambda item: -item[1][0]):
+        main_category, sub_category, view_type = key.split("\t")
+        print(f"{main_category + ' / ' + sub_category:40} {view_type:10} {viewed:>8,} {added:>8,} {checked_out:>8,} "
+              f"{added / max(1, viewed):>6.1%} {checked_out / max(1, added):>6.1%}")
+    if args.top:
+        print(f"\n{'sku':12} {'adds':>6}  product")
+        for sku, (adds, name, _) in sorted(state.sku_adds.items(), key=lambda item: -item[1][0])[:args.top]:
+            print(f"{sku:12} {adds:>6}  {name}")
+
+
+if __name__ == "__main__":
+    main()
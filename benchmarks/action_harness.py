@@ -0,0 +1,62 @@
+"""Helpers for driving the real action classes outside the action server."""
+import inspect
+from typing import Any, Dict, List, Optional, Text
+
+from rasa_sdk import Tracker
+from rasa_sdk.executor import CollectingDispatcher
+
+
+def make_tracker(slots: Optional[Dict[Text, Any]] = None, text: Text = "",
+                 intent: Optional[Text] = None, entities: Optional[List[Dict]] = None,
+                 events: Optional[List[Dict]] = None, sender_id: Text = "bench") -> Tracker:
+    """Build a tracker like the one the action server receives from Rasa"""
+    latest_message = {
+        "text": text,
+        "intent": {"name": intent, "confidence": 1.0} if intent else {},
+        "entities": entities or [],
+    }
+    return Tracker(
+        sender_id=sender_id,
+        slots=dict(slots or {}),
+        latest_message=latest_message,
+        events=list(events or []),
+        paused=False,
+        followup_action=None,
+        active_loop={},
+        latest_action_name=None,
+    )
+
+
+async def run_action(action, tracker: Tracker, domain: Optional[Dict] = None):
+    """Run an action the way rasa_sdk's executor does, sync or async"""
+    dispatcher = CollectingDispatcher()
+    result = action.run(dispatcher, tracker, domain or {})
+    if inspect.isawaitable(result):
+        result = await result
+    return dispatcher.messages, result
+
+
+def make_action_call(action_name: Text, slots: Optional[Dict[Text, Any]] = None, text: Text = "",
+                     intent: Optional[Text] = None, events: Optional[List[Dict]] = None,
+                     sender_id: Text = "bench", entities: Optional[List[Dict]] = None) -> Dict[Text, Any]:
+    """Body of a POST /webhook request, as Rasa sends it to the action server"""
+    return {
+        "next_action": action_name,
+        "sender_id": sender_id,
+        "tracker": {
+            "sender_id": sender_id,
+            "slots": dict(slots or {}),
+            "latest_message": {
+                "text": text,
+                "intent": {"name": intent, "confidence": 1.0} if intent else {},
+                "entities": entities or [],
+            },
+            "events": list(events or []),
+            "paused": False,
+            "followup_action": None,
+            "active_loop": {},
+            "latest_action_name": None,
+        },
+        "domain": {},
+        "version": "3.6.2",
+    }
@@ -0,0 +1,112 @@
+"""Benchmark action throughput and latency with many concurrent senders.
+
+Each simulated sender browses the catalog (bestsellers, discounted, regular,
+show more, view cart) using the real action classes on one shared event
+loop, as in the action server. We compare blocking work run inline on the
+loop (the old synchronous actions) with work offloaded to the worker pool,
+at 1, 50 and 500 concurrent senders. Event-loop lag (how late a 10ms
+heartbeat fires) shows how long other conversations would be stalled.
+
+Usage:
+    python -m benchmarks.bench_action_concurrency --senders 1 50 500 --turns 10
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from actions import actions, offload  # noqa: E402
+from actions.catalog import reload_catalog  # noqa: E402
+from benchmarks.action_harness import make_tracker, run_action  # noqa: E402
+from benchmarks.synthetic_catalog import ensure_catalog, parse_rows  # noqa: E402
+
+CATEGORY = {"main_category": "Golden Jewellery", "sub_category": "Neckpiece"}
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def build_journey():
+    cart = json.dumps([{"product_id": "1", "sku": "M91478", "product_name": "ajanta victoria neckpiece",
+                        "base_price": 2999.0, "discounted_price": 2499.0, "quantity": 1}])
+    return [
+        (actions.ActionShowBestsellers(), make_tracker(dict(CATEGORY), text="show bestsellers")),
+        (actions.ActionShowDiscounted(), make_tracker(dict(CATEGORY), text="show discounted")),
+        (actions.ActionShowRegular(), make_tracker(dict(CATEGORY), text="show regular")),
+        (actions.ActionShowMore(), make_tracker(dict(CATEGORY, view_type="regular", current_page=0),
+                                                text="show more")),
+        (actions.ActionViewCart(), make_tracker({"shopping_cart": cart}, text="view cart")),
+    ]
+
+
+async def heartbeat(lags, stop):
+    interval = 0.01
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def measure(mode, senders, turns, journey):
+    offload.OFFLOAD_MODE = mode
+    latencies = []
+
+    async def sender():
+        for turn in range(turns):
+            action, tracker = journey[turn % len(journey)]
+            start = time.perf_counter()
+            await run_action(action, tracker)
+            latencies.append(time.perf_counter() - start)
+
+    lags = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(sender() for _ in range(senders)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    requests = senders * turns
+    return {
+        "rps": requests / elapsed,
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        "lag": max(lags) if lags else 0.0,
+    }
+
+
+async def run(args):
+    if args.catalog_rows:
+        reload_catalog(ensure_catalog(args.catalog_rows))
+    journey = build_journey()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for action, tracker in journey:
+            await run_action(action, tracker)  # load the catalog before timing
+    print(f"{'mode':8} {'senders':>7} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'max loop lag ms':>16}")
+    for senders in args.senders:
+        for mode in ("inline", "threads"):
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = await measure(mode, senders, args.turns, journey)
+            print(f"{mode:8} {senders:>7} {result['rps']:>9,.0f} {result['p50'] * 1000:>9.1f} "
+                  f"{result['p99'] * 1000:>9.1f} {result['lag'] * 1000:>16.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--senders", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--turns", type=int, default=10, help="actions per sender")
+    parser.add_argument("--catalog-rows", type=parse_rows, help="use a synthetic catalog of this size, e.g. 100k")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
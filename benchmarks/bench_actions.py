@@ -0,0 +1,240 @@
+"""Benchmark the shopping, order tracking, review and styling journeys action by action.
+
+Each journey follows a path through data/flows.yml (browse -> show more ->
+add to cart -> view cart -> checkout and the other branches) and drives the
+real action classes in-process with synthetic trackers, the way the action
+server would: the slot events an action returns are applied before the
+next step, and the event history grows as the conversation goes on.
+
+Every journey is replayed --iterations times. Latency is measured without
+tracing; a second, shorter pass under tracemalloc records how much each
+action allocates (peak above its starting point) and keeps (net).
+
+Results are written as JSON to benchmarks/results/<git sha>.json, so runs
+from two commits can be compared:
+
+    python -m benchmarks.bench_actions --iterations 200
+    python -m benchmarks.bench_actions --compare benchmarks/results/<old>.json benchmarks/results/<new>.json
+
+--compare exits with status 1 if any action's p50 or p95 got slower by more
+than --threshold percent. Orders, issues and reviews go to a temporary data
+directory, styling questions are answered from the local knowledge base.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+os.environ.setdefault("DIYA_DATA_DIR", tempfile.mkdtemp(prefix="diya-bench-"))
+os.environ.setdefault("STYLING_MODE", "local")
+os.environ.setdefault("ACTION_METRICS_PORT", "0")
+
+from actions import actions, offload  # noqa: E402
+from actions.catalog import get_catalog, reload_catalog  # noqa: E402
+from benchmarks.action_harness import make_tracker, run_action  # noqa: E402
+from benchmarks.journeys import JOURNEYS, Session  # noqa: E402
+from benchmarks.synthetic_catalog import ensure_catalog, parse_rows  # noqa: E402
+
+ACTIONS = {
+    cls().name(): cls()
+    for cls in (
+        actions.ActionShowBestsellers, actions.ActionShowDiscounted, actions.ActionShowRegular,
+        actions.ActionShowMore, actions.ActionResetCategoryFlow, actions.ActionAddToCart,
+        actions.ActionViewCart, actions.ActionUpdateCart, actions.ActionClearCart,
+        actions.ActionContinueShopping, actions.ActionCheckout, actions.ActionInitiateOrderTracking,
+        actions.ActionValidateOrderId,
+        actions.ActionShowOrderStatus, actions.ActionShowOrderDetails, actions.ActionReportIssue,
+        actions.ActionAnalyzeReviewSentiment, actions.ActionHandleReviewImage,
+        actions.ActionInitializeJewelryStyling, actions.ActionJewelryStylingAdvice,
+    )
+}
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def play(journey, sender_id, on_step):
+    """Run one journey, calling on_step(action_name, coroutine) to time each action"""
+    session = Session(sender_id)
+    for turn in journey:
+        message = session.user_turn(turn)
+        tracker = make_tracker(session.slots, text=message["text"], intent=message["intent"],
+                               entities=message["entities"], events=session.events, sender_id=sender_id)
+        responses, result = await on_step(turn["action"], run_action(ACTIONS[turn["action"]], tracker))
+        session.action_result(turn["action"], result, responses)
+
+
+async def measure_latency(iterations):
+    latencies = {}
+    journey_times = {}
+
+    async def timed(name, call):
+        start = time.perf_counter()
+        result = await call
+        latencies.setdefault(name, []).append(time.perf_counter() - start)
+        return result
+
+    for journey_name, journey in JOURNEYS.items():
+        times = journey_times.setdefault(journey_name, [])
+        for i in range(iterations):
+            start = time.perf_counter()
+            await play(journey, f"{journey_name}-{i}", timed)
+            times.append(time.perf_counter() - start)
+    return latencies, journey_times
+
+
+async def measure_memory(iterations):
+    peaks = {}
+    nets = {}
+
+    async def traced(name, call):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = await call
+        after, peak = tracemalloc.get_traced_memory()
+        peaks.setdefault(name, []).append(peak - before)
+        nets.setdefault(name, []).append(after - before)
+        return result
+
+    tracemalloc.start()
+    try:
+        for journey_name, journey in JOURNEYS.items():
+            for i in range(iterations):
+                await play(journey, f"mem-{journey_name}-{i}", traced)
+    finally:
+        tracemalloc.stop()
+    return peaks, nets
+
+
+def git_revision():
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                             text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{sha}-dirty" if dirty else sha
+
+
+async def run(args):
+    offload.OFFLOAD_MODE = args.offload
+    catalog = reload_catalog(ensure_catalog(args.catalog_rows)) if args.catalog_rows else get_catalog()
+    await measure_latency(2)  # warm up: catalog slices, SQLite connections, styling index
+    latencies, journey_times = await measure_latency(args.iterations)
+    peaks, nets = await measure_memory(args.memory_iterations)
+
+    results = {
+        "revision": git_revision(),
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "catalog_rows": len(catalog),
+        "catalog_path": catalog.path,
+        "iterations": args.iterations,
+        "offload": args.offload,
+        "actions": {},
+        "journeys": {},
+    }
+    for name, values in sorted(latencies.items()):
+        results["actions"][name] = {
+            "calls": len(values),
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "mean_ms": sum(values) / len(values) * 1000,
+            "peak_kib": max(peaks.get(name, [0])) / 1024,
+            "net_kib": sum(nets.get(name, [0])) / max(1, len(nets.get(name, []))) / 1024,
+        }
+    for name, values in journey_times.items():
+        results["journeys"][name] = {
+            "steps": len(JOURNEYS[name]),
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+        }
+    return results
+
+
+def print_results(results):
+    print(f"revision {results['revision']}, {results['catalog_rows']:,} catalog rows, "
+          f"{results['iterations']} iterations, offload={results['offload']}")
+    print(f"{'action':36} {'calls':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'peak KiB':>9} {'net KiB':>8}")
+    for name, r in results["actions"].items():
+        print(f"{name:36} {r['calls']:>6} {r['p50_ms']:>8.3f} {r['p95_ms']:>8.3f} {r['p99_ms']:>8.3f} "
+              f"{r['peak_kib']:>9.1f} {r['net_kib']:>8.2f}")
+    print()
+    print(f"{'journey':36} {'steps':>6} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, r in results["journeys"].items():
+        print(f"{name:36} {r['steps']:>6} {r['p50_ms']:>8.3f} {r['p95_ms']:>8.3f}")
+
+
+def compare(base_path, new_path, threshold):
+    """Print the change per action between two result files; returns the number of regressions"""
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{base['revision']} -> {new['revision']}")
+    if base["catalog_rows"] != new["catalog_rows"]:
+        print(f"warning: catalogs differ ({base['catalog_rows']:,} vs {new['catalog_rows']:,} rows)")
+    print(f"{'action':36} {'p50 ms':>17} {'change':>8} {'p95 ms':>17} {'change':>8} {'peak KiB':>8}")
+    regressions = 0
+    for name in sorted(set(base["actions"]) | set(new["actions"])):
+        old, cur = base["actions"].get(name), new["actions"].get(name)
+        if old is None or cur is None:
+            print(f"{name:36} only in {new['revision'] if cur else base['revision']}")
+            continue
+        changes = []
+        flag = ""
+        for key in ("p50_ms", "p95_ms"):
+            change = (cur[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+            changes.append((old[key], cur[key], change))
+            if change > threshold:
+                flag = "  REGRESSION"
+        if flag:
+            regressions += 1
+        (b50, n50, c50), (b95, n95, c95) = changes
+        print(f"{name:36} {b50:>8.3f}->{n50:<8.3f} {c50:>+7.1f}% {b95:>8.3f}->{n95:<8.3f} {c95:>+7.1f}% "
+              f"{cur['peak_kib'] - old['peak_kib']:>+8.1f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100, help="times each journey is replayed for timing")
+    parser.add_argument("--memory-iterations", type=int, default=5, help="replays under tracemalloc")
+    parser.add_argument("--offload", choices=["inline", "threads"], default="inline",
+                        help="inline times the action bodies alone, threads includes the pool hand-off")
+    parser.add_argument("--catalog-rows", type=parse_rows, help="use a synthetic catalog of this size, e.g. 100k")
+    parser.add_argument("--output", help="result file (default: benchmarks/results/<git sha>[-<rows>].json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two result files")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(args.compare[0], args.compare[1], args.threshold) else 0)
+
+    results = asyncio.run(run(args))
+    print_results(results)
+    suffix = f"-{args.catalog_rows}" if args.catalog_rows else ""
+    output = args.output or os.path.join(RESULTS_DIR, f"{results['revision']}{suffix}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Benchmark the funnel analytics job over months of synthetic event files.
+
+Writes --days of event files the way event_broker.BatchedFileEventBroker
+does (one file per hour, Rasa's event shapes: user and bot messages,
+actions, slot events with the cart JSON), with --conversations per day
+browsing, paging, adding to the cart and checking out at plausible rates.
+Then it times a full run of analytics.funnel over all of it, and an hourly
+incremental run after one more hour of events is appended.
+
+Usage:
+    python -m benchmarks.bench_funnel --days 90 --conversations 2000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from analytics.funnel import run  # noqa: E402
+
+CATEGORIES = [("Golden Jewellery", "Neckpiece"), ("Golden Jewellery", "Earrings"), ("Silver Jewellery", "Rings"),
+              ("Silver Jewellery", "Bracelets"), ("Oxidised Jewellery", "Neckpiece")]
+VIEWS = {"bestseller": "action_show_bestsellers", "discount": "action_show_discounted",
+         "regular": "action_show_regular"}
+BOT_TEXT = "Here are our products:\n" + "\n".join(f"{i}. Kundan Choker Necklace Set - Rs. 1,299" for i in range(1, 6))
+
+
+def conversation(sender_id, start, rng):
+    """Events of one shopping conversation, as the Rasa server publishes them"""
+    clock = [start]
+
+    def event(kind, **fields):
+        clock[0] += rng.expovariate(1 / 4.0)
+        return {"sender_id": sender_id, "event": kind, "timestamp": clock[0], **fields}
+
+    def turn(text, action, *slots):
+        yield event("user", text=text, parse_data={"intent": {"name": action[7:], "confidence": 1.0},
+                                                   "entities": []}, input_channel="rest")
+        yield event("action", name=action, policy="FlowPolicy", confidence=1.0)
+        for name, value in slots:
+            yield event("slot", name=name, value=value)
+        yield event("bot", text=BOT_TEXT, data={"buttons": [{"title": "Add 1", "payload": "/add_to_cart"}]})
+        yield event("action", name="action_listen")
+
+    main, sub = rng.choice(CATEGORIES)
+    yield event("action", name="action_session_start")
+    yield event("slot", name="main_category", value=main)
+    yield event("slot", name="sub_category", value=sub)
+    cart = []
+    for _ in range(rng.choice([1, 1, 1, 2, 3])):
+        view = rng.choice(list(VIEWS))
+        yield from turn(f"show {view}", VIEWS[view], ("current_page", 0), ("view_type", view))
+        page = 0
+        while rng.random() < 0.45:
+            page += 1
+            yield from turn("show more", "action_show_more", ("current_page", page), ("view_type", view))
+        if rng.random() < 0.3:
+            sku = f"S{rng.randrange(5000):07d}"
+            cart.append({"product_id": sku, "sku": sku, "product_name": f"Product {sku}", "base_price": 1299.0,
+                         "discounted_price": None, "quantity": 1})
+            yield from turn("add 1", "action_add_to_cart", ("last_view_type", view), ("last_page", page),
+                            ("shopping_cart", json.dumps(cart)))
+    if cart and rng.random() < 0.4:
+        yield from turn("checkout", "action_checkout", ("shopping_cart", "[]"),
+                        ("order_id", f"ORD-{rng.randrange(10 ** 9):09d}"))
+
+
+def write_hour(events_dir, hour_start, conversations, rng, seq):
+    events = []
+    for n in range(conversations):
+        events.extend(conversation(f"c{seq}-{n}", hour_start + rng.random() * 3600, rng))
+    events.sort(key=lambda e: e["timestamp"])
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(hour_start))
+    path = os.path.join(events_dir, f"events-{stamp}-1-{seq:04d}.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(e, ensure_ascii=False) + "\n" for e in events)
+    return len(events), os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--conversations", type=int, default=1000, help="conversations per day")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    per_hour = max(1, args.conversations // 24)
+    with tempfile.TemporaryDirectory(prefix="diya-funnel-") as workdir:
+        events_dir, output_dir = os.path.join(workdir, "events"), os.path.join(workdir, "analytics")
+        os.makedirs(events_dir)
+        start = time.time() - args.days * 86400
+        written = size = 0
+        for hour in range(args.days * 24):
+            count, nbytes = write_hour(events_dir, start + hour * 3600, per_hour, rng, hour)
+            written += count
+            size += nbytes
+        print(f"{written:,} events, {size / 1024 / 1024:,.0f}MB in {args.days * 24:,} hourly files")
+
+        _, stats = run(events_dir, output_dir, rebuild=True)
+        print(f"full run:        {stats['events']:>10,} events read in {stats['seconds']:6.2f}s "
+              f"({written / stats['seconds']:,.0f} events/s)")
+        write_hour(events_dir, start + args.days * 86400, per_hour, rng, args.days * 24)
+        _, stats = run(events_dir, output_dir)
+        print(f"incremental run: {stats['events']:>10,} events read in {stats['seconds']:6.2f}s")
+        print(f"checkpoint {os.path.getsize(os.path.join(output_dir, 'checkpoint.json')) / 1024:,.0f}KiB, "
+              f"{stats['conversations']:,} open conversations")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark issue reporting latency and group commit under a burst of reports.
+
+Many threads report issues at once (a post-sale spike). We measure the time
+``report()`` adds to the caller, how many fsyncs the burst cost, and index
+lookups afterwards.
+
+Usage:
+    python -m benchmarks.bench_issue_log --threads 32 --reports 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from actions.id_generator import IdGenerator  # noqa: E402
+from actions.issue_log import IssueLog  # noqa: E402
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--reports", type=int, default=200, help="reports per thread")
+    parser.add_argument("--wait", action="store_true", help="block each report until it is fsynced")
+    args = parser.parse_args()
+
+    ids = IdGenerator(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        log = IssueLog(os.path.join(tmp, "issues.jsonl"))
+        latencies = []
+        lock = threading.Lock()
+
+        def reporter(thread_idx):
+            local = []
+            for i in range(args.reports):
+                start = time.perf_counter()
+                log.report(ids.next_issue_reference(), f"ORD-T{thread_idx:03d}{i % 10}",
+                           description="my jewelry is damaged", wait=args.wait)
+                local.append(time.perf_counter() - start)
+            with lock:
+                latencies.extend(local)
+
+        start = time.perf_counter()
+        pool = [threading.Thread(target=reporter, args=(t,)) for t in range(args.threads)]
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        queued = time.perf_counter() - start
+        log.flush()
+        durable = time.perf_counter() - start
+
+        total = args.threads * args.reports
+        print(f"reports={total:,} queued in {queued:.3f}s, durable after {durable:.3f}s "
+              f"({total / durable:,.0f} reports/s)")
+        print(f"report() latency: mean={statistics.mean(latencies) * 1e6:.1f}us "
+              f"p50={percentile(latencies, 50) * 1e6:.1f}us p99={percentile(latencies, 99) * 1e6:.1f}us")
+        print(f"fsyncs={log.stats['fsyncs']:,} ({total / max(1, log.stats['fsyncs']):.1f} reports per fsync)")
+
+        start = time.perf_counter()
+        log.refresh()
+        print(f"index build: {time.perf_counter() - start:.3f}s")
+        start = time.perf_counter()
+        for i in range(1000):
+            log.find_by_order(f"ORD-T{i % args.threads:03d}{i % 10}")
+        print(f"find_by_order: {(time.perf_counter() - start) / 1000 * 1e6:.1f}us per query")
+
+
+if __name__ == "__main__":
+    main()
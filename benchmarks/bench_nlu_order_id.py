@@ -0,0 +1,127 @@
+"""Benchmark how a trained model parses typed order IDs, with and without nlu_order_id.
+
+Order-ID messages are generated the way shoppers type them: a fresh
+generated ID or a 6 digit legacy number, bare or after a lead-in ("my order
+id is ..."), in upper or lower case. Every message goes through the
+message processor the way the Rasa server parses a user message
+(MessageProcessor.parse_message, which also handles button payloads),
+once with OrderIdClassifier on and once with it off. For the order-ID
+messages it reports how often the intent is provide_order_id with the
+normalised ID as the order_id entity. This measures accuracy: the
+classifier runs after the models, so the latency column is only there to
+show what it adds, not what it saves. The other journey
+turns (benchmarks/journeys.py) are parsed as a control: their intents
+must come out the same in both modes.
+
+Usage:
+    rasa train && python -m benchmarks.bench_nlu_order_id
+    python -m benchmarks.bench_nlu_order_id --model models/20250301-120000.tar.gz --messages 1000
+"""
+import argparse
+import asyncio
+import glob
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from rasa.core.agent import Agent  # noqa: E402
+from rasa.core.channels.channel import UserMessage  # noqa: E402
+
+import nlu_order_id  # noqa: E402
+from actions.id_generator import IdGenerator, extract_order_id  # noqa: E402
+from benchmarks.journeys import JOURNEYS  # noqa: E402
+
+LEAD_INS = ["", "", "my order is ", "my order id is ", "order number: ", "track order ", "order no. "]
+
+
+def order_id_messages(count, rng):
+    """[(text, normalised order id)] typed the way shoppers do"""
+    generator = IdGenerator(worker_id=1)
+    messages = []
+    for _ in range(count):
+        if rng.random() < 0.7:
+            typed = generator.next_order_id()
+        else:
+            # Legacy numbers are often typed without the prefix
+            typed = f"{rng.choice(['ORD-', ''])}{rng.randint(100000, 999999)}"
+        typed = typed.lower() if rng.random() < 0.3 else typed
+        messages.append((rng.choice(LEAD_INS) + typed, extract_order_id(typed)))
+    return messages
+
+
+def control_messages():
+    """The journeys' other turns, which the classifier must leave alone"""
+    texts = {turn["text"] for turns in JOURNEYS.values() for turn in turns
+             if turn["text"] and "{" not in turn["text"]}
+    return sorted(texts)
+
+
+async def measure(processor, texts, enabled, repeat):
+    nlu_order_id.ENABLED = enabled
+    parsed, latencies = {}, []
+    for text in texts[:20]:
+        await processor.parse_message(UserMessage(text))  # warm up
+    for _ in range(repeat):
+        for text in texts:
+            start = time.perf_counter()
+            parsed[text] = await processor.parse_message(UserMessage(text))
+            latencies.append(time.perf_counter() - start)
+    return parsed, latencies
+
+
+def correct(parse_data, order_id):
+    entities = [e["value"] for e in parse_data.get("entities", []) if e["entity"] == "order_id"]
+    return parse_data["intent"].get("name") == nlu_order_id.ORDER_ID_INTENT and entities == [order_id]
+
+
+def latest_model():
+    models = sorted(glob.glob(os.path.join(ROOT, "models", "*.tar.gz")), key=os.path.getmtime)
+    if not models:
+        raise SystemExit("No trained model in models/, run `rasa train` or pass --model")
+    return models[-1]
+
+
+async def main_async(args):
+    agent = Agent.load(args.model or latest_model())
+    orders = order_id_messages(args.messages, random.Random(args.seed))
+    controls = control_messages()
+    order_texts = [text for text, _ in orders]
+    print(f"{len(orders)} order-ID messages, {len(controls)} control messages")
+
+    print(f"{'mode':5} {'correct':>8} {'p50 ms':>7} {'mean ms':>8}")
+    for enabled in (False, True):
+        parsed, latencies = await measure(agent.processor, order_texts, enabled, args.repeat)
+        hits = sum(correct(parsed[text], order_id) for text, order_id in orders)
+        print(f"{'on' if enabled else 'off':5} {hits / len(orders):>8.1%} {_p50(latencies):>7.2f} "
+              f"{_mean(latencies):>8.2f}")
+
+    off, _ = await measure(agent.processor, controls, False, 1)
+    on, _ = await measure(agent.processor, controls, True, 1)
+    changed = [text for text in controls if off[text]["intent"].get("name") != on[text]["intent"].get("name")]
+    print(f"control messages with a different intent when on: {len(changed)}"
+          + (f" ({', '.join(changed[:5])})" if changed else ""))
+
+
+def _p50(values):
+    return sorted(values)[len(values) // 2] * 1000 if values else 0.0
+
+
+def _mean(values):
+    return sum(values) / len(values) * 1000 if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="trained model (default: the newest in models/)")
+    parser.add_argument("--messages", type=int, default=500, help="order-ID messages to parse")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the messages per mode")
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
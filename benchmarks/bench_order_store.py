@@ -0,0 +1,106 @@
+"""Benchmark concurrent order writes and lookups against the local order store.
+
+Simulates several action-server workers (processes) each running a few
+threads that place orders and look orders up by ID.
+
+Usage:
+    python -m benchmarks.bench_order_store --workers 4 --threads 4 --orders 2000
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from actions.order_store import OrderStore  # noqa: E402
+
+SAMPLE_ITEMS = [{"sku": "M57611", "product_id": "M57611", "product_name": "aathmika version 3 haaram",
+                 "base_price": 2429.0, "discounted_price": None, "quantity": 1}]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def worker(db_path, worker_idx, threads, orders, lookups_per_order, results):
+    """Place orders and look them up from several threads in one process"""
+    store = OrderStore(db_path)
+    write_times, read_times = [], []
+    lock = threading.Lock()
+
+    def run_thread(thread_idx):
+        writes, reads = [], []
+        placed = []
+        for i in range(orders):
+            order_id = f"ORD-B{worker_idx:02d}{thread_idx:02d}{i:06d}"
+            start = time.perf_counter()
+            store.create_order(order_id, SAMPLE_ITEMS, 2429.0, 2429.0)
+            writes.append(time.perf_counter() - start)
+            placed.append(order_id)
+            for _ in range(lookups_per_order):
+                lookup_id = random.choice(placed)
+                start = time.perf_counter()
+                assert store.get_order(lookup_id) is not None
+                reads.append(time.perf_counter() - start)
+        with lock:
+            write_times.extend(writes)
+            read_times.extend(reads)
+
+    pool = [threading.Thread(target=run_thread, args=(t,)) for t in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    results.put((write_times, read_times))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="number of worker processes")
+    parser.add_argument("--threads", type=int, default=4, help="threads per worker")
+    parser.add_argument("--orders", type=int, default=500, help="orders placed per thread")
+    parser.add_argument("--lookups", type=int, default=5, help="lookups per placed order")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "orders.db")
+        OrderStore(db_path)  # create schema before workers start
+
+        results = multiprocessing.Queue()
+        start = time.perf_counter()
+        procs = [
+            multiprocessing.Process(target=worker, args=(db_path, w, args.threads, args.orders, args.lookups, results))
+            for w in range(args.workers)
+        ]
+        for p in procs:
+            p.start()
+        write_times, read_times = [], []
+        for _ in procs:
+            writes, reads = results.get()
+            write_times.extend(writes)
+            read_times.extend(reads)
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+    print(f"workers={args.workers} threads={args.threads} elapsed={elapsed:.2f}s")
+    for label, times in (("write", write_times), ("lookup", read_times)):
+        print(
+            f"{label:>6}: n={len(times)} rate={len(times) / elapsed:,.0f}/s "
+            f"mean={statistics.mean(times) * 1e3:.3f}ms p50={percentile(times, 50) * 1e3:.3f}ms "
+            f"p99={percentile(times, 99) * 1e3:.3f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
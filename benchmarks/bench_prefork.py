@@ -0,0 +1,126 @@
+"""Benchmark the pre-fork action server: throughput and memory per worker count.
+
+For each worker count the launcher is started on a free port, hammered with
+catalog webhook calls (POST /webhook, action_show_bestsellers and friends)
+for a fixed time, and the workers' memory is read from /proc smaps_rollup.
+With the catalog shared copy-on-write, private memory per worker should
+stay flat as workers are added, and throughput should grow with cores.
+
+Usage:
+    python -m benchmarks.bench_prefork --workers 1 2 4 --concurrency 64 --seconds 10
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from actions.prefork import memory_usage  # noqa: E402
+from benchmarks.action_harness import make_action_call  # noqa: E402
+from benchmarks.synthetic_catalog import ensure_catalog, parse_rows  # noqa: E402
+
+CATEGORY = {"main_category": "Golden Jewellery", "sub_category": "Neckpiece"}
+CALLS = [
+    make_action_call("action_show_bestsellers", dict(CATEGORY), text="show bestsellers"),
+    make_action_call("action_show_discounted", dict(CATEGORY), text="show discounted"),
+    make_action_call("action_show_regular", dict(CATEGORY), text="show regular"),
+    make_action_call("action_show_more", dict(CATEGORY, view_type="regular", current_page=0), text="show more"),
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def child_pids(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+async def wait_until_up(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f"{url}/health") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("action server did not come up")
+
+
+async def load(url, concurrency, seconds):
+    done = 0
+    errors = 0
+    deadline = time.monotonic() + seconds
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async def client(i):
+            nonlocal done, errors
+            n = i
+            while time.monotonic() < deadline:
+                async with session.post(f"{url}/webhook", json=CALLS[n % len(CALLS)]) as response:
+                    await response.read()
+                    if response.status == 200:
+                        done += 1
+                    else:
+                        errors += 1
+                n += 1
+        start = time.monotonic()
+        await asyncio.gather(*(client(i) for i in range(concurrency)))
+        return done / (time.monotonic() - start), errors
+
+
+def run_one(workers, args):
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ)
+    if args.catalog_rows:
+        env["DIYA_CATALOG_PATH"] = ensure_catalog(args.catalog_rows)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "actions.prefork", "--workers", str(workers), "--host", "127.0.0.1",
+         "--port", str(port)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        asyncio.run(wait_until_up(url))
+        rps, errors = asyncio.run(load(url, args.concurrency, args.seconds))
+        usages = [memory_usage(pid) for pid in child_pids(proc.pid)]
+        usages = [u for u in usages if u]
+        private = sum(u.get("Private_Clean", 0) + u.get("Private_Dirty", 0) for u in usages) / max(1, len(usages))
+        total_pss = sum(u.get("Pss", 0) for u in usages) + memory_usage(proc.pid).get("Pss", 0)
+        print(f"workers={workers:<3} {rps:>8,.0f} req/s  errors={errors:<4} "
+              f"private/worker={private / 1024:6.1f}MB  total pss={total_pss / 1024:7.1f}MB")
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--catalog-rows", type=parse_rows, help="use a synthetic catalog of this size, e.g. 1m")
+    args = parser.parse_args()
+    for workers in args.workers:
+        run_one(workers, args)
+
+
+if __name__ == "__main__":
+    main()
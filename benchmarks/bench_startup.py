@@ -0,0 +1,117 @@
+"""Benchmark action-server cold start: import time, time to ready, first response.
+
+For each warm-up mode (ACTION_WARMUP=off, background, sync) a fresh action
+server is started, and we record when it accepts connections (/health),
+when it reports ready (/ready on the metrics port), and how long the first
+catalog request takes. With the warm-up on, that first request should cost
+about as much as any later one. --imports lists the slowest imports of
+the actions package (python -X importtime).
+
+Usage:
+    python -m benchmarks.bench_startup --modes off background sync
+    python -m benchmarks.bench_startup --imports 15
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.action_harness import make_action_call  # noqa: E402
+
+CALL = make_action_call("action_show_bestsellers", {"main_category": "Golden Jewellery", "sub_category": "Neckpiece"},
+                        text="show bestsellers")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def get(url, timeout=1.0):
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+    except OSError:
+        return None, b""
+
+
+def post_json(url, body):
+    request = urllib.request.Request(url, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=60) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def wait_for(check, deadline):
+    while time.monotonic() < deadline:
+        if check():
+            return time.monotonic()
+        time.sleep(0.01)
+    raise RuntimeError("timed out waiting for the action server")
+
+
+def run_mode(mode, timeout):
+    port, metrics_port = free_port(), free_port()
+    env = dict(os.environ, ACTION_WARMUP=mode, ACTION_METRICS_PORT=str(metrics_port))
+    start = time.monotonic()
+    proc = subprocess.Popen([sys.executable, "-m", "rasa_sdk", "--actions", "actions", "--port", str(port)],
+                            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = start + timeout
+        listening = wait_for(lambda: get(f"http://127.0.0.1:{port}/health")[0] == 200, deadline)
+        ready = wait_for(lambda: get(f"http://127.0.0.1:{metrics_port}/ready")[0] == 200, deadline)
+        first = post_json(f"http://127.0.0.1:{port}/webhook", CALL)
+        second = post_json(f"http://127.0.0.1:{port}/webhook", CALL)
+        status = json.loads(get(f"http://127.0.0.1:{metrics_port}/startup")[1] or b"{}")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+    steps = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in status.get("steps_s", {}).items())
+    print(f"{mode:11} listening {listening - start:6.2f}s  ready {ready - start:6.2f}s  "
+          f"first call {first * 1000:8.1f}ms  second {second * 1000:7.1f}ms  "
+          f"imported at {status.get('imported_at_s') or 0:.2f}s  [{steps}]")
+
+
+def slowest_imports(count):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import actions.actions"],
+                            cwd=ROOT, env=dict(os.environ, ACTION_WARMUP="off", ACTION_METRICS_PORT="0"),
+                            capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)", line)
+        if match:
+            rows.append((int(match.group(2)), len(match.group(3)), match.group(4)))
+    total = max((r[0] for r in rows), default=0)
+    print(f"import actions.actions: {total / 1e6:.2f}s cumulative")
+    for cumulative, depth, name in sorted((r for r in rows if r[1] <= 3), reverse=True)[:count]:
+        print(f"  {cumulative / 1e3:9.1f}ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=["off", "background", "sync"],
+                        choices=["off", "background", "sync"])
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--imports", type=int, default=0, metavar="N", help="also list the N slowest imports")
+    args = parser.parse_args()
+    if args.imports:
+        slowest_imports(args.imports)
+    for mode in args.modes:
+        run_mode(mode, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
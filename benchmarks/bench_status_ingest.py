@@ -0,0 +1,84 @@
+"""Benchmark bulk courier status ingest into a scratch order store.
+
+Creates a set of orders, writes a synthetic courier export (CSV or JSONL)
+that walks each order through the lifecycle, then ingests it.
+
+Usage:
+    python -m benchmarks.bench_status_ingest --orders 20000 --format csv
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from actions.order_store import STATUS_STEPS, OrderStore  # noqa: E402
+from actions.status_ingest import ingest_file  # noqa: E402
+
+COURIER_CODES = ["paid", "picked", "packed", "dispatched", "out_for_delivery", "delivered"]
+SAMPLE_ITEMS = [{"sku": "M57611", "product_id": "M57611", "product_name": "aathmika version 3 haaram",
+                 "base_price": 2429.0, "discounted_price": None, "quantity": 1}]
+
+
+def write_export(path, order_ids, fmt):
+    """Write one row per status change, interleaved across orders like a real export"""
+    rows = 0
+    base = time.time() - 14 * 86400
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f) if fmt == "csv" else None
+        if writer:
+            writer.writerow(["awb_ref", "event", "event_time"])
+        for step_idx, code in enumerate(COURIER_CODES):
+            for order_id in order_ids:
+                if random.random() < 0.2:
+                    continue  # not every order has progressed this far
+                event_time = base + step_idx * 86400 + random.randint(0, 3600)
+                if writer:
+                    writer.writerow([order_id, code, event_time])
+                else:
+                    f.write(json.dumps({"order_id": order_id, "status": code, "timestamp": event_time}) + "\n")
+                rows += 1
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = OrderStore(os.path.join(tmp, "orders.db"))
+        order_ids = [f"ORD-BENCH{i:07d}" for i in range(args.orders)]
+        start = time.perf_counter()
+        for order_id in order_ids:
+            store.create_order(order_id, SAMPLE_ITEMS, 2429.0, 2429.0)
+        print(f"created {args.orders:,} orders in {time.perf_counter() - start:.2f}s")
+
+        export_path = os.path.join(tmp, f"export.{args.format}")
+        rows = write_export(export_path, order_ids, args.format)
+        print(f"export: {rows:,} rows, {os.path.getsize(export_path) / 1e6:.1f} MB")
+
+        stats = ingest_file(export_path, store, batch_size=args.batch_size)
+        print(f"ingest: {stats['rows']:,} rows in {stats['seconds']:.2f}s ({stats['rows_per_second']:,.0f} rows/s), "
+              f"applied={stats['applied']:,} invalid={stats['invalid']}")
+
+        # Serving a tracking request is now a single cached read
+        start = time.perf_counter()
+        for order_id in order_ids[:5000]:
+            store.get_rendered(order_id)
+        elapsed = time.perf_counter() - start
+        print(f"cached timeline reads: {elapsed / min(5000, len(order_ids)) * 1e6:.1f}us per order")
+        sample = store.get_order(order_ids[0])
+        print(f"sample order {order_ids[0]}: {sample['current_status']} "
+              f"({len(sample['events'])} of {len(STATUS_STEPS)} steps)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Compare styling throughput with and without micro-batching.
+
+The stand-in service runs in serial mode, so like the notebook backend it
+answers one request at a time, while /query_batch answers a whole batch in
+one pass. Many shoppers ask distinct questions at once; we measure
+questions per second and latency with one request per question versus
+batched requests.
+
+Usage:
+    python -m benchmarks.bench_styling_batching --questions 400 --delay 0.05 --window-ms 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from actions.answer_cache import AnswerCache  # noqa: E402
+from actions.styling_client import StylingClient  # noqa: E402
+from benchmarks.styling_stub_server import start_stub  # noqa: E402
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def measure(base_url, args, window_ms):
+    client = StylingClient(base_url, max_queue=args.questions, queue_timeout=600, read_timeout=600,
+                           cache=AnswerCache(max_entries=0), batch_window_ms=window_ms,
+                           batch_max_size=args.batch_max)
+    latencies = []
+
+    async def ask(i):
+        start = time.perf_counter()
+        await client.query(f"styling question number {i}")
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(ask(i) for i in range(args.questions)))
+    elapsed = time.perf_counter() - start
+    label = f"batched ({window_ms:g}ms window)" if window_ms else "one request per question"
+    print(f"{label}: {args.questions / elapsed:,.1f} questions/s, upstream requests={client.stats['requests']}, "
+          f"p50={percentile(latencies, 50):.2f}s p99={percentile(latencies, 99):.2f}s")
+    await client.close()
+
+
+async def run(args):
+    runner, base_url = await start_stub(delay=args.delay, serial=True)
+    await measure(base_url, args, 0)
+    await measure(base_url, args, args.window_ms)
+    await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=400)
+    parser.add_argument("--delay", type=float, default=0.05, help="stub model time per call in seconds")
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--batch-max", type=int, default=16)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
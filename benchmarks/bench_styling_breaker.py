@@ -0,0 +1,62 @@
+"""Show the circuit breaker cutting styling latency while the backend hangs.
+
+The stand-in service hangs on /query. The first few questions wait for the
+read timeout and trip the breaker; after that questions are refused without
+touching the network. Also times the cached readiness lookup used by
+action_initialize_jewelry_styling.
+
+Usage:
+    python -m benchmarks.bench_styling_breaker --questions 50 --read-timeout 1
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from actions.styling_client import StylingClient, StylingServiceUnavailable  # noqa: E402
+from actions.styling_health import HealthProber  # noqa: E402
+from benchmarks.styling_stub_server import start_stub  # noqa: E402
+
+
+async def run(args):
+    runner, base_url = await start_stub(hang=True)
+    client = StylingClient(base_url, read_timeout=args.read_timeout)
+    latencies = []
+    for i in range(args.questions):
+        start = time.perf_counter()
+        try:
+            await client.query(f"question {i}")
+        except StylingServiceUnavailable:
+            pass
+        latencies.append(time.perf_counter() - start)
+
+    slow = [t for t in latencies if t >= args.read_timeout / 2]
+    fast = [t for t in latencies if t < args.read_timeout / 2]
+    print(f"questions={args.questions} waited for timeout={len(slow)} short-circuited={len(fast)}")
+    if fast:
+        print(f"short-circuit latency: mean={sum(fast) / len(fast) * 1e6:.1f}us")
+    print(f"breaker: {client.breaker.snapshot()}")
+
+    prober = HealthProber(client)
+    await prober.probe()
+    start = time.perf_counter()
+    for _ in range(100000):
+        prober.state["ready"]
+    print(f"cached readiness lookup: {(time.perf_counter() - start) / 100000 * 1e9:.0f}ns, state={prober.state}")
+    await client.close()
+    await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--read-timeout", type=float, default=1.0)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
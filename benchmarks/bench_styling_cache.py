@@ -0,0 +1,82 @@
+"""Benchmark the styling answer cache and single-flight coalescing.
+
+Shoppers ask from a small pool of popular questions (Zipf-like popularity,
+with varied casing and punctuation) against the stand-in styling service.
+Reports upstream calls made, hit rate and the upstream time saved.
+
+Usage:
+    python -m benchmarks.bench_styling_cache --questions 2000 --concurrency 100 --delay 0.2
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from actions.styling_client import StylingClient  # noqa: E402
+from benchmarks.styling_stub_server import start_stub  # noqa: E402
+
+POPULAR_QUESTIONS = [
+    "What earrings go with a saree?",
+    "How do I style a haaram for a wedding?",
+    "Which necklace suits a boat neck blouse?",
+    "Can I wear oxidised jewellery to the office?",
+    "What bangles match a silk saree?",
+    "How to pair a choker with a lehenga?",
+    "Which jewellery suits a round face?",
+    "What to wear with a kurti for a festival?",
+]
+
+
+def variants(question):
+    yield question
+    yield question.lower()
+    yield question.upper().rstrip("?")
+    yield "  " + question.replace(" ", "  ") + "!!"
+
+
+async def run(args):
+    runner, base_url = await start_stub(delay=args.delay)
+    client = StylingClient(base_url, max_concurrency=args.concurrency, max_queue=args.questions)
+    rng = random.Random(7)
+    pool = [v for q in POPULAR_QUESTIONS for v in variants(q)]
+    weights = [1 / (1 + i // 4) for i in range(len(pool))]
+    # A tail of one-off questions that will always miss
+    questions = [rng.choices(pool, weights)[0] if rng.random() > args.unique_share
+                 else f"unique question {i}" for i in range(args.questions)]
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def ask(question):
+        async with semaphore:
+            await client.query(question)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(ask(q) for q in questions))
+    elapsed = time.perf_counter() - start
+
+    metrics = client.cache.metrics()
+    print(f"questions={args.questions:,} in {elapsed:.2f}s ({args.questions / elapsed:,.0f}/s), "
+          f"upstream calls={client.stats['requests']:,}")
+    print(f"hits={metrics['hits']:,} coalesced={metrics['coalesced']:,} misses={metrics['misses']:,} "
+          f"hit rate={metrics['hit_rate']:.1%}")
+    print(f"upstream time spent={metrics['upstream_seconds']:.1f}s saved={metrics['saved_seconds']:.1f}s")
+    await client.close()
+    await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--delay", type=float, default=0.2, help="stub /query latency in seconds")
+    parser.add_argument("--unique-share", type=float, default=0.1, help="share of one-off questions")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
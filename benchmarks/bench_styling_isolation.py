@@ -0,0 +1,83 @@
+"""Show that catalog actions keep their latency while styling calls hang.
+
+Starts the stand-in styling service with /query hanging, fires a stream of
+styling questions at it, and meanwhile runs catalog actions (bestsellers) on
+the same event loop, the way the action server shares one loop between all
+conversations. Catalog latency is reported with the styling load off and on.
+
+Usage:
+    python -m benchmarks.bench_styling_isolation --styling-calls 200 --catalog-calls 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.action_harness import make_tracker, run_action  # noqa: E402
+from benchmarks.styling_stub_server import start_stub  # noqa: E402
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def catalog_latencies(action, tracker, calls):
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await run_action(action, tracker)
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0)
+    return latencies
+
+
+def report(label, latencies):
+    print(f"{label}: mean={statistics.mean(latencies) * 1000:.2f}ms "
+          f"p50={percentile(latencies, 50) * 1000:.2f}ms p99={percentile(latencies, 99) * 1000:.2f}ms")
+
+
+async def run(args):
+    runner, base_url = await start_stub(hang=True)
+
+    from actions import actions, styling_client
+
+    # Point the shared client at the stub
+    styling_client._client = styling_client.StylingClient(base_url, read_timeout=args.read_timeout)
+    catalog = actions.ActionShowBestsellers()
+    catalog_tracker = make_tracker({"main_category": "Golden Jewellery", "sub_category": "Neckpiece"},
+                                   text="show bestsellers")
+    styling = actions.ActionJewelryStylingAdvice()
+    styling_tracker = make_tracker(text="what earrings go with a saree?")
+
+    await run_action(catalog, catalog_tracker)  # load the catalog once
+    report("catalog, no styling load  ", await catalog_latencies(catalog, catalog_tracker, args.catalog_calls))
+
+    styling_tasks = [asyncio.create_task(run_action(styling, styling_tracker)) for _ in range(args.styling_calls)]
+    await asyncio.sleep(0.1)
+    report("catalog, styling hanging  ", await catalog_latencies(catalog, catalog_tracker, args.catalog_calls))
+
+    start = time.perf_counter()
+    await asyncio.gather(*styling_tasks)
+    client = styling_client.get_styling_client()
+    print(f"styling calls settled {time.perf_counter() - start:.2f}s later: "
+          f"sent={client.stats['requests']} rejected={client.stats['rejected']} errors={client.stats['errors']}")
+    await client.close()
+    await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--styling-calls", type=int, default=200)
+    parser.add_argument("--catalog-calls", type=int, default=200)
+    parser.add_argument("--read-timeout", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
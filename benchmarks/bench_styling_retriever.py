@@ -0,0 +1,58 @@
+"""Benchmark the local styling retriever: index build, load and query latency.
+
+Usage:
+    python -m benchmarks.bench_styling_retriever --queries 20000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from actions.styling_retriever import StylingRetriever, build_index  # noqa: E402
+
+QUESTIONS = [
+    "What earrings go with a saree?",
+    "Which necklace suits a boat neck blouse?",
+    "jewellery for a round face",
+    "how do I clean oxidised jewelry",
+    "can I wear oxidised jewellery to the office",
+    "red lehenga bridal jewellery",
+    "how to stack bangles",
+    "what should I wear for my haldi",
+]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stats = build_index(index_dir=tmp)
+        print(f"build: {stats['chunks']} chunks, {stats['terms']} terms in {stats['seconds'] * 1000:.1f}ms")
+
+        start = time.perf_counter()
+        retriever = StylingRetriever(tmp)
+        print(f"load: {(time.perf_counter() - start) * 1000:.2f}ms")
+
+        latencies = []
+        answered = 0
+        for i in range(args.queries):
+            start = time.perf_counter()
+            answer = retriever.answer(QUESTIONS[i % len(QUESTIONS)])
+            latencies.append(time.perf_counter() - start)
+            answered += answer is not None
+        print(f"answer(): p50={percentile(latencies, 50) * 1e6:.1f}us p99={percentile(latencies, 99) * 1e6:.1f}us "
+              f"answered={answered / args.queries:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Benchmark tracker stores as conversations grow: load/save latency and size.
+
+Conversations are replayed turn by turn through the shopper journeys of
+benchmarks/journeys.py, the way the Rasa server drives a tracker store: load
+the tracker, add the turn's events (the user message, the action, its slot
+events, including the shopping cart JSON rewritten on every cart change,
+the bot message and action_listen), save it. Every --report-every turns we
+record the load and save latency, how many events the loaded tracker
+holds and the size of the tracker Rasa would send to the action server.
+
+Stores compared: Rasa's in-memory store ("memory"), Rasa's SQL store on
+SQLite ("sql") and sqlite_tracker_store.CompactingSQLiteTrackerStore
+("compacting").
+
+Usage:
+    python -m benchmarks.bench_tracker_store --sessions 20 --turns 300
+    python -m benchmarks.bench_tracker_store --stores compacting --compact-after 100 --keep-events 40
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from rasa.core.tracker_store import InMemoryTrackerStore, SQLTrackerStore  # noqa: E402
+from rasa.shared.core.domain import Domain  # noqa: E402
+from rasa.shared.core.events import Event  # noqa: E402
+from rasa.shared.core.trackers import DialogueStateTracker, EventVerbosity  # noqa: E402
+
+from benchmarks.journeys import JOURNEYS, Session  # noqa: E402
+from sqlite_tracker_store import CompactingSQLiteTrackerStore  # noqa: E402
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def turn_events(session, turn, rng):
+    """The events one turn adds, as Rasa would store them (the action's results are simulated)"""
+    before = len(session.events)
+    session.user_turn(turn)
+    slot_events = [{"event": "slot", "name": "current_page", "value": rng.randint(0, 5)}]
+    if "cart" in turn["action"] or "checkout" in turn["action"]:
+        cart = list(session.slots.get("shopping_cart") or [])
+        if turn["action"] == "action_add_to_cart":
+            cart.append({"product_id": f"S{rng.randrange(10 ** 7):07d}", "name": "Kundan Choker Necklace Set",
+                         "price": rng.randint(500, 5000), "quantity": 1, "size": "Free Size", "addon": None})
+        slot_events.append({"event": "slot", "name": "shopping_cart", "value": cart})
+    session.action_result(turn["action"], slot_events, [{"text": "Here you go " * 8}])
+    return [Event.from_parameters(e) for e in session.events[before:]]
+
+
+def make_stores(domain, workdir, args):
+    return {
+        "memory": lambda: InMemoryTrackerStore(domain),
+        "sql": lambda: SQLTrackerStore(domain, dialect="sqlite", db=os.path.join(workdir, "sql.db")),
+        "compacting": lambda: CompactingSQLiteTrackerStore(domain, db=os.path.join(workdir, "compacting.db"),
+                                                           compact_after=args.compact_after,
+                                                           keep_events=args.keep_events),
+    }
+
+
+async def run_store(store, domain, args):
+    """Replay the sessions against one store; returns {turn: measurements} at every reporting point"""
+    points = {}
+    journeys = list(JOURNEYS.values())
+    for n in range(args.sessions):
+        rng = random.Random(n)
+        sender_id = f"bench-{n}"
+        session = Session(sender_id)
+        turns = [t for _ in range(args.turns) for t in rng.choice(journeys)][:args.turns]
+        for i, turn in enumerate(turns, 1):
+            start = time.perf_counter()
+            tracker = await store.retrieve(sender_id) or DialogueStateTracker(sender_id, domain.slots)
+            loaded = time.perf_counter()
+            tracker.update_with_events(turn_events(session, turn, rng), domain)
+            before_save = time.perf_counter()
+            await store.save(tracker)
+            saved = time.perf_counter()
+            if i % args.report_every == 0:
+                sent = await store.retrieve(sender_id)
+                point = points.setdefault(i, {"load": [], "save": [], "events": [], "payload": []})
+                point["load"].append(loaded - start)
+                point["save"].append(saved - before_save)
+                point["events"].append(len(sent.events))
+                point["payload"].append(len(json.dumps(sent.current_state(EventVerbosity.ALL))))
+    return points
+
+
+def report(name, points, store):
+    print(f"\n{name}")
+    print(f"  {'turn':>6} {'events':>7} {'payload KiB':>12} {'load ms p50':>12} {'p95':>7} "
+          f"{'save ms p50':>12} {'p95':>7}")
+    for turn, point in sorted(points.items()):
+        print(f"  {turn:>6} {percentile(point['events'], 50):>7} {percentile(point['payload'], 50) / 1024:>12.1f} "
+              f"{percentile(point['load'], 50) * 1000:>12.2f} {percentile(point['load'], 95) * 1000:>7.2f} "
+              f"{percentile(point['save'], 50) * 1000:>12.2f} {percentile(point['save'], 95) * 1000:>7.2f}")
+    if isinstance(store, CompactingSQLiteTrackerStore):
+        summary = store.summary()
+        print(f"  {summary['compactions']} compactions, {summary['archived_events']} events archived, "
+              f"{summary['avg_bytes'] / 1024:.1f} KiB per save on average, max {summary['max_bytes'] / 1024:.1f} KiB")
+
+
+async def main_async(args):
+    domain = Domain.load(os.path.join(ROOT, "domain.yml"))
+    with tempfile.TemporaryDirectory(prefix="diya-trackers-") as workdir:
+        stores = make_stores(domain, workdir, args)
+        for name in args.stores:
+            store = stores[name]()
+            points = await run_store(store, domain, args)
+            report(name, points, store)
+            db_path = os.path.join(workdir, f"{name}.db")
+            if os.path.exists(db_path):
+                print(f"  database {os.path.getsize(db_path) / 1024 / 1024:.1f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=200, help="turns per session")
+    parser.add_argument("--report-every", type=int, default=25, metavar="TURNS")
+    parser.add_argument("--compact-after", type=int, default=150)
+    parser.add_argument("--keep-events", type=int, default=60)
+    parser.add_argument("--stores", nargs="+", default=["memory", "sql", "compacting"],
+                        choices=["memory", "sql", "compacting"])
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Shopper journeys through data/flows.yml, shared by the action benchmarks.
+
+A journey is a list of turns: what the shopper says (intent, text and
+entities) and the custom action the flow runs for it. A Session keeps the
+slots and the event history of one conversation, so that each turn sees
+the slots set by the previous actions and a history that grows the way it
+does in Rasa. Nothing here imports rasa_sdk, the load generator can run
+without it.
+"""
+import json
+import random
+from typing import Any, Dict, List, Optional, Text
+
+CATEGORY = {"main_category": "Golden Jewellery", "sub_category": "Neckpiece"}
+
+
+def step(action_name, intent=None, text="", **entities):
+    """One turn: the user's message, then the action the flow runs for it"""
+    return {"action": action_name, "intent": intent, "text": text, "entities": entities}
+
+
+def add(idx):
+    return step("action_add_to_cart", "add_to_cart", f"add product {idx}", product_idx=str(idx))
+
+
+# Paths through data/flows.yml; "{order_id}" is filled in from the slot set at checkout
+JOURNEYS = {
+    "bestsellers_checkout": [
+        step("action_show_bestsellers", "show_bestsellers", "show bestsellers"),
+        step("action_show_more", "show_more", "show more"),
+        step("action_show_more", "show_more", "show more"),
+        add(2),
+        step("action_view_cart", "view_cart", "view cart"),
+        step("action_checkout", "checkout", "checkout"),
+    ],
+    "discounted_update_cart": [
+        step("action_show_discounted", "show_discounted", "show discounted"),
+        step("action_show_more", "show_more", "show more"),
+        add(1),
+        step("action_continue_shopping", "continue_shopping", "continue shopping"),
+        add(3),
+        step("action_view_cart", "view_cart", "view cart"),
+        step("action_update_cart", "update_cart", "increase", product_id="{first_product_id}", action="increase"),
+        step("action_update_cart", "update_cart", "decrease", product_id="{first_product_id}", action="decrease"),
+        step("action_checkout", "checkout", "checkout"),
+    ],
+    "regular_clear_cart": [
+        step("action_show_regular", "show_regular", "show regular"),
+        add(1),
+        step("action_continue_shopping", "continue_shopping", "continue shopping"),
+        step("action_show_more", "show_more", "show more"),
+        step("action_view_cart", "view_cart", "view cart"),
+        step("action_clear_cart", "clear_cart", "clear cart"),
+    ],
+    "switch_views_reset": [
+        step("action_show_bestsellers", "show_bestsellers", "show bestsellers"),
+        step("action_show_discounted", "show_discounted", "show discounted"),
+        step("action_show_regular", "show_regular", "show regular"),
+        step("action_show_more", "show_more", "show more"),
+        step("action_reset_category_flow", "reset_category_flow", "different category"),
+    ],
+    "checkout_track_report": [
+        step("action_show_regular", "show_regular", "show regular"),
+        add(1),
+        step("action_checkout", "checkout", "checkout"),
+        step("action_validate_order_id", "provide_order_id", "my order is {order_id}"),
+        step("action_show_order_status", None, "my order is {order_id}"),
+        step("action_show_order_details", "view_order_details", "show details"),
+        step("action_report_issue", "report_issue", "the clasp arrived broken"),
+    ],
+    "track_unknown_order": [
+        step("action_initiate_order_tracking", "track_order", "track my order"),
+        step("action_validate_order_id", "provide_order_id", "where is ORD-000000"),
+        step("action_show_order_status", None, "where is ORD-000000"),
+    ],
+    "review_with_image": [
+        step("action_analyze_review_sentiment", None, "Absolutely love this necklace, the finish is beautiful!"),
+        step("action_handle_review_image", "upload_review_image", "upload image"),
+    ],
+    "review_negative": [
+        step("action_analyze_review_sentiment", None, "Not happy at all, the plating faded within a week"),
+    ],
+    "styling_questions": [
+        step("action_initialize_jewelry_styling", "get_styling_tips", "styling tips"),
+        step("action_jewelry_styling_advice", None, "what earrings go with a saree"),
+        step("action_jewelry_styling_advice", None, "how do I clean gold plated jewellery"),
+    ],
+}
+
+
+def fill(value, slots):
+    if not isinstance(value, str) or "{" not in value:
+        return value
+    cart = json.loads(slots.get("shopping_cart") or "[]")
+    return value.format(order_id=slots.get("order_id") or "",
+                        first_product_id=cart[0]["product_id"] if cart else "")
+
+
+class Session:
+    """Slots and event history of one simulated conversation"""
+
+    def __init__(self, sender_id: Text, slots: Optional[Dict[Text, Any]] = None):
+        self.sender_id = sender_id
+        self.slots = dict(CATEGORY if slots is None else slots)
+        self.events: List[Dict[Text, Any]] = []
+
+    def user_turn(self, turn: Dict[Text, Any]) -> Dict[Text, Any]:
+        """Record the shopper's message for a turn; returns its text, intent and entities"""
+        text = fill(turn["text"], self.slots)
+        entities = [{"entity": k, "value": fill(v, self.slots)} for k, v in turn["entities"].items()]
+        if turn["intent"]:
+            self.slots["intent"] = turn["intent"]
+        self.events.append({"event": "user", "text": text,
+                            "parse_data": {"intent": {"name": turn["intent"]}, "entities": entities}})
+        return {"text": text, "intent": turn["intent"], "entities": entities}
+
+    def action_result(self, action_name: Text, events: Optional[List[Dict]] = None,
+                      responses: Optional[List[Dict]] = None):
+        """Apply what the action returned: its slot events and the bot messages it sent"""
+        self.events.append({"event": "action", "name": action_name})
+        for event in events or []:
+            if event.get("event") == "slot":
+                self.slots[event["name"]] = event["value"]
+            self.events.append(event)
+        for response in responses or []:
+            self.events.append({"event": "bot", "text": response.get("text")})
+        self.events.append({"event": "action", "name": "action_listen"})
+
+
+def parse_mix(spec: Text) -> Dict[Text, float]:
+    """'bestsellers_checkout=3,styling_questions=1' -> journey weights"""
+    mix = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in JOURNEYS:
+            raise ValueError(f"Unknown journey {name!r}, expected one of {', '.join(JOURNEYS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def pick_journey(mix: Dict[Text, float], rng: random.Random = random) -> Text:
+    return rng.choices(list(mix), weights=list(mix.values()))[0]
@@ -0,0 +1,196 @@
+"""Open-loop load generator for the action server's /webhook endpoint.
+
+Shopper sessions arrive as a Poisson process at --rate sessions per second.
+Each session follows a journey picked from --mix (see benchmarks/journeys.py,
+which covers every custom action) and sends one /webhook call per turn,
+with the tracker as Rasa would send it: the slots set so far and the full
+event history, which grows with every turn. Between turns a shopper thinks
+for an exponentially distributed --think seconds. Some shoppers go around
+again (--mean-loops), so long sessions with long histories show up too.
+
+Arrivals don't wait for responses, so when the server falls behind, latency
+and errors grow instead of the load quietly dropping. Run it against a
+local action server:
+
+    rasa run actions --port 5055        # or python -m actions.prefork --workers 4
+    python -m benchmarks.load_webhook --url http://127.0.0.1:5055 --rate 20 --duration 60
+    python -m benchmarks.load_webhook --rate 5 10 20 40 --duration 30 --mix bestsellers_checkout=3,styling_questions=1
+"""
+import argparse
+import asyncio
+import collections
+import json
+import os
+import random
+import sys
+import time
+
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.action_harness import make_action_call  # noqa: E402
+from benchmarks.journeys import JOURNEYS, Session, parse_mix, pick_journey  # noqa: E402
+
+DEFAULT_MIX = (
+    "bestsellers_checkout=3,discounted_update_cart=2,regular_clear_cart=2,switch_views_reset=2,"
+    "checkout_track_report=1,track_unknown_order=1,review_with_image=1,review_negative=1,styling_questions=1"
+)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class LoadStats:
+    def __init__(self):
+        self.latencies = collections.defaultdict(list)  # action -> seconds
+        self.errors = collections.defaultdict(collections.Counter)  # action -> error kind -> count
+        self.payload_bytes = []
+        self.history_events = []
+        self.sessions_started = 0
+        self.sessions_done = 0
+        self.active = 0
+        self.peak_active = 0
+
+    def calls(self, action=None):
+        if action is not None:
+            return len(self.latencies[action]) + sum(self.errors[action].values())
+        return sum(len(v) for v in self.latencies.values()) + sum(sum(c.values()) for c in self.errors.values())
+
+    def error_count(self, action=None):
+        if action is not None:
+            return sum(self.errors[action].values())
+        return sum(sum(c.values()) for c in self.errors.values())
+
+
+async def call_action(http, url, session, turn, stats, timeout):
+    message = session.user_turn(turn)
+    body = json.dumps(make_action_call(turn["action"], session.slots, text=message["text"],
+                                       intent=message["intent"], events=session.events,
+                                       sender_id=session.sender_id, entities=message["entities"]))
+    stats.payload_bytes.append(len(body))
+    stats.history_events.append(len(session.events))
+    start = time.perf_counter()
+    try:
+        async with http.post(f"{url}/webhook", data=body, headers={"Content-Type": "application/json"},
+                             timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            payload = await response.read()
+            elapsed = time.perf_counter() - start
+            if response.status != 200:
+                stats.errors[turn["action"]][f"http {response.status}"] += 1
+                session.action_result(turn["action"])
+                return
+            result = json.loads(payload)
+    except asyncio.TimeoutError:
+        stats.errors[turn["action"]]["timeout"] += 1
+        session.action_result(turn["action"])
+        return
+    except aiohttp.ClientError as e:
+        stats.errors[turn["action"]][type(e).__name__] += 1
+        session.action_result(turn["action"])
+        return
+    stats.latencies[turn["action"]].append(elapsed)
+    session.action_result(turn["action"], result.get("events"), result.get("responses"))
+
+
+async def shopper(http, url, session_id, journey_name, args, stats, rng):
+    stats.sessions_started += 1
+    stats.active += 1
+    stats.peak_active = max(stats.peak_active, stats.active)
+    session = Session(f"load-{session_id}")
+    loops = 1
+    while rng.random() > 1 / max(1.0, args.mean_loops):
+        loops += 1
+    try:
+        for _ in range(loops):
+            for turn in JOURNEYS[journey_name]:
+                await call_action(http, url, session, turn, stats, args.timeout)
+                if args.think:
+                    await asyncio.sleep(rng.expovariate(1 / args.think))
+        stats.sessions_done += 1
+    finally:
+        stats.active -= 1
+
+
+async def run_rate(url, rate, args, mix):
+    stats = LoadStats()
+    rng = random.Random(args.seed)
+    connector = aiohttp.TCPConnector(limit=args.connections)
+    async with aiohttp.ClientSession(connector=connector) as http:
+        tasks = []
+        start = time.perf_counter()
+        next_arrival = start
+        session_id = 0
+        # Poisson arrivals: exponential gaps, scheduled against the clock so a slow loop doesn't thin them out
+        while next_arrival - start < args.duration:
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(
+                shopper(http, url, session_id, pick_journey(mix, rng), args, stats, random.Random(rng.random()))))
+            session_id += 1
+            next_arrival += rng.expovariate(rate)
+        arrivals_done = time.perf_counter()
+        if tasks:
+            await asyncio.wait(tasks, timeout=args.drain)
+        elapsed = time.perf_counter() - start
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return stats, arrivals_done - start, elapsed
+
+
+def report(rate, stats, arrival_seconds, elapsed, per_action):
+    all_latencies = [v for values in stats.latencies.values() for v in values]
+    calls = stats.calls()
+    errors = stats.error_count()
+    print(f"\nrate {rate:g} sessions/s: {stats.sessions_started} sessions "
+          f"({stats.sessions_started / arrival_seconds:.1f}/s achieved), {stats.sessions_done} finished, "
+          f"peak {stats.peak_active} concurrent")
+    print(f"  {calls:,} calls in {elapsed:.1f}s = {len(all_latencies) / elapsed:,.1f} ok/s, "
+          f"errors {errors:,} ({errors / max(1, calls):.2%})")
+    print(f"  latency ms: p50 {percentile(all_latencies, 50) * 1000:.1f}  p90 {percentile(all_latencies, 90) * 1000:.1f}  "
+          f"p99 {percentile(all_latencies, 99) * 1000:.1f}  max {max(all_latencies, default=0) * 1000:.1f}")
+    print(f"  payload KiB p50 {percentile(stats.payload_bytes, 50) / 1024:.1f}  "
+          f"p99 {percentile(stats.payload_bytes, 99) / 1024:.1f};  history events p50 "
+          f"{percentile(stats.history_events, 50)}  max {max(stats.history_events, default=0)}")
+    if not per_action:
+        return
+    print(f"  {'action':36} {'calls':>7} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for action in sorted(set(stats.latencies) | set(stats.errors)):
+        values = stats.latencies[action]
+        kinds = ", ".join(f"{k}={n}" for k, n in stats.errors[action].most_common())
+        print(f"  {action:36} {stats.calls(action):>7} {percentile(values, 50) * 1000:>8.1f} "
+              f"{percentile(values, 99) * 1000:>8.1f} {stats.error_count(action):>7} {kinds}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:5055")
+    parser.add_argument("--rate", type=float, nargs="+", default=[10.0], help="new sessions per second (one run each)")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of arrivals per run")
+    parser.add_argument("--drain", type=float, default=60.0, help="seconds to let sessions finish afterwards")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="journey=weight,... (journeys: %s)" % ", ".join(JOURNEYS))
+    parser.add_argument("--think", type=float, default=1.0, help="mean seconds between a shopper's turns")
+    parser.add_argument("--mean-loops", type=float, default=1.5, help="mean times a shopper repeats the journey")
+    parser.add_argument("--timeout", type=float, default=10.0, help="per-call timeout in seconds")
+    parser.add_argument("--connections", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--summary", action="store_true", help="skip the per-action table")
+    args = parser.parse_args()
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    for rate in args.rate:
+        stats, arrival_seconds, elapsed = asyncio.run(run_rate(args.url.rstrip("/"), rate, args, mix))
+        report(rate, stats, arrival_seconds, elapsed, not args.summary)
+
+
+if __name__ == "__main__":
+    main()
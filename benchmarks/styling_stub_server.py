@@ -0,0 +1,86 @@
+"""Local stand-in for the styling-advice (PDF chatbot) service.
+
+Serves the same endpoints as the Colab service with a configurable delay, so
+the action server can be exercised without the real backend. ``--hang`` makes
+/query never answer, to simulate a stuck backend. ``--serial`` makes the
+"model" handle one request at a time like the notebook backend does, where
+/query_batch answers a whole batch in one pass (plus a small per-question cost).
+
+Usage:
+    python -m benchmarks.styling_stub_server --port 8765 --delay 2.0
+    CHATBOT_API_URL=http://127.0.0.1:8765 rasa run actions
+"""
+import argparse
+import asyncio
+
+from aiohttp import web
+
+
+def make_app(delay: float = 0.5, hang: bool = False, ready: bool = True, serial: bool = False,
+             batch_item_delay: float = None) -> web.Application:
+    stats = {"queries": 0, "batches": 0, "health": 0}
+    model_lock = asyncio.Lock() if serial else None
+    if batch_item_delay is None:
+        batch_item_delay = delay / 10
+
+    async def run_model(seconds):
+        if hang:
+            await asyncio.Event().wait()
+        if model_lock is None:
+            await asyncio.sleep(seconds)
+        else:
+            async with model_lock:
+                await asyncio.sleep(seconds)
+
+    def answer_for(question):
+        return {"answer": f"Stub styling advice for: {question}"}
+
+    async def query(request):
+        stats["queries"] += 1
+        payload = await request.json()
+        await run_model(delay)
+        return web.json_response(answer_for(payload.get("question", "")))
+
+    async def query_batch(request):
+        stats["batches"] += 1
+        questions = (await request.json()).get("questions", [])
+        await run_model(delay + batch_item_delay * len(questions))
+        return web.json_response({"answers": [answer_for(question) for question in questions]})
+
+    async def health(request):
+        stats["health"] += 1
+        return web.json_response({"status": "ok", "ready": ready})
+
+    app = web.Application()
+    app["stats"] = stats
+    app.router.add_post("/query", query)
+    app.router.add_post("/query_batch", query_batch)
+    app.router.add_get("/health", health)
+    return app
+
+
+async def start_stub(host: str = "127.0.0.1", port: int = 0, **kwargs):
+    """Start the stub inside the running loop, returns (runner, base_url)"""
+    runner = web.AppRunner(make_app(**kwargs))
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.5, help="seconds before /query answers")
+    parser.add_argument("--hang", action="store_true", help="never answer /query")
+    parser.add_argument("--not-ready", action="store_true", help="report ready=false on /health")
+    parser.add_argument("--serial", action="store_true", help="answer one request at a time")
+    args = parser.parse_args()
+    web.run_app(make_app(args.delay, args.hang, not args.not_ready, args.serial),
+                host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
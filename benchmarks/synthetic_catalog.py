@@ -0,0 +1,201 @@
+"""Generate large synthetic product catalogs shaped like actions/jewelry_data.csv.
+
+The generator learns from the real catalog: the columns, the category mix,
+and for every category the products in it. Each synthetic product starts
+from a real product of the chosen category, so style-tag combinations,
+size and add-on options, availability and the sentinel strings
+("Not Applicable", "No Discount", ...) co-occur exactly as they do in the
+real data. Then it gets a fresh SKU, name and URL, a jittered price
+(keeping the ...9 price endings), and add-on prices and a discount drawn
+from the real add-on offsets and discount ratios. Discount and bestseller
+rates per category follow the real ones.
+
+Rows are streamed to disk, so memory stays flat however many are asked for:
+
+    python -m benchmarks.synthetic_catalog --rows 10k 100k 1m
+    DIYA_CATALOG_PATH=benchmarks/data/catalog-1000000.csv python -m actions.prefork
+
+Benchmarks take a --catalog-rows option that calls ensure_catalog(), which
+generates the file once (seeded, so it is the same file every time) and
+reuses it afterwards.
+"""
+import argparse
+import bisect
+import collections
+import csv
+import math
+import os
+import random
+import re
+import time
+from typing import Dict, List, Optional, Text
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Always learn from the real catalog, even when DIYA_CATALOG_PATH points at a synthetic one
+SOURCE_PATH = os.path.join(ROOT, "actions", "jewelry_data.csv")
+DATA_DIR = os.path.join(ROOT, "benchmarks", "data")
+PRICE_JITTER = 0.25  # standard deviation of the log price change
+NAME_MIX = 0.5  # chance a name borrows its first word from another product of the category
+
+SIZE_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+
+def parse_rows(value: Text) -> int:
+    """'100k' -> 100000, '1.5m' -> 1500000"""
+    value = value.strip().lower().replace("_", "")
+    if value and value[-1] in SIZE_SUFFIXES:
+        return int(float(value[:-1]) * SIZE_SUFFIXES[value[-1]])
+    return int(value)
+
+
+def round_price(price: float, like: Text) -> int:
+    # The shop prices end in 9 (1199, 2429); keep that where the original did
+    if like.endswith("9"):
+        return max(9, int(round(price / 10.0)) * 10 - 1)
+    return max(1, int(round(price)))
+
+
+class CatalogModel:
+    """What the generator learned from the real catalog"""
+
+    def __init__(self, path: Text = SOURCE_PATH):
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            self.header = next(reader)
+            rows = [row for row in reader if len(row) == len(self.header)]
+        self.column = {name: i for i, name in enumerate(self.header)}
+        by_category: Dict[tuple, List[List[Text]]] = collections.defaultdict(list)
+        for row in rows:
+            by_category[(row[self.column["main_category"]], row[self.column["sub_category"]])].append(row)
+        self.categories = list(by_category)
+        self.templates = [by_category[c] for c in self.categories]
+        self.cumulative = []
+        total = 0
+        for group in self.templates:
+            total += len(group)
+            self.cumulative.append(total)
+        self.source_rows = total
+
+        col = self.column
+        self.discount_rate = [sum(r[col["Has_Discount"]] == "1" for r in g) / len(g) for g in self.templates]
+        self.bestseller_rate = [sum(r[col["is_bestseller"]] == "1" for r in g) / len(g) for g in self.templates]
+        self.discount_ratios = [
+            float(r[col["Discounted_Base_Price_Without_Addon"]]) / float(r[col["Base_Price_Without_Addon"]])
+            for r in rows
+            if r[col["Has_Discount"]] == "1" and _is_number(r[col["Discounted_Base_Price_Without_Addon"]])
+            and _is_number(r[col["Base_Price_Without_Addon"]]) and float(r[col["Base_Price_Without_Addon"]]) > 0
+        ] or [0.9]
+        self.first_words = [[r[col["Product_Name"]].split(" ", 1)[0] for r in g] for g in self.templates]
+
+    def describe(self) -> Text:
+        lines = [f"{self.source_rows} source rows, {len(self.categories)} categories"]
+        for (main, sub), group, disc, best in zip(self.categories, self.templates,
+                                                  self.discount_rate, self.bestseller_rate):
+            lines.append(f"  {main} / {sub}: {len(group) / self.source_rows:6.1%} of products, "
+                         f"{disc:5.1%} discounted, {best:5.1%} bestsellers")
+        return "\n".join(lines)
+
+    def generate(self, rows: int, seed: int = 0):
+        """Yield synthetic rows (lists in header order)"""
+        rng = random.Random(seed)
+        col = self.column
+        for n in range(rows):
+            g = bisect.bisect_right(self.cumulative, rng.random() * self.source_rows)
+            group = self.templates[g]
+            row = list(group[rng.randrange(len(group))])
+
+            sku = f"S{n:07d}"
+            name = row[col["Product_Name"]]
+            if rng.random() < NAME_MIX and " " in name:
+                name = f"{rng.choice(self.first_words[g])} {name.split(' ', 1)[1]}"
+            if "" in col:  # the unnamed index column pandas wrote
+                row[col[""]] = str(n)
+            row[col["SKU"]] = sku
+            row[col["Product_Name"]] = name
+            row[col["Product_URL"]] = f"https://madeforhers.in/product/{_slug(name)}-{sku.lower()}/"
+
+            base_text = row[col["Base_Price_Without_Addon"]]
+            if _is_number(base_text):
+                old_base = float(base_text)
+                base = round_price(old_base * math.exp(rng.gauss(0, PRICE_JITTER)), base_text)
+                row[col["Base_Price_Without_Addon"]] = str(base)
+                for addon in ("Final_Price_with_Rope_Addon", "Final_Price_with_Chain_Addon"):
+                    if _is_number(row[col[addon]]):
+                        row[col[addon]] = str(base + int(float(row[col[addon]]) - old_base))
+                discounted = rng.random() < self.discount_rate[g]
+                row[col["Has_Discount"]] = "1" if discounted else "0"
+                row[col["Discounted_Base_Price_Without_Addon"]] = (
+                    str(round_price(base * rng.choice(self.discount_ratios), base_text))
+                    if discounted else "No Discount"
+                )
+            row[col["is_bestseller"]] = "1" if rng.random() < self.bestseller_rate[g] else "0"
+            yield row
+
+    def write(self, path: Text, rows: int, seed: int = 0, chunk_size: int = 10_000) -> float:
+        """Stream rows to a CSV file (written to a temporary name, then renamed); returns seconds taken"""
+        start = time.perf_counter()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.header)
+            chunk = []
+            for row in self.generate(rows, seed):
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    writer.writerows(chunk)
+                    chunk.clear()
+            writer.writerows(chunk)
+        os.replace(tmp_path, path)
+        return time.perf_counter() - start
+
+
+def _is_number(value: Text) -> bool:
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+
+def _slug(name: Text) -> Text:
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+def catalog_path(rows: int, seed: int = 0) -> Text:
+    suffix = f"-seed{seed}" if seed else ""
+    return os.path.join(DATA_DIR, f"catalog-{rows}{suffix}.csv")
+
+
+def ensure_catalog(rows: int, seed: int = 0, source: Optional[Text] = None) -> Text:
+    """Path of a synthetic catalog with this many rows, generating it on first use"""
+    path = catalog_path(rows, seed)
+    if not os.path.exists(path):
+        CatalogModel(source or SOURCE_PATH).write(path, rows, seed)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", nargs="+", default=["10k", "100k", "1m"], help="e.g. 10k 100k 1m 2500000")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--source", default=SOURCE_PATH, help="real catalog to learn from")
+    parser.add_argument("--output", help="output file (only with a single --rows value)")
+    parser.add_argument("--describe", action="store_true", help="print what was learned from the source")
+    args = parser.parse_args()
+
+    model = CatalogModel(args.source)
+    if args.describe:
+        print(model.describe())
+    sizes = [parse_rows(r) for r in args.rows]
+    if args.output and len(sizes) > 1:
+        parser.error("--output needs a single --rows value")
+    for rows in sizes:
+        path = args.output or catalog_path(rows, args.seed)
+        seconds = model.write(path, rows, args.seed)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        print(f"{rows:>10,} rows -> {path} ({size_mb:,.1f}MB, {seconds:.1f}s, {rows / seconds:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
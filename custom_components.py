@@ -1,15 +1,150 @@
-from typing import Any, Dict, Text
+import asyncio
+import collections
+import hashlib
+import logging
+import time
+from typing import Any, Dict, Optional, Text
+
 from rasa.core.nlg.contextual_response_rephraser import ContextualResponseRephraser
 from rasa_sdk.interfaces import Tracker as DialogueStateTracker
 
+logger = logging.getLogger(__name__)
+
+STATS_LOG_EVERY = 200  # responses between stats log lines
+
+
 class CustomResponseRephraser(ContextualResponseRephraser):
+    """Rephraser with a cache, a latency budget and a per-template opt-in.
+
+    Options, next to the other nlg settings in endpoints.yml:
+
+    - rephrase_templates: only these responses are rephrased (default: all
+      the responses the base rephraser would rephrase)
+    - never_rephrase: responses that are never rephrased
+    - rephrase_cache_ttl: seconds a rephrased response is reused (0: no cache)
+    - rephrase_cache_size: most responses kept in the cache
+    - rephrase_budget_ms: longest a response waits for the LLM; after that
+      the original response is sent, and the late rephrasing still fills
+      the cache for next time
+
+    The cache key is the template name and its filled-in text, which holds
+    the slot values the template uses, so a static template like utter_greet
+    is rephrased once per TTL instead of on every turn.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        config = self.nlg_endpoint.kwargs if self.nlg_endpoint else {}
+        templates = config.get("rephrase_templates")
+        self.rephrase_templates = set(templates) if templates else None
+        self.never_rephrase = set(config.get("never_rephrase") or [])
+        self.cache_ttl = float(config.get("rephrase_cache_ttl", 3600))
+        self.cache_size = int(config.get("rephrase_cache_size", 5000))
+        budget_ms = config.get("rephrase_budget_ms", 800)
+        self.budget = budget_ms / 1000.0 if budget_ms else None
+        self._cache: "collections.OrderedDict[Text, tuple]" = collections.OrderedDict()
+        self._in_flight: Dict[Text, asyncio.Task] = {}
+        self._timed_out = set()  # keys whose caller stopped waiting before the LLM answered
+        self.stats = {
+            "responses": 0, "skipped": 0, "cache_hits": 0, "rephrased": 0, "timeouts": 0,
+            "late_results": 0, "errors": 0, "added_seconds": 0.0, "max_added_seconds": 0.0,
+        }
+
     async def rephrase(self, response: Dict[Text, Any], tracker: DialogueStateTracker) -> Dict[Text, Any]:
         # Check if this is a response from the jewelry PDF chatbot
         metadata = response.get("metadata", {})
-        
-        # Don't rephrase if it's from the jewelry chatbot or explicitly marked to not rephrase
-        if metadata.get("from_jewelry_pdf") or metadata.get("rephrase") is False:
+        self.stats["responses"] += 1
+
+        # Don't rephrase if it's from the jewelry chatbot, explicitly marked to not rephrase, or not opted in
+        template = response.get("utter_action")
+        if (metadata.get("from_jewelry_pdf") or metadata.get("rephrase") is False
+                or template in self.never_rephrase
+                or (self.rephrase_templates is not None and template not in self.rephrase_templates)):
+            self.stats["skipped"] += 1
             return response
+
+        start = time.perf_counter()
+        key = self._cache_key(template, response)
+        cached = self._cache_get(key)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            result = {**response, "text": cached}
         else:
-            # Use normal rephrasing for other responses
-            return await super().rephrase(response, tracker)
\ No newline at end of file
+            result = await self._rephrase_within_budget(key, response, tracker)
+        self._record_latency(time.perf_counter() - start)
+        return result
+
+    async def _rephrase_within_budget(self, key: Text, response: Dict[Text, Any],
+                                      tracker: DialogueStateTracker) -> Dict[Text, Any]:
+        # Concurrent requests for the same response share one LLM call
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(super().rephrase(response, tracker))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._rephrase_done(key, response, done))
+        try:
+            # shield: when the budget runs out the call carries on and fills the cache
+            result = await asyncio.wait_for(asyncio.shield(task), self.budget)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            self._timed_out.add(key)
+            return response
+        except Exception as e:
+            logger.warning("Rephrasing %s failed, sending it as is: %s", response.get("utter_action"), e)
+            return response
+        return result
+
+    def _rephrase_done(self, key: Text, response: Dict[Text, Any], task: asyncio.Task):
+        self._in_flight.pop(key, None)
+        if key in self._timed_out:
+            self._timed_out.discard(key)
+            self.stats["late_results"] += 1
+        if task.cancelled() or task.exception() is not None:
+            self.stats["errors"] += 1
+            return
+        text = (task.result() or {}).get("text")
+        if text and text != response.get("text"):
+            self.stats["rephrased"] += 1
+            self._cache_put(key, text)
+
+    def _cache_key(self, template: Optional[Text], response: Dict[Text, Any]) -> Text:
+        text = response.get("text") or ""
+        return f"{template}:{hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()}"
+
+    def _cache_get(self, key: Text) -> Optional[Text]:
+        if not self.cache_ttl:
+            return None
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        text, expires = entry
+        if expires < time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return text
+
+    def _cache_put(self, key: Text, text: Text):
+        if not self.cache_ttl:
+            return
+        self._cache[key] = (text, time.monotonic() + self.cache_ttl)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _record_latency(self, seconds: float):
+        self.stats["added_seconds"] += seconds
+        self.stats["max_added_seconds"] = max(self.stats["max_added_seconds"], seconds)
+        if self.stats["responses"] % STATS_LOG_EVERY == 0:
+            logger.info("Rephraser: %s", self.summary())
+
+    def summary(self) -> Dict[Text, Any]:
+        """Counters plus hit rate and average added latency, for logs and benchmarks"""
+        stats = self.stats
+        considered = stats["responses"] - stats["skipped"]
+        return {
+            **stats,
+            "cached": len(self._cache),
+            "hit_rate": round(stats["cache_hits"] / considered, 4) if considered else 0.0,
+            "avg_added_ms": round(stats["added_seconds"] / considered * 1000, 2) if considered else 0.0,
+        }
@@ -0,0 +1,215 @@
+"""Event broker that writes conversation events to local JSONL files for analytics.
+
+``publish`` is called by the Rasa server for every event of every turn. It
+only puts the event on a bounded in-memory queue and returns, so the sink
+never adds latency to a turn. A writer thread drains the queue in batches
+(up to ``batch_size`` events, or whatever arrived within ``flush_interval``
+seconds) and appends each batch with a single write to the current file:
+
+    actions/local_data/events/events-20240501T120000-4242-0001.jsonl
+
+Files are rotated after ``rotate_bytes`` bytes or ``rotate_seconds`` seconds.
+The pid in the name keeps several Rasa servers sharing the directory apart,
+the sequence number files opened within the same second.
+
+If the writer falls behind (slow disk, a burst of traffic) the queue fills
+up and further events are dropped and counted rather than blocking the
+server; a warning with the drop count is logged at most every
+``DROP_WARNING_INTERVAL`` seconds. On shutdown (``close``, which Rasa calls
+when the server stops, or at interpreter exit) everything still queued is
+written and fsynced.
+
+endpoints.yml:
+
+    event_broker:
+      type: event_broker.BatchedFileEventBroker
+      directory: actions/local_data/events
+      max_queue: 10000
+"""
+import asyncio
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Text
+
+from rasa.core.brokers.broker import EventBroker
+from rasa.utils.endpoints import EndpointConfig
+
+from actions.storage import data_path
+
+logger = logging.getLogger(__name__)
+
+DROP_WARNING_INTERVAL = 10.0  # seconds between "events dropped" warnings
+
+_CLOSE = object()  # queue sentinel: write what's left and stop
+
+
+class BatchedFileEventBroker(EventBroker):
+    """Buffers published events and writes them in batches to rotating JSONL files"""
+
+    def __init__(self, directory: Optional[Text] = None, max_queue: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 1.0, rotate_bytes: int = 64 * 1024 * 1024,
+                 rotate_seconds: float = 3600.0, **kwargs: Any) -> None:
+        self.directory = directory or os.environ.get("DIYA_EVENTS_DIR") or data_path("events")
+        os.makedirs(self.directory, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._fd: Optional[int] = None
+        self._file_opened = 0.0
+        self._file_bytes = 0
+        self._last_drop_warning = 0.0
+        self._closed = False
+        self.stats = {
+            "published": 0, "written": 0, "dropped": 0, "batches": 0, "files": 0,
+            "write_errors": 0, "max_queued": 0,
+        }
+        self._writer = threading.Thread(target=self._write_loop, name="event-broker-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self._shutdown)
+
+    @classmethod
+    async def from_endpoint_config(cls, broker_config: EndpointConfig,
+                                   event_loop: Optional[asyncio.AbstractEventLoop] = None
+                                   ) -> "BatchedFileEventBroker":
+        return cls(**broker_config.kwargs)
+
+    # Publishing (called on the server's event loop)
+
+    def publish(self, event: Dict[Text, Any]) -> None:
+        if self._closed:
+            self._drop()
+            return
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self._drop()
+            return
+        self.stats["published"] += 1
+        queued = self._queue.qsize()
+        if queued > self.stats["max_queued"]:
+            self.stats["max_queued"] = queued
+
+    def _drop(self):
+        self.stats["dropped"] += 1
+        now = time.monotonic()
+        if now - self._last_drop_warning >= DROP_WARNING_INTERVAL:
+            self._last_drop_warning = now
+            logger.warning("Event sink is behind, %d events dropped so far", self.stats["dropped"])
+
+    def is_ready(self) -> bool:
+        return self._writer.is_alive()
+
+    async def close(self) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self._shutdown)
+
+    # Writing (writer thread)
+
+    def _write_loop(self):
+        closing = False
+        while not closing:
+            batch: List[Dict[Text, Any]] = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._maybe_rotate()
+                continue
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _CLOSE:
+                    closing = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if batch:
+                self._write_batch(batch)
+        self._close_file()
+
+    def _write_batch(self, batch: List[Dict[Text, Any]]):
+        data = "".join(json.dumps(event, ensure_ascii=False, default=str) + "\n" for event in batch).encode("utf-8")
+        remaining = memoryview(data)
+        try:
+            self._maybe_rotate()
+            if self._fd is None:
+                self._open_file()
+            # Only a short write (e.g. the disk filling up) takes another turn
+            while remaining:
+                remaining = remaining[os.write(self._fd, remaining):]
+            self._file_bytes += len(data)
+            self.stats["written"] += len(batch)
+            self.stats["batches"] += 1
+        except OSError as e:
+            self.stats["write_errors"] += 1
+            self.stats["dropped"] += len(batch)
+            logger.error("Error writing a batch of %d events: %s", len(batch), e)
+            if 0 < len(remaining) < len(data) and self._fd is not None:
+                # End the partial line, so the next batch starts on a line of its own
+                try:
+                    os.write(self._fd, b"\n")
+                except OSError:
+                    pass
+
+    def _maybe_rotate(self):
+        if self._fd is None:
+            return
+        if self._file_bytes >= self.rotate_bytes or time.monotonic() - self._file_opened >= self.rotate_seconds:
+            self._close_file()
+
+    def _open_file(self):
+        self.stats["files"] += 1
+        name = f"events-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{self.stats['files']:04d}.jsonl"
+        self._fd = os.open(os.path.join(self.directory, name), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._file_opened = time.monotonic()
+        self._file_bytes = 0
+
+    def _close_file(self):
+        # Also runs outside _write_batch (idle rotation, shutdown): an error here must not kill the writer
+        if self._fd is None:
+            return
+        try:
+            os.fsync(self._fd)
+        except OSError as e:
+            self.stats["write_errors"] += 1
+            logger.error("Error syncing an event file: %s", e)
+        finally:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = None
+
+    def _shutdown(self, timeout: float = 30.0):
+        """Write and fsync everything queued, then stop the writer (safe to call more than once)"""
+        if self._closed:
+            return
+        self._closed = True
+        # Never block on the queue at exit: a writer that died (or hung) leaves it full for good
+        deadline = time.monotonic() + timeout
+        if not self._writer.is_alive():
+            logger.error("Event sink writer is not running, %d queued events were not written", self._queue.qsize())
+            return
+        try:
+            self._queue.put(_CLOSE, timeout=timeout)
+        except queue.Full:
+            logger.error("Event sink writer is stuck, %d queued events were not written", self._queue.qsize())
+            return
+        self._writer.join(max(0.0, deadline - time.monotonic()))
+        if self._writer.is_alive():
+            logger.error("Event sink writer did not finish within %.0fs, %d events still queued",
+                         timeout, self._queue.qsize())
+            return
+        logger.info("Event sink closed: %s", ", ".join(f"{k}={v}" for k, v in self.stats.items()))
@@ -0,0 +1,101 @@
+"""Intent and entity post-processing for messages that are just an order ID.
+
+A message like ``ORD-06KBETNSG0M00`` or ``my order id is 123456`` is
+recognised with actions.id_generator.extract_order_id (the same parser the
+order actions use), after an optional short lead-in. ``OrderIdClassifier``
+then sets the provide_order_id intent (confidence 1.0) and the normalised
+order_id entity. It runs after the trained classifiers and overrides
+whatever DIETClassifier or FallbackClassifier made of the ID (random codes
+are out of vocabulary and often fell back to nlu_fallback). It doesn't
+skip any component, so it makes these turns correct, not faster.
+Everything else is left as the models parsed it, and training is unchanged.
+
+Button payloads (``/add_to_cart{"product_idx": "3"}``) need nothing here:
+Rasa parses them with its RegexMessageHandler before the NLU graph runs.
+
+config.yml:
+
+    pipeline:
+    ...
+    - name: FallbackClassifier
+      threshold: 0.3
+    - name: nlu_order_id.OrderIdClassifier
+    - name: NLUCommandAdapter
+
+NLU_ORDER_ID=off turns it off without retraining (the benchmark compares
+both, see benchmarks/bench_nlu_order_id.py).
+"""
+import os
+import re
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+from rasa.engine.graph import ExecutionContext, GraphComponent
+from rasa.engine.recipes.default_recipe import DefaultV1Recipe
+from rasa.engine.storage.resource import Resource
+from rasa.engine.storage.storage import ModelStorage
+from rasa.shared.nlu.constants import ENTITIES, INTENT, INTENT_RANKING_KEY, TEXT
+from rasa.shared.nlu.training_data.message import Message
+
+from actions.id_generator import ENCODED_LENGTH, ORDER_PREFIX, extract_order_id
+
+ENABLED = os.environ.get("NLU_ORDER_ID", "on").lower() not in ("0", "off", "false", "no")
+
+ORDER_ID_INTENT = "provide_order_id"
+# An optional short lead-in ("my order id is", "track order") and a single token, which must be an order ID
+ORDER_ID_MESSAGE_PATTERN = re.compile(
+    r"^\s*(?:(?:my\s+)?order(?:\s+(?:id|number|no\.?))?(?:\s+is)?\s*:?\s*|track(?:\s+order)?\s+)?"
+    r"(?P<token>(?:ORD-)?[0-9A-Z]+)\s*[.!]?\s*$",
+    re.IGNORECASE,
+)
+
+
+def parse_order_id(text: Text) -> Optional[Tuple[Text, List[Dict[Text, Any]]]]:
+    """(intent, entities) for a message that is just an order ID, None for anything else"""
+    match = ORDER_ID_MESSAGE_PATTERN.match(text)
+    if not match:
+        return None
+    token = match.group("token")
+    code = token[len(ORDER_PREFIX):] if token.upper().startswith(ORDER_PREFIX) else token
+    # The whole token must be the ID, not just contain one ("ORD-1234567")
+    if len(code) not in (6, ENCODED_LENGTH):
+        return None
+    order_id = extract_order_id(token)
+    if order_id is None:
+        return None
+    return ORDER_ID_INTENT, [{
+        "entity": "order_id", "value": order_id,
+        "start": match.start("token"), "end": match.end("token"),
+    }]
+
+
+@DefaultV1Recipe.register([DefaultV1Recipe.ComponentType.INTENT_CLASSIFIER,
+                           DefaultV1Recipe.ComponentType.ENTITY_EXTRACTOR], is_trainable=False)
+class OrderIdClassifier(GraphComponent):
+    """Sets intent and entity of messages that are just an order ID, over what the models predicted"""
+
+    @staticmethod
+    def get_default_config() -> Dict[Text, Any]:
+        return {}
+
+    @classmethod
+    def create(cls, config: Dict[Text, Any], model_storage: ModelStorage, resource: Resource,
+               execution_context: ExecutionContext) -> "OrderIdClassifier":
+        return cls()
+
+    def process(self, messages: List[Message]) -> List[Message]:
+        if not ENABLED:
+            return messages
+        for message in messages:
+            parsed = parse_order_id(message.get(TEXT) or "")
+            if parsed is None:
+                continue
+            intent, entities = parsed
+            for entity in entities:
+                entity["extractor"] = self.__class__.__name__
+            # The models' order_id entities (if any) are replaced by the exact match
+            others = [e for e in message.get(ENTITIES, []) if e.get("entity") != "order_id"]
+            ranking = [r for r in message.get(INTENT_RANKING_KEY, []) if r.get("name") != intent]
+            message.set(INTENT, {"name": intent, "confidence": 1.0}, add_to_output=True)
+            message.set(INTENT_RANKING_KEY, [{"name": intent, "confidence": 1.0}] + ranking, add_to_output=True)
+            message.set(ENTITIES, others + entities, add_to_output=True)
+        return messages
@@ -0,0 +1,192 @@
+"""SQLite tracker store that keeps conversations short.
+
+Rasa sends the whole tracker to the action server on every custom action
+call, and a shopping session piles up events: a SlotSet for every page
+turn, the cart JSON rewritten on every change, action_listen after every
+turn. This store keeps each conversation as one row holding its recent
+events. Once a conversation has more than ``compact_after`` live events,
+everything before the last ``keep_events`` (cut at the start of a user
+turn) is replaced by a snapshot: one SlotSet per slot that differs from its
+initial value, plus the active loop. The replaced events are moved to an
+append-only archive table, so the full history is still available from
+``retrieve_full_tracker`` (``rasa export``, analytics).
+
+Loaded trackers, and with them the trackers sent to actions, therefore stay
+below ``compact_after`` plus one turn of events however long the session
+runs. Load and save latency, bytes per tracker and compactions are counted
+in ``stats``, see benchmarks/bench_tracker_store.py.
+
+endpoints.yml:
+
+    tracker_store:
+      type: sqlite_tracker_store.CompactingSQLiteTrackerStore
+      db: actions/local_data/trackers.db
+      compact_after: 150
+      keep_events: 60
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Text
+
+from rasa.core.brokers.broker import EventBroker
+from rasa.core.tracker_store import TrackerStore
+from rasa.shared.core.domain import Domain
+from rasa.shared.core.events import ActiveLoop, Event, SlotSet, UserUttered
+from rasa.shared.core.trackers import DialogueStateTracker
+
+from actions.storage import connect_sqlite, data_path
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY = "snapshot"  # metadata flag on the events that stand in for compacted history
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trackers (
+    sender_id TEXT PRIMARY KEY,
+    events TEXT NOT NULL,
+    live_events INTEGER NOT NULL,
+    archived_events INTEGER NOT NULL DEFAULT 0,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS archived_events (
+    sender_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    PRIMARY KEY (sender_id, seq)
+) WITHOUT ROWID;
+"""
+
+
+def _is_snapshot(event: Event) -> bool:
+    return bool(event.metadata and event.metadata.get(SNAPSHOT_KEY))
+
+
+class CompactingSQLiteTrackerStore(TrackerStore):
+    """Tracker store on a local SQLite file, compacting long conversations into slot snapshots"""
+
+    def __init__(self, domain: Optional[Domain] = None, event_broker: Optional[EventBroker] = None,
+                 db: Optional[Text] = None, compact_after: int = 150, keep_events: int = 60,
+                 **kwargs: Any) -> None:
+        super().__init__(domain, event_broker, **kwargs)
+        self.db_path = db or os.environ.get("DIYA_TRACKER_DB") or data_path("trackers.db")
+        if keep_events >= compact_after:
+            raise ValueError("keep_events must be smaller than compact_after")
+        self.compact_after = compact_after
+        self.keep_events = keep_events
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._conn = connect_sqlite(self.db_path)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self.stats = {
+            "loads": 0, "load_seconds": 0.0, "saves": 0, "save_seconds": 0.0,
+            "bytes_written": 0, "max_bytes": 0, "compactions": 0, "archived_events": 0,
+        }
+
+    # Reading
+
+    async def retrieve(self, sender_id: Text) -> Optional[DialogueStateTracker]:
+        start = time.perf_counter()
+        with self._lock:
+            row = self._conn.execute("SELECT events FROM trackers WHERE sender_id = ?", (sender_id,)).fetchone()
+        if row is None:
+            return None
+        tracker = DialogueStateTracker.from_dict(sender_id, json.loads(row["events"]), self.domain.slots,
+                                                 self.max_event_history)
+        self.stats["loads"] += 1
+        self.stats["load_seconds"] += time.perf_counter() - start
+        return tracker
+
+    async def retrieve_full_tracker(self, conversation_id: Text) -> Optional[DialogueStateTracker]:
+        """The conversation with all its events, including the ones compacted away"""
+        with self._lock:
+            row = self._conn.execute("SELECT events FROM trackers WHERE sender_id = ?",
+                                     (conversation_id,)).fetchone()
+            if row is None:
+                return None
+            archived = [json.loads(r["event"]) for r in self._conn.execute(
+                "SELECT event FROM archived_events WHERE sender_id = ? ORDER BY seq", (conversation_id,))]
+        live = [e for e in json.loads(row["events"]) if not (e.get("metadata") or {}).get(SNAPSHOT_KEY)]
+        return DialogueStateTracker.from_dict(conversation_id, archived + live, self.domain.slots)
+
+    async def keys(self) -> Iterable[Text]:
+        with self._lock:
+            return [row["sender_id"] for row in self._conn.execute("SELECT sender_id FROM trackers")]
+
+    # Writing
+
+    async def save(self, tracker: DialogueStateTracker) -> None:
+        await self.stream_events(tracker)
+        start = time.perf_counter()
+        events = list(tracker.events)
+        archived: List[Event] = []
+        if len(events) > self.compact_after:
+            cut = self._cut_index(events)
+            if cut:
+                archived = [e for e in events[:cut] if not _is_snapshot(e)]
+                events = self._snapshot(tracker.sender_id, events[:cut]) + events[cut:]
+        body = json.dumps([e.as_dict() for e in events], ensure_ascii=False)
+
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            if archived:
+                row = self._conn.execute("SELECT archived_events FROM trackers WHERE sender_id = ?",
+                                         (tracker.sender_id,)).fetchone()
+                archived_before = row["archived_events"] if row else 0
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO archived_events (sender_id, seq, event) VALUES (?, ?, ?)",
+                    [(tracker.sender_id, archived_before + i, json.dumps(e.as_dict(), ensure_ascii=False))
+                     for i, e in enumerate(archived)],
+                )
+            self._conn.execute(
+                "INSERT INTO trackers (sender_id, events, live_events, archived_events, updated) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT(sender_id) DO UPDATE SET events = excluded.events, "
+                "live_events = excluded.live_events, "
+                "archived_events = trackers.archived_events + ?, updated = excluded.updated",
+                (tracker.sender_id, body, len(events), len(archived), time.time(), len(archived)),
+            )
+
+        size = len(body.encode("utf-8"))
+        self.stats["saves"] += 1
+        self.stats["save_seconds"] += time.perf_counter() - start
+        self.stats["bytes_written"] += size
+        self.stats["max_bytes"] = max(self.stats["max_bytes"], size)
+        if archived:
+            self.stats["compactions"] += 1
+            self.stats["archived_events"] += len(archived)
+            logger.debug("Compacted %s: archived %d events, %d live events, %d bytes",
+                         tracker.sender_id, len(archived), len(events), size)
+
+    def _cut_index(self, events: List[Event]) -> int:
+        """Where to cut: the start of the user turn that leaves at least keep_events behind it (0: don't)"""
+        for i in range(len(events) - self.keep_events, 0, -1):
+            if isinstance(events[i], UserUttered):
+                return i
+        return 0
+
+    def _snapshot(self, sender_id: Text, events: List[Event]) -> List[Event]:
+        """Events that restore the slot values and active loop the given events end with"""
+        replayed = DialogueStateTracker.from_events(sender_id, events, self.domain.slots)
+        timestamp = events[-1].timestamp
+        metadata = {SNAPSHOT_KEY: True}
+        initial = {slot.name: slot.initial_value for slot in self.domain.slots}
+        snapshot: List[Event] = [
+            SlotSet(name, value, timestamp=timestamp, metadata=metadata)
+            for name, value in replayed.current_slot_values().items()
+            if value != initial.get(name)
+        ]
+        if replayed.active_loop_name:
+            snapshot.append(ActiveLoop(replayed.active_loop_name, timestamp=timestamp, metadata=metadata))
+        return snapshot
+
+    def summary(self) -> Dict[Text, Any]:
+        """Averages over the calls so far, e.g. for benchmarks and logs"""
+        stats = self.stats
+        return {
+            **stats,
+            "avg_load_ms": stats["load_seconds"] / max(1, stats["loads"]) * 1000,
+            "avg_save_ms": stats["save_seconds"] / max(1, stats["saves"]) * 1000,
+            "avg_bytes": stats["bytes_written"] / max(1, stats["saves"]),
+        }
@@ -0,0 +1,185 @@
+"""Incremental training: retrain only what the changed inputs need.
+
+The training inputs are fingerprinted in groups:
+
+- config: config.yml and the custom NLU/NLG components it loads
+- domain: domain.yml
+- data: everything under data/ (NLU examples, flows, patterns)
+
+and compared with the fingerprints of the last model trained here:
+
+- nothing changed: the last model is reused, nothing is trained
+- only data changed: the last model is finetuned on the new data
+  (``rasa train --finetune`` for --epoch-fraction of the configured epochs)
+- config or domain changed, or no previous model: a full ``rasa train``
+
+Every ``rasa train`` run shares Rasa's graph cache (RASA_CACHE_DIRECTORY,
+kept under --cache-dir), so components whose inputs did not change, e.g.
+the featurizers and their featurised training data after a flows-only edit,
+are restored from the cache rather than retrained. Wall time is reported
+per stage and per component (trained or restored from cache).
+
+Usage:
+    python train.py                          # models/ and .rasa/incremental
+    python train.py --force                  # full training regardless
+    python train.py --cache-dir /cache --out models --epoch-fraction 0.3
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Text
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+INPUT_GROUPS = {
+    "config": ["config.yml", "nlu_order_id.py", "actions/id_generator.py", "custom_components.py"],
+    "domain": ["domain.yml", "domain/**/*.yml"],
+    "data": ["data/**/*.yml", "data/**/*.yaml"],
+}
+COMPONENT_LINE = re.compile(r"(Starting to train|Finished training|Restored) component '([^']+)'")
+
+
+def fingerprint(patterns: List[Text]) -> Text:
+    digest = hashlib.sha256()
+    for pattern in patterns:
+        for path in sorted(glob.glob(os.path.join(ROOT, pattern), recursive=True)):
+            digest.update(os.path.relpath(path, ROOT).encode("utf-8"))
+            with open(path, "rb") as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def load_state(path: Text) -> Dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(path: Text, state: Dict):
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def plan(previous: Dict, current: Dict[Text, Text], force: bool, finetune: bool) -> Text:
+    """'reuse', 'finetune' or 'full'"""
+    model = previous.get("model")
+    if force or not model or not os.path.exists(model):
+        return "full"
+    changed = {group for group, value in current.items() if previous.get("fingerprints", {}).get(group) != value}
+    if not changed:
+        return "reuse"
+    if changed == {"data"} and finetune:
+        return "finetune"
+    return "full"
+
+
+def rasa_train(args, models_dir: Text, finetune_from: Optional[Text]) -> Dict[Text, Dict]:
+    """Run rasa train, echoing its output; returns per-component timings"""
+    command = [args.rasa, "train", "--out", models_dir]
+    if finetune_from:
+        command += ["--finetune", finetune_from, "--epoch-fraction", str(args.epoch_fraction)]
+    env = dict(os.environ, RASA_CACHE_DIRECTORY=os.path.join(args.cache_dir, "rasa"))
+    env.setdefault("RASA_MAX_CACHE_SIZE", str(args.max_cache_mb))
+    components: Dict[Text, Dict] = {}
+    started: Dict[Text, float] = {}
+    proc = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            text=True, bufsize=1)
+    for line in proc.stdout:
+        sys.stdout.write(line)
+        match = COMPONENT_LINE.search(line)
+        if not match:
+            continue
+        what, name = match.groups()
+        now = time.perf_counter()
+        if what == "Starting to train":
+            started[name] = now
+        elif what == "Finished training" and name in started:
+            components.setdefault(name, {"trained": 0.0, "restored": 0})["trained"] += now - started.pop(name)
+        elif what == "Restored":
+            components.setdefault(name, {"trained": 0.0, "restored": 0})["restored"] += 1
+    if proc.wait() != 0:
+        raise subprocess.CalledProcessError(proc.returncode, command)
+    return components
+
+
+def newest_model(models_dir: Text, since: float) -> Optional[Text]:
+    models = [p for p in glob.glob(os.path.join(models_dir, "*.tar.gz")) if os.path.getmtime(p) >= since]
+    return max(models, key=os.path.getmtime) if models else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=os.path.join(ROOT, "models"), help="where the model to serve goes")
+    parser.add_argument("--cache-dir", default=os.path.join(ROOT, ".rasa", "incremental"),
+                        help="fingerprints, the last model and Rasa's graph cache (keep it between builds)")
+    parser.add_argument("--epoch-fraction", type=float, default=0.2, help="share of the epochs when finetuning")
+    parser.add_argument("--no-finetune", dest="finetune", action="store_false",
+                        help="train from scratch when only the data changed")
+    parser.add_argument("--force", action="store_true", help="full training regardless of the fingerprints")
+    parser.add_argument("--max-cache-mb", type=int, default=2000, help="RASA_MAX_CACHE_SIZE for the graph cache")
+    parser.add_argument("--rasa", default="rasa", help="rasa executable")
+    args = parser.parse_args()
+
+    stages = {}
+    start = time.perf_counter()
+    models_dir = os.path.join(args.cache_dir, "models")
+    os.makedirs(models_dir, exist_ok=True)
+    state_path = os.path.join(args.cache_dir, "fingerprints.json")
+    previous = load_state(state_path)
+    current = {group: fingerprint(patterns) for group, patterns in INPUT_GROUPS.items()}
+    action = plan(previous, current, args.force, args.finetune)
+    stages["fingerprint"] = time.perf_counter() - start
+    changed = [g for g in current if previous.get("fingerprints", {}).get(g) != current[g]]
+    print(f"Changed inputs: {', '.join(changed) or 'none'} -> {action}")
+
+    components = {}
+    model = previous.get("model")
+    if action != "reuse":
+        stage_start = time.perf_counter()
+        try:
+            components = rasa_train(args, models_dir, model if action == "finetune" else None)
+        except subprocess.CalledProcessError:
+            if action != "finetune":
+                raise
+            # e.g. the new data changed the model's labels; finetuning can't handle that
+            print("Finetuning failed, training from scratch")
+            action = "full"
+            components = rasa_train(args, models_dir, None)
+        model = newest_model(models_dir, stage_start)
+        if model is None:
+            raise SystemExit(f"rasa train did not write a model to {models_dir}")
+        stages[f"rasa train ({action})"] = time.perf_counter() - stage_start
+        for old in glob.glob(os.path.join(models_dir, "*.tar.gz")):
+            if old != model:
+                os.remove(old)
+        save_state(state_path, {"fingerprints": current, "model": model, "trained_at": time.time(),
+                                "mode": action})
+
+    stage_start = time.perf_counter()
+    os.makedirs(args.out, exist_ok=True)
+    target = os.path.join(args.out, os.path.basename(model))
+    if os.path.abspath(target) != os.path.abspath(model) and not os.path.exists(target):
+        shutil.copy2(model, target)
+    stages["copy model"] = time.perf_counter() - stage_start
+
+    print(f"\nModel: {target}")
+    for name, timing in components.items():
+        source = "restored from cache" if timing["restored"] and not timing["trained"] else "trained"
+        print(f"  {name:40} {timing['trained']:8.2f}s  {source}")
+    for name, seconds in stages.items():
+        print(f"{name:42} {seconds:8.2f}s")
+    print(f"{'total':42} {time.perf_counter() - start:8.2f}s")
+
+
+if __name__ == "__main__":
+    main()